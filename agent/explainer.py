@@ -63,6 +63,9 @@ def explain(tool_args: Dict[str, Any], sim_result: Dict[str, Any], cfg=None) ->
     best_label = _label(best)
     best_m5 = _safe_float(best.get("median_gap_after_5_laps"), 0.0)
 
+    # Paired-sample head-to-head odds, when the simulator provided them
+    wins = (sim_result.get("win_probability") or {}).get("after_5_laps")
+
     # Build comparison lines against all other candidates
     deltas: List[str] = []
     for i, c in enumerate(cands):
@@ -71,7 +74,10 @@ def explain(tool_args: Dict[str, Any], sim_result: Dict[str, Any], cfg=None) ->
         lab = _label(c)
         m5 = _safe_float(c.get("median_gap_after_5_laps"), 0.0)
         delta = best_m5 - m5  # positive means best is better by +delta seconds
-        deltas.append(f"{best_label} beats {lab} by {delta:+.2f}s at +5 laps")
+        line = f"{best_label} beats {lab} by {delta:+.2f}s at +5 laps"
+        if wins and wins[best_idx][i] is not None:
+            line += f" (ahead in {wins[best_idx][i]:.0%} of paired samples)"
+        deltas.append(line)
 
     # Assumptions (read from any candidate; they should be identical)
     assumptions_src = (best.get("assumptions") or {})
@@ -110,6 +116,9 @@ def explain(tool_args: Dict[str, Any], sim_result: Dict[str, Any], cfg=None) ->
     metrics = {
         "median_gap_by_lap": {"lap": 5, "gap_seconds": best_m5},
         "selected_index": best_idx,
+        "win_probability_vs_others": (
+            {_label(c): wins[best_idx][i] for i, c in enumerate(cands) if i != best_idx}
+            if wins else None),
     }
 
     return Explanation(
@@ -10,10 +10,15 @@ Iterative Planner Agent that:
 """
 
 import json
+import re
+import threading
+import time
 import requests
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Literal, Optional, Tuple
 from agent.config import LLMConfig
 from agent.llm_client import ChatClient
+from agent.shared_sims import SharedSimulations
 
 
 class AgentTrace:
@@ -22,10 +27,20 @@ class AgentTrace:
     def __init__(self):
         self.iterations = []
         self.user_query = ""
+        self.refinement = "llm"
         self.parsed_constraints = {}
         self.total_simulations = 0
+        self.shared_simulations = 0
         self.total_tokens = 0
         self.thinking_steps = []
+        self.speculation = {
+            "launched": 0,
+            "lookups": 0,
+            "hits": 0,
+            "hit_rate": 0.0,
+            "wasted": 0,
+            "wasted_sim_s": 0.0,
+        }
 
     def add_iteration(self, iteration_data: Dict[str, Any]):
         self.iterations.append(iteration_data)
@@ -36,12 +51,15 @@ class AgentTrace:
     def to_dict(self) -> Dict[str, Any]:
         return {
             "user_query": self.user_query,
+            "refinement": self.refinement,
             "parsed_constraints": self.parsed_constraints,
             "thinking_steps": self.thinking_steps,
             "iterations": self.iterations,
             "total_simulations": self.total_simulations,
+            "shared_simulations": self.shared_simulations,
             "total_tokens": self.total_tokens,
             "final_iteration": len(self.iterations),
+            "speculation": self.speculation,
         }
 
 
@@ -112,15 +130,42 @@ def _safe_compound(val, default="medium"):
     return default
 
 
+Refinement = Literal["llm", "optimizer"]
+COMPOUNDS = ("soft", "medium", "hard")
+
+
 class IterativePlanner:
     """Agent that iteratively refines strategies until convergence"""
 
-    def __init__(self, cfg: LLMConfig):
+    def __init__(self, cfg: LLMConfig, refinement: Refinement = "llm",
+                 llm_limiter: Optional[threading.Semaphore] = None,
+                 shared_sims: Optional[SharedSimulations] = None):
+        if refinement not in ("llm", "optimizer"):
+            raise ValueError(f"Unknown refinement mode: {refinement}")
         self.cfg = cfg
-        self.client = ChatClient(cfg)
+        self.client = ChatClient(cfg, limiter=llm_limiter)
+        # Simulations shared with other planners running concurrently (batch planning)
+        self.shared_sims = shared_sims
         self.trace = AgentTrace()
+        self.trace.refinement = refinement
+        self.refinement = refinement
         self.max_iterations = 3
         self.convergence_threshold = 0.1  # seconds
+        # Also stop once the best beats the runner-up in this share of paired samples
+        self.decisive_win_probability = 0.95
+        # Speculative neighbourhood simulation while the refiner LLM is thinking
+        self.speculate = True
+        self.speculation_width = 6  # max neighbours per round (run_sim caps at 6)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Per-plan evaluation table keyed by (pit_lap, compound), merged across iterations
+        self.evaluated: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        # P(a ahead of b at +5 laps) for candidates simulated in the same run_sim call
+        self.head_to_head: Dict[Tuple[Tuple[int, str], Tuple[int, str]], float] = {}
+        self.max_reported_candidates = 6  # run_sim accepts at most 6 candidates
+        self._speculative: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        # Simulator-call budget for refinement="optimizer": enough for the probe plus a
+        # full ternary search per compound over a ~70-lap window (3 + 3 * 17)
+        self.max_optimizer_simulations = 60
 
     def parse_constraints(self, user_text: str) -> Dict[str, Any]:
         """Step 1: Parse user query into structured constraints"""
@@ -247,11 +292,7 @@ class IterativePlanner:
 
         return normalized
 
-    def simulate_candidates(self, constraints: Dict[str, Any], candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Step 3: Run simulation for candidates"""
-        self.trace.add_thinking(
-            f"🎲 Simulating {len(candidates)} strategies...")
-
+    def _sim_args(self, constraints: Dict[str, Any], candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
         sim_args = {
             "base_lap": constraints["base_lap"],
             "base_target_gap_s": constraints["base_target_gap_s"],
@@ -265,16 +306,212 @@ class IterativePlanner:
         if constraints.get("sc_window"):
             sim_args["sc_window"] = constraints["sc_window"]
 
+        return sim_args
+
+    def _post_sim(self, sim_args: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a run_sim request and return the decoded response"""
+        r = requests.post(self.cfg.sim_api_url, json=sim_args, timeout=60,
+                          headers={"X-Sim-Priority": "agent"})
+        r.raise_for_status()
+        return r.json()
+
+    def _take_speculative(self, key: Tuple[int, str]) -> Optional[Dict[str, Any]]:
+        """Return the speculated result for a candidate key, if any (waits if still in flight)"""
+        spec = self._speculative.get(key)
+        if spec is None or spec["used"]:
+            return None
         try:
-            r = requests.post(self.cfg.sim_api_url, json=sim_args, timeout=60)
-            r.raise_for_status()
-            sim_result = r.json()
-            self.trace.total_simulations += len(candidates)
-            self.trace.add_thinking(f"✅ Simulation complete")
-            return sim_result
-        except Exception as e:
-            self.trace.add_thinking(f"❌ Simulation failed: {e}")
-            raise
+            batch_result, _ = spec["future"].result()
+        except Exception:
+            # Speculation failed or was cancelled - fall back to a normal simulation
+            return None
+        spec["used"] = True
+        self._record_head_to_head(batch_result)
+        return batch_result["candidates"][spec["index"]]
+
+    def _record_head_to_head(self, response: Dict[str, Any]):
+        """Keep run_sim's paired-sample win probabilities for later convergence checks"""
+        matrix = (response.get("win_probability") or {}).get("after_5_laps")
+        if not matrix:
+            return
+        keys = [(c["candidate"]["pit_lap"], c["candidate"]["compound"])
+                for c in response.get("candidates", [])]
+        for i, a in enumerate(keys):
+            for j, b in enumerate(keys):
+                if i != j and matrix[i][j] is not None:
+                    self.head_to_head[(a, b)] = matrix[i][j]
+
+    def _p_beats(self, a: Dict[str, Any], b: Dict[str, Any]) -> Optional[float]:
+        """P(a ahead of b at +5 laps) if both were simulated together, else None"""
+        return self.head_to_head.get(((a["candidate"]["pit_lap"], a["candidate"]["compound"]),
+                                      (b["candidate"]["pit_lap"], b["candidate"]["compound"])))
+
+    def _run_sims(self, constraints: Dict[str, Any], candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Simulate candidates via run_sim, which accepts at most 6 candidates per request"""
+        out = []
+        for i in range(0, len(candidates), 6):
+            batch = candidates[i:i + 6]
+            fresh = self._post_sim(self._sim_args(constraints, batch))
+            self._record_head_to_head(fresh)
+            if self.shared_sims is not None:
+                self.shared_sims.record_odds(
+                    self._sim_args(constraints, []), self.head_to_head)
+            self.trace.total_simulations += len(batch)
+            out += fresh.get("candidates", [])
+        return out
+
+    def simulate_candidates(self, constraints: Dict[str, Any], candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Step 3: Run simulation for candidates"""
+        self.trace.add_thinking(
+            f"🎲 Simulating {len(candidates)} strategies...")
+
+        # Skip candidates already evaluated in this plan, then serve speculated ones
+        results: List[Optional[Dict[str, Any]]] = []
+        misses = []
+        reused = served = 0
+        for c in candidates:
+            key = (c["pit_lap"], c["compound"])
+            hit = self.evaluated.get(key)
+            if hit is not None:
+                reused += 1
+            else:
+                if self._speculative:
+                    self.trace.speculation["lookups"] += 1
+                hit = self._take_speculative(key)
+                if hit is not None:
+                    self.trace.speculation["hits"] += 1
+                    served += 1
+                else:
+                    misses.append(c)
+            results.append(hit)
+
+        if reused:
+            self.trace.add_thinking(
+                f"♻️ {reused} of {len(candidates)} strategies already evaluated - skipping")
+        if served:
+            self.trace.add_thinking(
+                f"⚡ {served} of {len(candidates)} strategies served from speculation")
+
+        sim_result = {
+            "base_lap": constraints["base_lap"],
+            "base_target_gap_s": constraints["base_target_gap_s"],
+            "candidates": [],
+        }
+        if misses:
+            try:
+                if self.shared_sims is not None:
+                    fresh_cands, shared = self.shared_sims.run(
+                        self._sim_args(constraints, []), misses,
+                        lambda owned: self._run_sims(constraints, owned))
+                    self.head_to_head.update(
+                        self.shared_sims.odds(self._sim_args(constraints, [])))
+                    if shared:
+                        self.trace.shared_simulations += shared
+                        self.trace.add_thinking(
+                            f"🤝 {shared} strategies shared with concurrent plans")
+                else:
+                    fresh_cands = self._run_sims(constraints, misses)
+            except Exception as e:
+                self.trace.add_thinking(f"❌ Simulation failed: {e}")
+                raise
+            fresh_iter = iter(fresh_cands)
+            results = [r if r is not None else next(fresh_iter)
+                       for r in results]
+
+        sim_result["candidates"] = results
+        for r in results:
+            c = r["candidate"]
+            self.evaluated[(c["pit_lap"], c["compound"])] = r
+        self.trace.add_thinking(f"✅ Simulation complete")
+        return sim_result
+
+    def evaluation_result(self, constraints: Dict[str, Any]) -> Dict[str, Any]:
+        """Best candidates from the global evaluation table, in run_sim response shape"""
+        ranked = sorted(self.evaluated.values(), key=lambda c: c.get(
+            "median_gap_after_5_laps", float('-inf')), reverse=True)
+        top = ranked[:self.max_reported_candidates]
+        # Head-to-head odds for pairs that shared a run_sim call; None elsewhere
+        matrix = [[None if a is b else self._p_beats(a, b) for b in top] for a in top]
+        known = any(p is not None for row in matrix for p in row)
+        return {
+            "base_lap": constraints["base_lap"],
+            "base_target_gap_s": constraints["base_target_gap_s"],
+            "candidates": top,
+            "win_probability": {"after_5_laps": matrix} if known else None,
+        }
+
+    def _neighbourhood(self, constraints: Dict[str, Any], sim_result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Likely refinements of the current best: ±1 lap, compound swaps, then ±2 laps"""
+        cands = sim_result.get("candidates", [])
+        if not cands:
+            return []
+        best = max(cands, key=lambda c: c.get(
+            "median_gap_after_5_laps", float('-inf')))
+        lap = best["candidate"]["pit_lap"]
+        compound = best["candidate"]["compound"]
+        last_lap = constraints["base_lap"] + \
+            max(len(best.get("p50_by_lap") or []), 1) - 1
+
+        proposals = [(lap - 1, compound), (lap + 1, compound)]
+        proposals += [(lap, c) for c in ("soft", "medium", "hard") if c != compound]
+        proposals += [(lap - 2, compound), (lap + 2, compound)]
+
+        out = []
+        for pit_lap, comp in proposals:
+            key = (pit_lap, comp)
+            if key in self.evaluated or key in self._speculative:
+                continue
+            if pit_lap <= constraints["base_lap"] or pit_lap > last_lap:
+                continue
+            out.append({"pit_lap": pit_lap, "compound": comp})
+            if len(out) >= self.speculation_width:
+                break
+        return out
+
+    def _speculate(self, constraints: Dict[str, Any], sim_result: Dict[str, Any]):
+        """Start simulating the best candidate's neighbourhood in the background"""
+        if not self.speculate or self._executor is None:
+            return
+        neighbours = self._neighbourhood(constraints, sim_result)
+        if not neighbours:
+            return
+
+        sim_args = self._sim_args(constraints, neighbours)
+
+        def run():
+            t0 = time.perf_counter()
+            return self._post_sim(sim_args), time.perf_counter() - t0
+
+        future = self._executor.submit(run)
+        for i, c in enumerate(neighbours):
+            self._speculative[(c["pit_lap"], c["compound"])] = {
+                "future": future, "index": i, "batch_size": len(neighbours), "used": False,
+            }
+        self.trace.speculation["launched"] += len(neighbours)
+        self.trace.add_thinking(
+            f"⚡ Speculating {len(neighbours)} neighbour strategies while the refiner thinks")
+
+    def _finish_speculation(self):
+        """Stop background work and account for speculated results that were never used"""
+        if self._executor is not None:
+            # Drop queued speculation but let a running simulation finish, so it does not
+            # hold a simulation worker past the plan and its time counts as waste below
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+        stats = self.trace.speculation
+        for spec in self._speculative.values():
+            if spec["used"]:
+                continue
+            stats["wasted"] += 1
+            future = spec["future"]
+            if future.done() and not future.cancelled() and future.exception() is None:
+                _, elapsed = future.result()
+                stats["wasted_sim_s"] += elapsed / spec["batch_size"]
+        stats["wasted_sim_s"] = round(stats["wasted_sim_s"], 4)
+        stats["hit_rate"] = round(
+            stats["hits"] / stats["lookups"], 3) if stats["lookups"] else 0.0
+        self._speculative = {}
 
     def analyze_and_refine(self, sim_result: Dict[str, Any], iteration: int) -> Dict[str, Any]:
         """Step 4: Analyze results and decide if refinement needed"""
@@ -296,6 +533,7 @@ class IterativePlanner:
                                 0.0) if second else best_gap
 
         delta = abs(best_gap - second_gap)
+        p_best = self._p_beats(best, second) if second else None
 
         # Summary for LLM
         summary = f"""Iteration {iteration} results:
@@ -305,6 +543,8 @@ class IterativePlanner:
             summary += f"- Option {i+1}: L{c['candidate']['pit_lap']} ({c['candidate']['compound']}) → {c['median_gap_after_5_laps']:.2f}s\n"
 
         summary += f"\nGap between best and 2nd: {delta:.2f}s"
+        if p_best is not None:
+            summary += f"\nBest ends ahead of 2nd in {p_best:.0%} of paired samples"
 
         # Decide if we should continue
         if iteration >= self.max_iterations:
@@ -325,6 +565,15 @@ class IterativePlanner:
                 "analysis": summary,
             }
 
+        if p_best is not None and p_best >= self.decisive_win_probability:
+            self.trace.add_thinking(
+                f"✅ Converged (best ahead of 2nd in {p_best:.0%} of samples)")
+            return {
+                "should_continue": False,
+                "reasoning": f"Converged. Best strategy ends ahead of the 2nd in {p_best:.0%} of paired samples",
+                "analysis": summary,
+            }
+
         # Ask LLM for refinement suggestions
         messages = [
             {"role": "system", "content": SYSTEM_REFINER},
@@ -356,54 +605,144 @@ class IterativePlanner:
 
         return refinement
 
-    def plan_iteratively(self, user_text: str) -> Dict[str, Any]:
-        """Main orchestration: iteratively refine strategies"""
-
-        # Step 1: Parse constraints
-        constraints = self.parse_constraints(user_text)
-
-        # Step 2: Generate initial candidates
-        candidates = self.generate_candidates(constraints)
-
-        best_sim_result = None
-
-        for iteration in range(1, self.max_iterations + 1):
-            self.trace.add_thinking(
-                f"\n{'='*50}\n🔄 ITERATION {iteration}\n{'='*50}")
+    def _will_refine(self, sim_result: Dict[str, Any], iteration: int) -> bool:
+        """Whether analyze_and_refine is going to consult the refiner LLM"""
+        if iteration >= self.max_iterations:
+            return False
+        ranked = sorted(sim_result.get("candidates", []), key=lambda c: c.get(
+            "median_gap_after_5_laps", float('-inf')), reverse=True)
+        if len(ranked) < 2:
+            return False  # a single candidate is treated as converged
+        gaps = [c.get("median_gap_after_5_laps", float('-inf')) for c in ranked[:2]]
+        if abs(gaps[0] - gaps[1]) < self.convergence_threshold:
+            return False
+        p_best = self._p_beats(ranked[0], ranked[1])
+        return p_best is None or p_best < self.decisive_win_probability
+
+    def _search_space(self, constraints: Dict[str, Any], last_lap: int) -> Tuple[int, int, List[str]]:
+        """Pit-lap bounds and compounds allowed by the parsed constraints"""
+        lo, hi = constraints["base_lap"] + 1, last_lap
+        text = str(constraints.get("constraints") or "").lower()
+
+        m = re.search(r"(?:before|by)\s+lap\s+(\d+)", text)
+        if m:
+            hi = min(hi, int(m.group(1)) - (1 if "before" in m.group(0) else 0))
+        m = re.search(r"after\s+lap\s+(\d+)", text)
+        if m:
+            lo = max(lo, int(m.group(1)) + 1)
+        if hi < lo:
+            lo, hi = constraints["base_lap"] + 1, last_lap
+
+        compounds = [c for c in COMPOUNDS if re.search(
+            rf"only\s+(?:use\s+)?{c}", text)] or list(COMPOUNDS)
+        return lo, hi, compounds
+
+    @staticmethod
+    def _search_cost(width: int) -> int:
+        """Upper bound on simulations a ternary search over width + 1 laps needs"""
+        cost = 0
+        while width > 2:
+            width -= width // 3 + 1
+            cost += 2
+        return cost + width + 1
+
+    def optimize_candidates(self, constraints: Dict[str, Any]):
+        """Refinement without the LLM: integer ternary search over pit lap per compound.
+
+        Each round evaluates two interior laps per compound in one run_sim call and
+        shrinks that compound's bracket by a third; brackets of three laps or fewer
+        are swept exhaustively. What is left of max_optimizer_simulations after the
+        probe is split evenly across compounds, so one search cannot starve another.
+        """
+        base = constraints["base_lap"]
+        budget = self.max_optimizer_simulations
+
+        # The race horizon is unknown until something is simulated, so probe the first
+        # allowed lap per allowed compound (a stop past the horizon simulates as no stop)
+        lo, _, compounds = self._search_space(constraints, base + 999)
+        probe = [{"pit_lap": lo, "compound": c} for c in compounds]
+        probe_result = self.simulate_candidates(constraints, probe)
+        horizon = len(probe_result["candidates"][0].get("p50_by_lap") or [0])
+        lo, hi, compounds = self._search_space(constraints, base + horizon - 1)
+        # Window constraints past the horizon are dropped; so are probes outside the window
+        for c in probe:
+            if not lo <= c["pit_lap"] <= hi:
+                self.evaluated.pop((c["pit_lap"], c["compound"]), None)
+
+        brackets = {c: [lo, hi] for c in compounds}
+        share = max(budget - self.trace.total_simulations, 0) // len(compounds)
+        spent = {c: 0 for c in compounds}
+        active = list(compounds)
+        self.trace.add_thinking(
+            f"📐 Optimizer: laps L{lo}-L{hi}, compounds {compounds}, {share} simulations "
+            f"per compound (full search needs {self._search_cost(hi - lo)})")
+        self.trace.add_iteration({
+            "iteration": 1,
+            "candidates": probe,
+            "results": probe_result.get("candidates", []),
+            "new_simulations": self.trace.total_simulations,
+            "brackets": {c: list(b) for c, b in brackets.items()},
+        })
+
+        def score(lap, comp):
+            return self.evaluated[(lap, comp)]["median_gap_after_5_laps"]
+
+        iteration = 1
+        while active:
+            iteration += 1
+            candidates, narrowing = [], []
+            for comp in list(active):
+                b_lo, b_hi = brackets[comp]
+                if b_hi - b_lo > 2:
+                    third = (b_hi - b_lo) // 3
+                    laps = [b_lo + third, b_hi - third]
+                else:
+                    # Final sweep of the narrowed bracket
+                    laps = list(range(b_lo, b_hi + 1))
+                new = sum((lap, comp) not in self.evaluated for lap in laps)
+                if new > share - spent[comp]:
+                    active.remove(comp)
+                    self.trace.add_thinking(
+                        f"⏹️ {comp}: simulation budget ({share}) reached")
+                    continue
+                spent[comp] += new
+                candidates += [{"pit_lap": lap, "compound": comp} for lap in laps]
+                if b_hi - b_lo > 2:
+                    narrowing.append(comp)
+                else:
+                    active.remove(comp)
+            if not candidates:
+                break
 
-            # Step 3: Simulate
+            simulated_before = self.trace.total_simulations
             sim_result = self.simulate_candidates(constraints, candidates)
-            best_sim_result = sim_result  # Keep latest
 
-            # Record iteration
+            for comp in narrowing:
+                b = brackets[comp]
+                third = (b[1] - b[0]) // 3
+                m1, m2 = b[0] + third, b[1] - third
+                if score(m1, comp) < score(m2, comp):
+                    b[0] = m1 + 1
+                else:
+                    b[1] = m2 - 1
+
             self.trace.add_iteration({
                 "iteration": iteration,
                 "candidates": candidates,
                 "results": sim_result.get("candidates", []),
+                "new_simulations": self.trace.total_simulations - simulated_before,
+                "brackets": {c: list(b) for c, b in brackets.items()},
             })
+        self.trace.add_thinking(
+            f"✅ Optimizer finished after {self.trace.total_simulations} simulations")
 
-            # Step 4: Analyze and decide
-            refinement = self.analyze_and_refine(sim_result, iteration)
-
-            if not refinement.get("should_continue", False):
-                self.trace.add_thinking(
-                    f"✅ Stopping: {refinement.get('reasoning', 'Complete')}")
-                break
-
-            # Step 5: Generate refined candidates
-            context = f"Previous results:\n{refinement.get('analysis', '')}\n\nPropose new variations to explore."
-            candidates = self.generate_candidates(constraints, context)
-
+    def final_result(self, constraints: Dict[str, Any]) -> Dict[str, Any]:
         self.trace.add_thinking(
             f"\n{'='*50}\n✨ FINAL RECOMMENDATION\n{'='*50}")
 
-        # Build final tool args from best result
-        best_idx = max(
-            range(len(best_sim_result["candidates"])),
-            key=lambda i: best_sim_result["candidates"][i].get(
-                "median_gap_after_5_laps", float('-inf'))
-        )
-        best = best_sim_result["candidates"][best_idx]
+        # Build final tool args from the best results across all iterations
+        best_sim_result = self.evaluation_result(constraints)
+        best = best_sim_result["candidates"][0]
 
         self.trace.add_thinking(
             f"🏆 Best Strategy: Pit L{best['candidate']['pit_lap']} ({best['candidate']['compound']}) → {best['median_gap_after_5_laps']:.2f}s")
@@ -420,3 +759,65 @@ class IterativePlanner:
             "sim_result": best_sim_result,
             "trace": self.trace.to_dict(),
         }
+
+    def plan_iteratively(self, user_text: str) -> Dict[str, Any]:
+        """Main orchestration: iteratively refine strategies"""
+
+        # Step 1: Parse constraints
+        constraints = self.parse_constraints(user_text)
+        self.evaluated = {}
+        self.head_to_head = {}
+
+        if self.refinement == "optimizer":
+            self.optimize_candidates(constraints)
+            return self.final_result(constraints)
+
+        # Step 2: Generate initial candidates
+        candidates = self.generate_candidates(constraints)
+
+        if self.speculate:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+
+        try:
+            for iteration in range(1, self.max_iterations + 1):
+                self.trace.add_thinking(
+                    f"\n{'='*50}\n🔄 ITERATION {iteration}\n{'='*50}")
+
+                # Step 3: Simulate (only candidates not yet in the evaluation table)
+                simulated_before = self.trace.total_simulations
+                sim_result = self.simulate_candidates(constraints, candidates)
+                # Analysis and convergence look at everything evaluated so far
+                global_result = self.evaluation_result(constraints)
+
+                # Record iteration
+                self.trace.add_iteration({
+                    "iteration": iteration,
+                    "candidates": candidates,
+                    "results": sim_result.get("candidates", []),
+                    "new_simulations": self.trace.total_simulations - simulated_before,
+                })
+
+                # Keep the CPU busy on likely refinements while the LLM is thinking
+                if self._will_refine(global_result, iteration):
+                    self._speculate(constraints, global_result)
+
+                # Step 4: Analyze and decide
+                refinement = self.analyze_and_refine(global_result, iteration)
+
+                if not refinement.get("should_continue", False):
+                    self.trace.add_thinking(
+                        f"✅ Stopping: {refinement.get('reasoning', 'Complete')}")
+                    break
+
+                # Step 5: Generate refined candidates
+                context = f"Previous results:\n{refinement.get('analysis', '')}\n\nPropose new variations to explore."
+                candidates = self.generate_candidates(constraints, context)
+
+                if all((c["pit_lap"], c["compound"]) in self.evaluated for c in candidates):
+                    self.trace.add_thinking(
+                        "✅ Stopping: refiner proposed no new strategies (all already evaluated)")
+                    break
+        finally:
+            self._finish_speculation()
+
+        return self.final_result(constraints)
@@ -1,12 +1,17 @@
 # agent/llm_client.py
 import json
+import threading
 import requests
+from contextlib import nullcontext
+from typing import Optional
 from agent.config import LLMConfig
 
 
 class ChatClient:
-    def __init__(self, cfg: LLMConfig):
+    def __init__(self, cfg: LLMConfig, limiter: Optional[threading.Semaphore] = None):
         self.cfg = cfg
+        # Optional semaphore shared by clients that draw on one LLM concurrency budget
+        self.limiter = limiter
         self.session = requests.Session()
         self.headers = {
             "Authorization": f"Bearer {cfg.api_key}",
@@ -46,12 +51,13 @@ class ChatClient:
             payload["tools"] = tools
             payload["tool_choice"] = tool_choice if tool_choice else "auto"
 
-        r = self.session.post(
-            f"{self.cfg.api_base}/chat/completions",
-            headers=self.headers,
-            data=json.dumps(payload),
-            timeout=60,
-        )
+        with self.limiter or nullcontext():
+            r = self.session.post(
+                f"{self.cfg.api_base}/chat/completions",
+                headers=self.headers,
+                data=json.dumps(payload),
+                timeout=60,
+            )
         if r.status_code >= 400:
             # surface full server message to caller
             raise RuntimeError(f"LLM HTTP {r.status_code}: {r.text}")
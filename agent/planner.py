@@ -186,7 +186,8 @@ def plan_and_run(user_text: str, cfg: LLMConfig):
     # -------------------------------------------------------------------------
 
     # Execute the simulation via FastAPI
-    r = requests.post(cfg.sim_api_url, json=args, timeout=60)
+    r = requests.post(cfg.sim_api_url, json=args, timeout=60,
+                      headers={"X-Sim-Priority": "agent"})
     r.raise_for_status()
     sim_result = r.json()
 
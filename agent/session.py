@@ -0,0 +1,212 @@
+# agent/session.py
+"""
+Stateful race sessions for live replanning.
+
+A session keeps the parsed race state, the candidates evaluated by its last plan
+and a cache of simulated (scenario, candidate) results. Follow-ups such as
+"now lap 13, gap 1.1s" are parsed deterministically and warm-start from the
+previous plan: its best candidates are carried over (and shifted by the laps
+that have passed), and only strategies that were not simulated under the new
+race state are run. No LLM call is needed for an update.
+"""
+
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from agent.config import LLMConfig
+from agent.iterative_planner import IterativePlanner, COMPOUNDS
+from agent.shared_sims import SharedSimulations
+
+DEFAULT_CONSTRAINTS = {
+    "base_lap": 10,
+    "base_target_gap_s": 0.0,
+    "current_compound": "medium",
+    "current_tire_age": 6,
+}
+
+_NUM = r"([+-]?\d+(?:\.\d+)?)"
+
+
+def parse_update(text: str) -> Dict[str, Any]:
+    """Extract race-state fields mentioned in a short follow-up message.
+
+    Only fields that are actually mentioned are returned, e.g.
+    "now lap 13, gap 1.1s behind" -> {"base_lap": 13, "base_target_gap_s": -1.1}
+    """
+    t = (text or "").lower()
+    out: Dict[str, Any] = {}
+
+    m = re.search(r"\blap\s+(\d+)", t)
+    if m:
+        out["base_lap"] = int(m.group(1))
+
+    m = (re.search(rf"gap\s*(?:of|is|=|:)?\s*{_NUM}\s*s?", t)
+         or re.search(rf"{_NUM}\s*s(?:ec(?:ond)?s?)?\s+(?:ahead|behind)", t))
+    if m:
+        gap = float(m.group(1))
+        if "behind" in t:
+            gap = -abs(gap)
+        elif "ahead" in t:
+            gap = abs(gap)
+        out["base_target_gap_s"] = gap
+
+    m = (re.search(r"(?:tyre|tire)s?\s+(?:age\s*)?(?:of\s*)?(\d+)", t)
+         or re.search(r"(\d+)[- ]laps?[- ]old", t))
+    if m:
+        out["current_tire_age"] = int(m.group(1))
+
+    m = re.search(r"\bon\s+(soft|medium|hard)s?\b", t)
+    if m:
+        out["current_compound"] = m.group(1)
+
+    return out
+
+
+class RaceSession:
+    """One live race being planned; updates reuse the previous plan's state"""
+
+    def __init__(self, cfg: LLMConfig, refinement: str = "llm"):
+        self.id = uuid.uuid4().hex[:12]
+        self.cfg = cfg
+        self.refinement = refinement
+        self.constraints: Optional[Dict[str, Any]] = None
+        self.candidates: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        # (scenario, candidate) results survive across updates, so returning to a
+        # previously seen race state costs no simulation at all
+        self.sims = SharedSimulations()
+        self.history: List[Dict[str, Any]] = []
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.lock = threading.Lock()
+        self.max_carried_candidates = 6
+
+    def _planner(self, refinement: str) -> IterativePlanner:
+        return IterativePlanner(self.cfg, refinement=refinement, shared_sims=self.sims)
+
+    def _record(self, kind: str, text: str, result: Dict[str, Any], elapsed: float) -> Dict[str, Any]:
+        self.result = result
+        self.constraints = {k: result["tool_args"][k] for k in DEFAULT_CONSTRAINTS}
+        self.candidates = [c["candidate"] for c in result["sim_result"]["candidates"]]
+        self.updated_at = time.time()
+        self.history.append({
+            "kind": kind,
+            "user_text": text,
+            "constraints": dict(self.constraints),
+            "simulations": result["trace"]["total_simulations"],
+            "elapsed_s": round(elapsed, 4),
+        })
+        return result
+
+    def start(self, user_text: str) -> Dict[str, Any]:
+        """Cold start: full plan. Without an LLM key, parse deterministically and use the optimizer."""
+        t0 = time.perf_counter()
+        if self.cfg.api_key:
+            planner = self._planner(self.refinement)
+            result = planner.plan_iteratively(user_text)
+        else:
+            planner = self._planner("optimizer")
+            constraints = {**DEFAULT_CONSTRAINTS, **parse_update(user_text)}
+            planner.trace.user_query = user_text
+            planner.trace.parsed_constraints = constraints
+            planner.optimize_candidates(constraints)
+            result = planner.final_result(constraints)
+        return self._record("start", user_text, result, time.perf_counter() - t0)
+
+    def _warm_candidates(self, constraints: Dict[str, Any], laps_passed: int) -> List[Dict[str, Any]]:
+        """Previous best candidates, plus the same plans shifted by the laps that have passed"""
+        base = constraints["base_lap"]
+        out, seen = [], set()
+        for c in self.candidates:
+            for shift in (0, laps_passed) if laps_passed > 0 else (0,):
+                pit_lap = max(c["pit_lap"] + shift, base + 1)
+                key = (pit_lap, c["compound"])
+                if key not in seen:
+                    seen.add(key)
+                    out.append({"pit_lap": pit_lap, "compound": c["compound"]})
+        if not out:
+            out = [{"pit_lap": base + 1, "compound": c} for c in COMPOUNDS]
+        return out[:self.max_carried_candidates]
+
+    def update(self, user_text: str) -> Dict[str, Any]:
+        """Warm start from the previous plan; falls back to a cold start if nothing is recognised"""
+        changes = parse_update(user_text)
+        if self.constraints is None or not changes:
+            return self.start(user_text)
+
+        t0 = time.perf_counter()
+        prev = self.constraints
+        constraints = {**prev, **changes}
+        laps_passed = constraints["base_lap"] - prev["base_lap"]
+        if "current_tire_age" not in changes:
+            if constraints["current_compound"] != prev["current_compound"]:
+                # pitted since the last update
+                constraints["current_tire_age"] = max(0, laps_passed)
+            else:
+                constraints["current_tire_age"] = max(
+                    0, prev["current_tire_age"] + laps_passed)
+
+        planner = self._planner(self.refinement)
+        planner.trace.user_query = user_text
+        planner.trace.parsed_constraints = constraints
+        planner.trace.add_thinking(
+            f"♨️ Warm start from previous plan: {changes}")
+        candidates = self._warm_candidates(constraints, laps_passed)
+        sim_result = planner.simulate_candidates(constraints, candidates)
+        planner.trace.add_iteration({
+            "iteration": 1,
+            "candidates": candidates,
+            "results": sim_result.get("candidates", []),
+            "new_simulations": planner.trace.total_simulations,
+        })
+        result = planner.final_result(constraints)
+        return self._record("update", user_text, result, time.perf_counter() - t0)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "constraints": self.constraints,
+            "candidates": self.candidates,
+            "history": self.history,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class SessionStore:
+    """In-memory LRU of race sessions with an idle timeout"""
+
+    def __init__(self, max_sessions: int = 64, ttl_s: float = 4 * 3600):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self._sessions: "OrderedDict[str, RaceSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        now = time.time()
+        for sid in [sid for sid, s in self._sessions.items() if now - s.updated_at > self.ttl_s]:
+            del self._sessions[sid]
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def add(self, session: RaceSession) -> RaceSession:
+        with self._lock:
+            self._sessions[session.id] = session
+            self._evict()
+        return session
+
+    def get(self, session_id: str) -> Optional[RaceSession]:
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
@@ -0,0 +1,82 @@
+# agent/shared_sims.py
+"""
+Simulation results shared between planners that run concurrently (batch planning).
+
+Two what-if queries often evaluate the same strategy under the same race state,
+e.g. "SC now vs no SC" both trying L12 medium before the SC branch diverges.
+The first planner to need a (scenario, candidate) pair simulates it; any other
+planner asking for the same pair waits on that result instead of re-running it.
+"""
+
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class SharedSimulations:
+    """Single-flight table of candidate results keyed by scenario + (pit_lap, compound)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: Dict[Tuple[str, int, str], Future] = {}
+        # Paired-sample odds per scenario, so results served to another planner keep them
+        self._odds: Dict[str, Dict[Tuple[Tuple[int, str], Tuple[int, str]], float]] = {}
+
+    @staticmethod
+    def scenario_key(sim_args: Dict[str, Any]) -> str:
+        """Everything in a run_sim request except the candidate list"""
+        return json.dumps({k: v for k, v in sim_args.items() if k != "candidates"},
+                          sort_keys=True)
+
+    def record_odds(self, sim_args: Dict[str, Any],
+                    odds: Dict[Tuple[Tuple[int, str], Tuple[int, str]], float]):
+        """Publish head-to-head odds from a run; call before its results are handed out"""
+        with self._lock:
+            self._odds.setdefault(self.scenario_key(sim_args), {}).update(odds)
+
+    def odds(self, sim_args: Dict[str, Any]) -> Dict[Tuple[Tuple[int, str], Tuple[int, str]], float]:
+        """Every head-to-head odd published for this scenario so far"""
+        with self._lock:
+            return dict(self._odds.get(self.scenario_key(sim_args), {}))
+
+    def run(self, sim_args: Dict[str, Any], candidates: List[Dict[str, Any]],
+            simulate: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Return one result per candidate (in order) and how many came from other planners.
+        `simulate` is called once with the candidates this caller has to compute itself.
+        """
+        scenario = self.scenario_key(sim_args)
+        keys = [(scenario, c["pit_lap"], c["compound"]) for c in candidates]
+
+        owned: List[int] = []
+        with self._lock:
+            futures = []
+            for i, key in enumerate(keys):
+                fut = self._results.get(key)
+                if fut is None:
+                    fut = Future()
+                    self._results[key] = fut
+                    owned.append(i)
+                futures.append(fut)
+
+        if owned:
+            try:
+                fresh = simulate([candidates[i] for i in owned])
+                if len(fresh) != len(owned):
+                    raise RuntimeError(f"simulate returned {len(fresh)} results "
+                                       f"for {len(owned)} candidates")
+                for i, result in zip(owned, fresh):
+                    futures[i].set_result(result)
+            except BaseException as e:
+                with self._lock:
+                    for i in owned:
+                        if futures[i].done():
+                            continue
+                        # let a later caller retry instead of caching the failure, and
+                        # wake every planner already waiting on this pair
+                        self._results.pop(keys[i], None)
+                        futures[i].set_exception(e)
+                raise
+
+        return [f.result() for f in futures], len(candidates) - len(owned)
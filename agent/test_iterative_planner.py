@@ -0,0 +1,236 @@
+import json
+import threading
+import pandas as pd
+from agent.config import LLMConfig
+from agent.iterative_planner import IterativePlanner
+from sim.core import simulate, Strategy
+
+DF = pd.read_csv("data/synth_race.csv")
+
+
+def _reply(content):
+    return {"choices": [{"message": {"content": json.dumps(content)}}],
+            "usage": {"total_tokens": 10}}
+
+
+class FakeChat:
+    """Scripted LLM: parse -> generate -> (refine -> generate)*"""
+
+    def __init__(self, refined):
+        self.refined = list(refined)
+        self.calls = 0
+
+    def chat(self, model, messages, **kwargs):
+        self.calls += 1
+        system = messages[0]["content"]
+        if "constraint parser" in system:
+            return _reply({"base_lap": 10, "base_target_gap_s": -1.5,
+                           "current_compound": "soft", "current_tire_age": 8})
+        if "refiner" in system:
+            return _reply({"analysis": "try neighbours", "should_continue": True})
+        if self.refined and "Previous results" in messages[1]["content"]:
+            return _reply(self.refined.pop(0))
+        return _reply([{"pit_lap": 12, "compound": "medium"},
+                       {"pit_lap": 15, "compound": "hard"}])
+
+
+def _local_sim(sim_args):
+    return simulate(
+        df=DF,
+        current_compound=sim_args["current_compound"],
+        current_tire_age=sim_args["current_tire_age"],
+        base_target_gap_s=sim_args["base_target_gap_s"],
+        base_lap=sim_args["base_lap"],
+        candidates=[Strategy(**c) for c in sim_args["candidates"]],
+    )
+
+
+def _planner(refined, refinement="llm"):
+    planner = IterativePlanner(LLMConfig(), refinement=refinement)
+    planner.client = FakeChat(refined)
+    planner._post_sim = _local_sim
+    planner.convergence_threshold = 0.0
+    return planner
+
+
+def test_speculation_serves_neighbour_refinements():
+    planner = _planner([[{"pit_lap": 14, "compound": "hard"},
+                         {"pit_lap": 16, "compound": "hard"}]] * 2)
+    out = planner.plan_iteratively("We're 1.5s behind at lap 10")
+
+    spec = out["trace"]["speculation"]
+    assert spec["launched"] > 0
+    assert spec["hits"] >= 1
+    assert 0.0 < spec["hit_rate"] <= 1.0
+    assert spec["wasted"] == spec["launched"] - spec["hits"]
+    # every iteration still reports a full result per candidate
+    for it in out["trace"]["iterations"]:
+        assert len(it["results"]) == len(it["candidates"])
+
+
+def test_running_speculation_is_awaited_and_counted_as_waste():
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    planner = _planner([])
+    sim = _local_sim({"base_lap": 10, "base_target_gap_s": -1.5, "current_compound": "soft",
+                      "current_tire_age": 8, "candidates": [{"pit_lap": 14, "compound": "hard"}]})
+    planner.evaluated = {(14, "hard"): sim["candidates"][0]}
+    started = threading.Event()
+
+    def slow_sim(sim_args):
+        started.set()
+        time.sleep(0.3)
+        return _local_sim(sim_args)
+
+    planner._post_sim = slow_sim
+    planner._executor = ThreadPoolExecutor(max_workers=1)
+    planner._speculate({"base_lap": 10, "base_target_gap_s": -1.5, "current_compound": "soft",
+                        "current_tire_age": 8}, sim)
+    futures = {id(s["future"]): s["future"] for s in planner._speculative.values()}
+    assert started.wait(2)
+
+    planner._finish_speculation()  # while the speculative simulation is still running
+    assert all(f.done() for f in futures.values())
+    spec = planner.trace.speculation
+    assert spec["wasted"] == spec["launched"] > 0
+    assert spec["wasted_sim_s"] >= 0.3
+
+
+def test_evaluation_table_dedups_and_tracks_global_best():
+    planner = _planner([[{"pit_lap": 12, "compound": "medium"},
+                         {"pit_lap": 13, "compound": "hard"}],
+                        [{"pit_lap": 12, "compound": "medium"},
+                         {"pit_lap": 13, "compound": "hard"}]])
+    planner.speculate = False
+    out = planner.plan_iteratively("We're 1.5s behind at lap 10")
+    trace = out["trace"]
+
+    # iteration 2 only simulates the one new candidate, and the repeated
+    # proposal after it ends the loop without a third iteration
+    assert [it["new_simulations"] for it in trace["iterations"]] == [2, 1]
+    assert trace["total_simulations"] == 3
+
+    all_results = [r for it in trace["iterations"] for r in it["results"]]
+    best_gap = max(r["median_gap_after_5_laps"] for r in all_results)
+    assert out["sim_result"]["candidates"][0]["median_gap_after_5_laps"] == best_gap
+
+
+def test_optimizer_refinement_is_bounded_and_llm_free():
+    planner = _planner([], refinement="optimizer")
+    out = planner.plan_iteratively("We're 1.5s behind at lap 10")
+    trace = out["trace"]
+
+    assert planner.client.calls == 1  # only the constraint parser
+    assert trace["refinement"] == "optimizer"
+    assert trace["total_simulations"] <= planner.max_optimizer_simulations
+
+    best = out["sim_result"]["candidates"][0]
+    evaluated = [r["median_gap_after_5_laps"] for r in planner.evaluated.values()]
+    assert best["median_gap_after_5_laps"] == max(evaluated)
+
+    # odds for pairs simulated together reach the explainer
+    wins = out["sim_result"]["win_probability"]["after_5_laps"]
+    cands = out["sim_result"]["candidates"]
+    assert all(wins[i][i] is None for i in range(len(cands)))
+    assert any(p is not None for row in wins for p in row)
+    assert all(wins[i][j] == planner._p_beats(a, b) for i, a in enumerate(cands)
+               for j, b in enumerate(cands) if i != j)
+
+
+def test_concurrent_planners_share_identical_simulations():
+    from concurrent.futures import ThreadPoolExecutor
+    from agent.shared_sims import SharedSimulations
+
+    shared = SharedSimulations()
+    planners = [_planner([], refinement="optimizer") for _ in range(2)]
+    for p in planners:
+        p.shared_sims = shared
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        outs = list(pool.map(lambda p: p.plan_iteratively("lap 10"), planners))
+
+    traces = [o["trace"] for o in outs]
+    # every strategy was simulated by exactly one of the two planners
+    assert sum(t["shared_simulations"] for t in traces) == \
+        sum(t["total_simulations"] for t in traces)
+    assert outs[0]["sim_result"] == outs[1]["sim_result"]
+
+
+def test_shared_simulation_failures_release_waiters():
+    import pytest
+    from agent.shared_sims import SharedSimulations
+
+    shared = SharedSimulations()
+    args = {"base_lap": 10}
+    cands = [{"pit_lap": 12, "compound": "medium"}, {"pit_lap": 14, "compound": "hard"}]
+    started, release = threading.Event(), threading.Event()
+
+    def failing(owned):
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    errors = []
+    owner = threading.Thread(target=lambda: pytest.raises(ValueError, shared.run,
+                                                          args, cands, failing))
+    owner.start()
+    started.wait(5)
+
+    def waiter():
+        try:
+            shared.run(args, cands[1:], lambda owned: [])
+        except ValueError as e:
+            errors.append(e)
+
+    other = threading.Thread(target=waiter)
+    other.start()
+    release.set()
+    owner.join(5)
+    other.join(5)
+    assert not other.is_alive() and len(errors) == 1
+
+    # a short result fails the owned pairs instead of leaving them unresolved...
+    with pytest.raises(RuntimeError):
+        shared.run(args, cands, lambda owned: [{"ok": True}])
+    # ...and nothing failed stays cached: the next caller simulates again
+    results, reused = shared.run(args, cands, lambda owned: [{"c": c} for c in owned])
+    assert reused == 0 and results == [{"c": c} for c in cands]
+
+
+def test_paired_win_probability_stops_refinement():
+    planner = _planner([])
+    sim = _local_sim({"base_lap": 10, "base_target_gap_s": -1.5, "current_compound": "soft",
+                      "current_tire_age": 8,
+                      "candidates": [{"pit_lap": 14, "compound": "hard"},
+                                     {"pit_lap": 16, "compound": "hard"}]})
+    assert planner._will_refine(sim, 1)
+    assert not planner._will_refine({"candidates": sim["candidates"][:1]}, 1)
+
+    planner._record_head_to_head(sim)
+    assert planner.head_to_head[((14, "hard"), (16, "hard"))] == 1.0
+    assert not planner._will_refine(sim, 1)
+    out = planner.analyze_and_refine(sim, 1)
+    assert out["should_continue"] is False
+    assert "100% of paired samples" in out["reasoning"]
+    assert planner.client.calls == 0  # no refiner LLM call
+
+
+def test_optimizer_stays_in_window_and_splits_budget():
+    planner = _planner([], refinement="optimizer")
+    constraints = {"base_lap": 10, "base_target_gap_s": -1.5, "current_compound": "soft",
+                   "current_tire_age": 8, "constraints": "pit after lap 12"}
+    planner.optimize_candidates(constraints)
+    laps = {lap for lap, _ in planner.evaluated}
+    assert min(laps) >= 13 and max(laps) <= 20  # the probe starts at the window, not L11
+    # every compound finished its search: each bracket was swept
+    assert {comp for _, comp in planner.evaluated} == {"soft", "medium", "hard"}
+    assert all(b[1] - b[0] <= 2 for b in planner.trace.iterations[-1]["brackets"].values())
+
+    # a tight budget is shared evenly instead of going to whichever compound comes first
+    planner = _planner([], refinement="optimizer")
+    planner.max_optimizer_simulations = 9
+    planner.optimize_candidates(constraints)
+    assert planner.trace.total_simulations <= 9
+    per_compound = [sum(comp == c for _, comp in planner.evaluated)
+                    for c in ("soft", "medium", "hard")]
+    assert max(per_compound) - min(per_compound) <= 1
@@ -0,0 +1,38 @@
+from agent.config import LLMConfig
+from agent.iterative_planner import IterativePlanner
+from agent.session import RaceSession, parse_update
+from agent.test_iterative_planner import _local_sim
+
+
+def test_parse_update_reads_only_mentioned_fields():
+    assert parse_update("now lap 13, gap 1.1s") == {
+        "base_lap": 13, "base_target_gap_s": 1.1}
+    assert parse_update("0.8s behind, tyres 11 laps old") == {
+        "base_target_gap_s": -0.8, "current_tire_age": 11}
+    assert parse_update("lap 14 now on hards") == {
+        "base_lap": 14, "current_compound": "hard"}
+    assert parse_update("what should we do?") == {}
+
+
+def test_update_warm_starts_from_previous_plan(monkeypatch):
+    monkeypatch.setattr(IterativePlanner, "_post_sim",
+                        lambda self, args: _local_sim(args))
+    cfg = LLMConfig()
+    cfg.api_key = ""  # deterministic parse + optimizer for the cold start
+    session = RaceSession(cfg)
+
+    first = session.start("lap 10, 1.5s behind on softs, tyre age 8")
+    assert session.constraints["base_lap"] == 10
+
+    update = session.update("now lap 12, gap 1.1s")
+    assert session.constraints == {
+        "base_lap": 12, "base_target_gap_s": 1.1,
+        "current_compound": "soft", "current_tire_age": 10}
+    trace = update["trace"]
+    assert trace["total_simulations"] <= session.max_carried_candidates
+    assert trace["total_simulations"] < first["trace"]["total_simulations"]
+    assert all(c["pit_lap"] > 12 for c in update["tool_args"]["candidates"])
+
+    # returning to a race state seen before is served from the session cache
+    again = session.update("now lap 12, gap 1.1s")
+    assert again["trace"]["total_simulations"] == 0
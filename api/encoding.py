@@ -0,0 +1,232 @@
+# api/encoding.py
+"""
+Response encoding for simulation results.
+
+simulate() output is built by our own engine, so re-validating it through
+pydantic on the way out only costs time. encode() shapes the plain dict like
+the response model (missing optional fields filled, unknown keys dropped)
+without validating it, then serializes it according to the Accept header:
+
+- application/json (default)              orjson when installed, else json
+- application/msgpack                     columnar float32 arrays (needs msgpack)
+- application/vnd.apache.arrow.stream     Arrow IPC stream (needs pyarrow)
+
+The Accept header is parsed as media ranges with q-values. Columnar formats
+carry the per-lap arrays as one row per (candidate, lap) — or the batch
+columns as-is — plus a `meta` object with everything else. Bodies over
+GZIP_MIN_BYTES are gzip-compressed when the client accepts it.
+
+orjson, msgpack and pyarrow are optional (requirements-extras.txt); without
+them JSON falls back to the json module and the binary types answer 406.
+"""
+
+import functools
+import gzip
+import json
+import typing
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: application/msgpack
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: Arrow IPC
+    pa = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+GZIP_MIN_BYTES = 1024
+
+PER_LAP = ("p10_by_lap", "p50_by_lap", "p90_by_lap", "p_ahead_by_lap")
+
+
+# ----- shaping -----
+
+def _nested_model(annotation) -> Optional[Type[BaseModel]]:
+    """The BaseModel inside X, List[X] or Optional[...] annotations, if any"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in typing.get_args(annotation):
+        found = _nested_model(arg)
+        if found is not None:
+            return found
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _fields(model: Type[BaseModel]):
+    """(name, default, nested model) per field, resolved once per model"""
+    return tuple((name, None if f.default is PydanticUndefined else f.default,
+                  _nested_model(f.annotation))
+                 for name, f in model.model_fields.items())
+
+
+def conform(data: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """Same keys as model(**data).model_dump(), without validating the values"""
+    out = {}
+    for name, default, sub in _fields(model):
+        value = data.get(name, default)
+        if sub is not None and isinstance(value, list):
+            value = [conform(v, sub) if isinstance(v, dict) else v for v in value]
+        elif sub is not None and isinstance(value, dict):
+            value = conform(value, sub)
+        out[name] = value
+    return out
+
+
+def to_columnar(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    (meta, columns). A simulate() result becomes one row per (candidate, lap) with the
+    per-lap arrays as float32 columns; a batch result (with `columns`) keeps its columns,
+    numbers as float32 / int32.
+    """
+    if "columns" in data:
+        meta = {k: v for k, v in data.items() if k != "columns"}
+        columns = {}
+        for name, values in data["columns"].items():
+            if values and all(isinstance(v, str) for v in values):
+                columns[name] = list(values)
+            elif all(isinstance(v, int) for v in values):
+                columns[name] = np.asarray(values, dtype=np.int32)
+            else:
+                columns[name] = np.asarray([np.nan if v is None else v for v in values],
+                                           dtype=np.float32)
+        return meta, columns
+
+    cands = data.get("candidates") or []
+    T = len(cands[0]["p50_by_lap"]) if cands else 0
+    columns = {
+        "candidate": np.repeat(np.arange(len(cands), dtype=np.int32), T),
+        "lap_index": np.tile(np.arange(T, dtype=np.int32), len(cands)),
+    }
+    for name in PER_LAP:
+        if cands and cands[0].get(name) is not None:
+            columns[name] = np.concatenate(
+                [np.asarray(c[name], dtype=np.float32) for c in cands])
+    for q in (cands[0].get("quantiles_by_lap") or {}) if cands else ():
+        columns[f"q{q}"] = np.concatenate(
+            [np.asarray(c["quantiles_by_lap"][q], dtype=np.float32) for c in cands])
+    drop = set(PER_LAP) | {"quantiles_by_lap"}
+    meta = {**{k: v for k, v in data.items() if k != "candidates"},
+            "laps": T,
+            "candidates": [{k: v for k, v in c.items() if k not in drop} for c in cands]}
+    return meta, columns
+
+
+# ----- serializers -----
+
+def dumps_json(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data).encode()
+
+
+def dumps_msgpack(data: Dict[str, Any]) -> bytes:
+    meta, columns = to_columnar(data)
+    packed = {name: col if isinstance(col, list) else
+              {"dtype": col.dtype.str, "shape": list(col.shape), "data": col.tobytes()}
+              for name, col in columns.items()}
+    return msgpack.packb({"meta": meta, "columns": packed}, use_bin_type=True)
+
+
+def dumps_arrow(data: Dict[str, Any]) -> bytes:
+    meta, columns = to_columnar(data)
+    table = pa.table(columns).replace_schema_metadata({"meta": json.dumps(meta)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _media_ranges(accept: str) -> List[Tuple[str, float, int]]:
+    """(media range, q, position) for each entry of an Accept header"""
+    ranges = []
+    for i, part in enumerate((accept or "").split(",")):
+        media, *params = [p.strip() for p in part.split(";")]
+        if not media:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = -1.0  # malformed: ignore this range
+        if q >= 0:
+            ranges.append((media.lower(), q, i))
+    return ranges
+
+
+def negotiate(accept: str) -> Optional[str]:
+    """
+    Pick the media type for an Accept header: the supported type with the highest q,
+    using its most specific matching range (exact > type/* > */*); ties go to the
+    client's order, then JSON. Unsupported-only headers get JSON; None means every
+    type we can produce was refused (q=0).
+    """
+    ranges = _media_ranges(accept)
+    if not ranges:
+        return JSON
+    best, best_key, json_refused = None, None, False
+    for media_type, names in ((JSON, (JSON,)), (MSGPACK, (MSGPACK, "application/x-msgpack")),
+                              (ARROW, (ARROW,))):
+        match = None  # (specificity, q, position)
+        for media, q, i in ranges:
+            spec = (2 if media in names else
+                    1 if media == media_type.split("/")[0] + "/*" else
+                    0 if media == "*/*" else None)
+            if spec is not None and (match is None or spec > match[0]):
+                match = (spec, q, i)
+        if match is None:
+            continue
+        if match[1] == 0:
+            json_refused |= media_type == JSON
+            continue
+        key = (match[1], match[0], -match[2])
+        if best_key is None or key > best_key:
+            best, best_key = media_type, key
+    if best is None and not json_refused:
+        return JSON
+    return best
+
+
+def encode(request: Request, data: Dict[str, Any],
+           model: Optional[Type[BaseModel]] = None) -> Response:
+    media_type = negotiate(request.headers.get("accept", ""))
+    if media_type is None:
+        raise HTTPException(status_code=406,
+                            detail=f"Acceptable encodings: {JSON}, {MSGPACK}, {ARROW}")
+    if model is not None:
+        data = conform(data, model)
+    if media_type == MSGPACK:
+        if msgpack is None:
+            raise HTTPException(status_code=406, detail="application/msgpack needs msgpack installed")
+        body = dumps_msgpack(data)
+    elif media_type == ARROW:
+        if pa is None:
+            raise HTTPException(status_code=406, detail=f"{ARROW} needs pyarrow installed")
+        body = dumps_arrow(data)
+    else:
+        body = dumps_json(data)
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,231 @@
+# api/jobs.py
+"""
+In-process background jobs (High Accuracy bursts, reports).
+
+Jobs run on a small worker pool inside the API process, report progress while
+they run, can be cancelled, and persist their final state under
+artifacts/jobs/<job_id>/job.json so results survive an API restart.
+
+Finished jobs stay in memory for `finished_ttl_s`, and at most
+`max_finished` of them; older ones are dropped and reloaded from job.json on
+demand.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+TERMINAL = {"succeeded", "failed", "cancelled"}
+JOB_ID = re.compile(r"[0-9a-f]{12}")  # uuid4().hex[:12]; also guards job.json paths
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when cancellation was requested"""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    backend: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    status: str = "queued"  # queued | running | succeeded | failed | cancelled
+    progress: float = 0.0
+    message: str = ""
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(
+        default_factory=threading.Event, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+
+    def set_progress(self, progress: float, message: str = ""):
+        self.progress = round(max(0.0, min(1.0, progress)), 4)
+        if message:
+            self.message = message
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "backend": self.backend,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "error_type": self.error_type,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Runs job functions `fn(job) -> result dict` on a bounded worker pool"""
+
+    def __init__(self, max_workers: int = 2, root: Path = Path("./artifacts/jobs"),
+                 max_finished: int = 200, finished_ttl_s: float = 3600.0):
+        self.max_workers = max_workers
+        self.root = Path(root)
+        self.max_finished = max_finished
+        self.finished_ttl_s = finished_ttl_s
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def job_dir(self, job_id: str) -> Path:
+        path = self.root / job_id
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def submit(self, kind: str, fn: Callable[[Job], Dict[str, Any]],
+               params: Optional[Dict[str, Any]] = None, backend: str = "inprocess") -> Job:
+        job = Job(id=uuid.uuid4().hex[:12], kind=kind,
+                  backend=backend, params=params or {})
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="job")
+            self._jobs[job.id] = job
+            job.future = self._pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Dict[str, Any]]):
+        if job.cancel_event.is_set():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            self._persist(job)
+            self._evict()
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = fn(job)
+            job.status = "succeeded"
+            job.set_progress(1.0)
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            job.error_type = type(e).__name__
+        finally:
+            job.finished_at = time.time()
+            self._persist(job)
+            self._evict()
+
+    def _evict(self):
+        """Drop finished jobs past the TTL or beyond max_finished (oldest first)"""
+        now = time.time()
+        with self._lock:
+            finished = sorted((j for j in self._jobs.values() if j.status in TERMINAL),
+                              key=lambda j: j.finished_at or 0.0)
+            excess = len(finished) - self.max_finished
+            for i, job in enumerate(finished):
+                expired = now - (job.finished_at or now) > self.finished_ttl_s
+                # only jobs that made it to disk can be reloaded later
+                if ((i < excess or expired)
+                        and (self.root / job.id / "job.json").exists()):
+                    del self._jobs[job.id]
+
+    def _persist(self, job: Job):
+        try:
+            with open(self.job_dir(job.id) / "job.json", "w") as f:
+                json.dump(job.to_dict(), f, indent=2)
+        except Exception as e:
+            print(f"✗ Failed to persist job {job.id}: {e}")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        # Finished jobs from a previous API process
+        path = self.root / job_id / "job.json"
+        if not path.exists():
+            return None
+        with open(path, "r") as f:
+            data = json.load(f)
+        job = Job(id=data["job_id"], kind=data["kind"], backend=data["backend"])
+        for key in ("status", "progress", "message", "result", "error", "error_type",
+                    "created_at", "started_at", "finished_at"):
+            setattr(job, key, data.get(key))
+        return job
+
+    def list(self) -> List[Job]:
+        # Snapshot under the lock: workers evict finished jobs concurrently
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.status in TERMINAL:
+            return job
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # never started
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            self._persist(job)
+            self._evict()
+        return job
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while job.status not in TERMINAL:
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        return job
+
+
+def burst_summary(sim_result: Dict[str, Any], mc_samples: int) -> Dict[str, Any]:
+    """High Accuracy summary (same shape as scripts/burst_sim.py writes to sim_burst.json)"""
+    candidates = sim_result.get("candidates", [])
+    if not candidates:
+        raise ValueError("No candidates in result")
+
+    best = max(candidates, key=lambda c: c.get(
+        "median_gap_after_5_laps", float("-inf")))
+
+    # Calculate tighter confidence from P10-P90 range
+    p90 = best["p90_by_lap"][-1] if best.get("p90_by_lap") else 0
+    p10 = best["p10_by_lap"][-1] if best.get("p10_by_lap") else 0
+    confidence_range = abs(p90 - p10)
+
+    # Higher sample count = tighter range = higher confidence
+    confidence = max(75, min(98, 98 - (confidence_range * 2.5)))
+
+    return {
+        "mc_samples": mc_samples,
+        "best_candidate": {
+            "pit_lap": best["candidate"]["pit_lap"],
+            "compound": best["candidate"]["compound"],
+            "median_gap_after_5_laps": best["median_gap_after_5_laps"],
+            "p10": p10,
+            "p90": p90,
+        },
+        "confidence": round(confidence, 1),
+        "confidence_range": round(confidence_range, 3),
+        "improvement_vs_standard": f"Tighter confidence bands with {mc_samples} samples",
+    }
@@ -1,13 +1,23 @@
 # api/main.py
-from typing import Any, Dict, List, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from api.schemas import SimRequest, SimResponse
+from api.schemas import BatchSimRequest, Candidate, Compound, SimRequest, SimResponse
+from api.jobs import Job, JobManager, burst_summary
+from api.reports import ReportCache, content_digest, etag_for, etag_matches
+from api.monitor import DockerSampler, LogHub
+from api.encoding import encode
 import pandas as pd
-from sim.core import simulate, Strategy, SimConfig
+from sim.core import DEFAULT_SEED, metric_index, simulate, simulate_batch, Strategy, SimConfig
+from sim.singleflight import SingleFlight
+from sim.scheduler import PRIORITIES, SimScheduler, Ticket, estimate_bytes
+from sim.lookup import COMPOUNDS, DecisionTable
+from sim.surrogate import Surrogate
+from sim.live import LiveRace
 import requests
 import re
 import os
@@ -16,6 +26,10 @@ import json
 import time
 from pathlib import Path
 import io
+import threading
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
 
 app = FastAPI(title="PitStop AI — Simulation Service", version="0.1")
 
@@ -42,6 +56,8 @@ def load_race_data():
     except Exception as e:
         print(f"✗ Failed to load race data: {e}")
         DF = None
+    _start_decision_table()
+    _start_surrogate()
 
 
 @app.on_event("startup")
@@ -62,9 +78,13 @@ def health():
     }
 
 
+# Content-hash cache of rendered reports (served below with the hash as ETag)
+REPORTS = ReportCache(Path("./reports"))
+
+
 @app.get("/reports/{filename}")
-def serve_report(filename: str):
-    """Serve generated reports (HTML/PDF)"""
+def serve_report(filename: str, request: Request):
+    """Serve generated reports (HTML/PDF) with ETag revalidation"""
     report_path = Path("./reports") / filename
 
     if not report_path.exists():
@@ -75,7 +95,15 @@ def serve_report(filename: str):
     if not str(report_path.resolve()).startswith(str(Path("./reports").resolve())):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    return FileResponse(report_path)
+    etag = etag_for(report_path)
+    # Content-addressed names never change content, so clients may cache them for good;
+    # anything else (latest.json, timestamped reports) must be revalidated
+    headers = {"ETag": etag,
+               "Cache-Control": ("public, max-age=31536000, immutable"
+                                 if content_digest(report_path) else "no-cache")}
+    if etag_matches(etag, request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(report_path, headers=headers)
 
 
 # ============ Race data management ============
@@ -98,6 +126,8 @@ async def upload_race_data(file: UploadFile = File(...)):
             _cached_simulate.cache_clear()  # type: ignore[attr-defined]
         except Exception:
             pass
+        _start_decision_table()
+        _start_surrogate()
 
         # Persist a copy for reference
         Path("data").mkdir(parents=True, exist_ok=True)
@@ -142,6 +172,38 @@ def reset_race_data():
     return {"status": "ok", "message": "Race data reset to default"}
 
 
+# Optional executor for RNG blocks; results are identical to the serial engine.
+# SIM_COORDINATOR_BIND=host:port accepts `python -m sim.distributed worker` nodes
+# (needs SIM_COORDINATOR_AUTHKEY; a bare ":port" binds 127.0.0.1 only),
+# otherwise SIM_PROCESS_WORKERS > 1 uses a local process pool. Runs that get no
+# results within SIM_RESULT_TIMEOUT_S, or find no workers connected, run locally.
+SIM_PROCESS_WORKERS = int(os.getenv("SIM_PROCESS_WORKERS", "0"))
+SIM_COORDINATOR_BIND = os.getenv("SIM_COORDINATOR_BIND", "")
+SIM_RESULT_TIMEOUT_S = float(os.getenv("SIM_RESULT_TIMEOUT_S", "120"))
+_SIM_POOL = None
+
+
+def _sim_pool():
+    global _SIM_POOL
+    if _SIM_POOL is not None:
+        return _SIM_POOL
+    if SIM_COORDINATOR_BIND:
+        from sim.distributed import Coordinator, authkey_from_env
+        host, _, port = SIM_COORDINATOR_BIND.rpartition(":")
+        _SIM_POOL = Coordinator((host or "127.0.0.1", int(port)), authkey_from_env(),
+                                task_timeout=float(os.getenv("SIM_TASK_TIMEOUT_S", "60")))
+    elif SIM_PROCESS_WORKERS > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        _SIM_POOL = ProcessPoolExecutor(max_workers=SIM_PROCESS_WORKERS)
+    return _SIM_POOL
+
+
+@app.on_event("shutdown")
+def stop_sim_pool():
+    if _SIM_POOL is not None:
+        _SIM_POOL.shutdown(cancel_futures=True)
+
+
 @lru_cache(maxsize=512)
 def _cached_simulate(args_json: str):
     """LRU-cached simulation to avoid recomputing identical requests"""
@@ -157,7 +219,7 @@ def _cached_simulate(args_json: str):
     candidates = [Strategy(pit_lap=c["pit_lap"], compound=c["compound"])
                   for c in args["candidates"]]
 
-    return simulate(
+    kwargs = dict(
         df=DF,
         current_compound=args["current_compound"],
         current_tire_age=args["current_tire_age"],
@@ -166,75 +228,351 @@ def _cached_simulate(args_json: str):
         candidates=candidates,
         cfg=cfg,
         sc_window=args.get("sc_window"),
-        sc_pit_loss_factor=args.get("sc_pit_loss_factor", 1.0)
+        sc_pit_loss_factor=args.get("sc_pit_loss_factor", 1.0),
+        sc_hazard=args.get("sc_hazard"),
+        quantiles=args.get("quantiles"),
+        histogram_bins=args.get("histogram_bins"),
+        seed=args.get("seed", DEFAULT_SEED)
     )
+    pool = _sim_pool()
+    if pool is None or getattr(pool, "worker_count", 1) == 0:
+        return simulate(**kwargs)
+    try:
+        return simulate(**kwargs, executor=pool, result_timeout=SIM_RESULT_TIMEOUT_S)
+    except FuturesTimeout:
+        print(f"⚠️  Sim pool gave no result in {SIM_RESULT_TIMEOUT_S}s - running locally")
+        return simulate(**kwargs)
+
+
+# Concurrent identical requests (UI, planner, burst jobs) share one computation
+SIM_FLIGHTS = SingleFlight()
+
+
+# Separate concurrency budgets for interactive / agent / bulk simulations
+SCHEDULER = SimScheduler(
+    limits={p: int(os.getenv(f"SIM_{p.upper()}_CONCURRENCY", n))
+            for p, n in {"interactive": 4, "agent": 2, "bulk": 1}.items()},
+    memory_budget_bytes=int(os.getenv("SIM_MEMORY_BUDGET_MB", "512")) * 2**20)
+
+
+def _simulate_shared(args_json: str, priority: str = "interactive"):
+    """_cached_simulate behind the scheduler, coalescing callers that miss the cache at the same time"""
+    args = json.loads(args_json)
+    laps = len(DF) if DF is not None else 1
+    cost = estimate_bytes(args.get("mc_samples") or 200,
+                          laps, len(args["candidates"]))
+    # callers joining this flight raise it to their priority while it is still queued
+    ticket = Ticket(priority)
+    result, _ = SIM_FLIGHTS.do(
+        args_json,
+        lambda: SCHEDULER.run(priority, lambda: _cached_simulate(args_json), cost, ticket),
+        state=ticket,
+        on_join=lambda leader: SCHEDULER.promote(leader, priority))
+    return result
+
+
+@app.get("/sim/metrics")
+def sim_metrics():
+    """Result cache and request-coalescing counters"""
+    info = _cached_simulate.cache_info()
+    return {
+        "single_flight": SIM_FLIGHTS.metrics(),
+        "scheduler": SCHEDULER.metrics(),
+        "coordinator": _SIM_POOL.metrics() if hasattr(_SIM_POOL, "metrics") else None,
+        "cache": {"hits": info.hits, "misses": info.misses,
+                  "size": info.currsize, "maxsize": info.maxsize},
+    }
+
+
+def _sim_args(req: SimRequest) -> Dict[str, Any]:
+    """Build the cacheable args dict for _cached_simulate"""
+    return {
+        "base_lap": req.base_lap,
+        "base_target_gap_s": req.base_target_gap_s,
+        "current_compound": req.current_compound,
+        "current_tire_age": req.current_tire_age,
+        "candidates": [{"pit_lap": c.pit_lap, "compound": c.compound} for c in req.candidates],
+        "mc_samples": req.mc_samples or 200,
+        "sc_window": req.sc_window.dict() if req.sc_window else None,
+        "sc_hazard": req.sc_hazard.dict() if req.sc_hazard else None,
+        "sc_pit_loss_factor": req.sc_pit_loss_factor or 1.0,
+        "quantiles": sorted(set(req.quantiles)) if req.quantiles else None,
+        "histogram_bins": req.histogram_bins,
+        # part of the cache key: a different seed is a different result
+        "seed": DEFAULT_SEED if req.seed is None else req.seed
+    }
 
 
 @app.post("/run_sim", response_model=SimResponse)
-def run_sim(req: SimRequest):
+def run_sim(req: SimRequest, request: Request,
+            x_sim_priority: str = Header("interactive")):
     """
     Run Monte-Carlo pit strategy simulation.
     Now supports Safety Car windows and uses cached results.
+    X-Sim-Priority picks the scheduler class (interactive, agent or bulk).
+    Accept picks the encoding: JSON (default), application/msgpack or Arrow IPC.
     """
+    if x_sim_priority not in PRIORITIES:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid X-Sim-Priority: {x_sim_priority}")
     if DF is None:
         raise HTTPException(
             status_code=500,
             detail="Race data not loaded. Check server logs."
         )
 
-    # Build cacheable args dict
-    args = {
-        "base_lap": req.base_lap,
-        "base_target_gap_s": req.base_target_gap_s,
-        "current_compound": req.current_compound,
-        "current_tire_age": req.current_tire_age,
-        "candidates": [{"pit_lap": c.pit_lap, "compound": c.compound} for c in req.candidates],
-        "mc_samples": req.mc_samples or 200,
-        "sc_window": req.sc_window.dict() if req.sc_window else None,
-        "sc_pit_loss_factor": req.sc_pit_loss_factor or 1.0
-    }
-
-    args_json = json.dumps(args, sort_keys=True)
+    args_json = json.dumps(_sim_args(req), sort_keys=True)
 
     try:
-        out = _cached_simulate(args_json)
+        out = _simulate_shared(args_json, x_sim_priority)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Simulation failed: {e}")
 
-    return SimResponse(**out)
+    # Engine output is already well-formed: shape it like SimResponse, skip re-validation
+    return encode(request, out, SimResponse)
 
 
-class PlanRequest(BaseModel):
-    user_text: str
+MAX_BATCH_SCENARIOS = 5000
 
 
-@app.post("/plan_and_explain")
-def plan_and_explain(req: PlanRequest):
+@app.post("/run_sim/batch")
+def run_sim_batch(req: BatchSimRequest, request: Request,
+                  x_sim_priority: str = Header("interactive")):
     """
-    Orchestrates the iterative planner -> /run_sim -> explainer with full agent trace.
-    Falls back to mock mode if LLM key is missing.
+    Evaluate the same candidates over many starting conditions (what-if tables) in one
+    engine call. Response is columnar: one entry per (scenario, candidate) in each column,
+    as JSON, application/msgpack or Arrow IPC depending on Accept.
     """
+    if x_sim_priority not in PRIORITIES:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid X-Sim-Priority: {x_sim_priority}")
+    if DF is None:
+        raise HTTPException(status_code=500, detail="Race data not loaded. Check server logs.")
+
+    scenarios = [s.dict() for s in req.scenarios or []]
+    if req.grid:
+        g = req.grid
+        scenarios += [{"base_lap": lap, "base_target_gap_s": gap, "current_compound": comp,
+                       "current_tire_age": age}
+                      for lap in g.base_lap for comp in g.current_compound
+                      for age in g.current_tire_age for gap in g.base_target_gap_s]
+    if not scenarios:
+        raise HTTPException(status_code=400, detail="Provide scenarios and/or grid")
+    if len(scenarios) > MAX_BATCH_SCENARIOS:
+        raise HTTPException(
+            status_code=400, detail=f"Too many scenarios ({len(scenarios)} > {MAX_BATCH_SCENARIOS})")
+
+    cfg = SimConfig(mc_samples=req.mc_samples or 200)
+    candidates = [Strategy(pit_lap=c.pit_lap, compound=c.compound) for c in req.candidates]
+    states = len({(s["base_lap"], s["current_compound"], s["current_tire_age"])
+                  for s in scenarios})
+    cost = estimate_bytes(cfg.mc_samples, len(DF), len(candidates))
     try:
-        from agent.config import LLMConfig
-        from agent.iterative_planner import IterativePlanner
-        from agent.explainer import explain
-    except Exception as e:
+        out = SCHEDULER.run(x_sim_priority, lambda: simulate_batch(
+            DF, scenarios, candidates, cfg,
+            sc_window=req.sc_window.dict() if req.sc_window else None,
+            sc_pit_loss_factor=req.sc_pit_loss_factor or 1.0,
+            seed=DEFAULT_SEED if req.seed is None else req.seed), cost)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return encode(request, {"scenarios": len(scenarios), "states": states, **out})
+
+
+# ============ Decision table (O(1) live lookups) ============
+
+# Rebuilt by a background job whenever DF changes; None while (re)building
+DECISION_TABLE: Optional[DecisionTable] = None
+_DECISION_TABLE_JOB: Optional[str] = None
+
+
+def _build_decision_table(job: Job, df: pd.DataFrame) -> Dict[str, Any]:
+    global DECISION_TABLE
+
+    def progress(frac: float):
+        job.check_cancelled()
+        job.set_progress(frac, f"Decision table {frac:.0%}")
+        # bulk work: let interactive simulations go first
+        SCHEDULER.checkpoint()
+
+    table = DecisionTable.build(df, progress=progress)
+    if df is DF:
+        DECISION_TABLE = table
+    return {"first_lap": table.first_lap, "last_lap": table.last_lap,
+            "cells": int(table.values[..., 1].size), "bytes": table.nbytes}
+
+
+def _start_decision_table():
+    """(Re)build the decision table for the current DF; DECISION_TABLE=false disables it"""
+    global DECISION_TABLE, _DECISION_TABLE_JOB
+    DECISION_TABLE = None
+    if _DECISION_TABLE_JOB is not None:
+        JOBS.cancel(_DECISION_TABLE_JOB)
+        _DECISION_TABLE_JOB = None
+    if DF is None or os.getenv("DECISION_TABLE", "true").lower() not in ["1", "true", "yes"]:
+        return
+    df = DF
+    job = JOBS.submit("decision_table", lambda job: _build_decision_table(job, df))
+    _DECISION_TABLE_JOB = job.id
+
+
+@app.get("/lookup")
+def lookup(lap: int = Query(..., ge=1), compound: str = Query(...),
+           tire_age: float = Query(..., ge=0), gap: float = Query(...), top: int = 5):
+    """
+    When to pit, given lap / current compound / tyre age / gap (positive = ahead).
+    Answered from the precomputed decision table; falls back to simulate()
+    outside the grid or while the table is being built.
+    """
+    if compound not in COMPOUNDS:
+        raise HTTPException(status_code=400, detail=f"Invalid compound: {compound}")
+    top = max(1, min(int(top), 50))
+
+    t0 = time.perf_counter()
+    table = DECISION_TABLE
+    options = table.lookup(lap, compound, tire_age, gap, top=top) if table else None
+    source = "table"
+
+    if options is None:
+        if DF is None:
+            raise HTTPException(
+                status_code=500, detail="Race data not loaded. Check server logs.")
+        source = "simulate"
+        horizon = table.grid.pit_horizon if table else 12
+        first_lap, last_lap = int(DF["lap"].min()), int(DF["lap"].max())
+        if not first_lap <= lap <= last_lap:
+            raise HTTPException(
+                status_code=400, detail=f"lap must be within {first_lap}..{last_lap}")
+        # Same defaults (and cache key) as the equivalent /run_sim request; constructed
+        # without validation because the sweep exceeds run_sim's six-candidate cap
+        req = SimRequest.model_construct(
+            base_lap=lap, base_target_gap_s=gap, current_compound=compound,
+            current_tire_age=int(round(tire_age)),
+            candidates=[Candidate(pit_lap=p, compound=c)
+                        for p in range(lap, min(lap + horizon, last_lap) + 1)
+                        for c in COMPOUNDS])
+        try:
+            out = _simulate_shared(json.dumps(_sim_args(req), sort_keys=True))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        options = sorted(({
+            "pit_lap": c["candidate"]["pit_lap"],
+            "compound": c["candidate"]["compound"],
+            "median_gap_after_5_laps": c["median_gap_after_5_laps"],
+            "p10": c["p10_by_lap"][metric_index(c)],
+            "p90": c["p90_by_lap"][metric_index(c)],
+        } for c in out["candidates"]), key=lambda o: o["median_gap_after_5_laps"],
+            reverse=True)[:top]
+
+    return {
+        "source": source,
+        "best": options[0] if options else None,
+        "options": options,
+        "elapsed_us": round((time.perf_counter() - t0) * 1e6, 1),
+    }
+
+
+# ============ Surrogate scoring (optional) ============
+
+# Trained in the background on each dataset when SURROGATE=true
+SURROGATE: Optional[Surrogate] = None
+
+
+def _start_surrogate():
+    global SURROGATE
+    SURROGATE = None
+    if DF is None or os.getenv("SURROGATE", "false").lower() not in ["1", "true", "yes"]:
+        return
+    df = DF
+
+    def train(job: Job) -> Dict[str, Any]:
+        global SURROGATE
+        job.set_progress(0.0, "Simulating training states")
+        model = Surrogate.train(df)
+        if df is DF:
+            SURROGATE = model
+        return model.report
+
+    JOBS.submit("surrogate", train)
+
+
+class SurrogateScoreRequest(BaseModel):
+    base_lap: int = Field(..., ge=1)
+    base_target_gap_s: float
+    current_compound: Compound
+    current_tire_age: int = Field(..., ge=0)
+    candidates: List[Candidate] = Field(..., min_items=1, max_items=500)
+    # predictions with a wider calibrated error bar are re-run through simulate()
+    max_error_s: float = Field(0.25, gt=0)
+
+
+@app.post("/surrogate/score")
+def surrogate_score(req: SurrogateScoreRequest,
+                    x_sim_priority: str = Header("interactive")):
+    """
+    Score many candidates with the surrogate, simulating only the untrustworthy ones.
+    Simulations go through the scheduler (X-Sim-Priority), request coalescing and the cache.
+    """
+    if DF is None:
         raise HTTPException(
-            status_code=500, detail=f"Agent modules not available: {e}")
+            status_code=500, detail="Race data not loaded. Check server logs.")
+    if x_sim_priority not in PRIORITIES:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid X-Sim-Priority: {x_sim_priority}")
+    cands = [Strategy(pit_lap=c.pit_lap, compound=c.compound) for c in req.candidates]
+    model = SURROGATE
+
+    def run(todo: List[Strategy]) -> Dict[str, Any]:
+        sim_req = SimRequest.model_construct(
+            base_lap=req.base_lap, base_target_gap_s=req.base_target_gap_s,
+            current_compound=req.current_compound, current_tire_age=req.current_tire_age,
+            candidates=[Candidate(pit_lap=c.pit_lap, compound=c.compound) for c in todo],
+            mc_samples=model.cfg.mc_samples if model else None,
+            seed=model.cfg.seed if model else None)
+        return _simulate_shared(json.dumps(_sim_args(sim_req), sort_keys=True), x_sim_priority)
 
-    cfg = LLMConfig()
+    t0 = time.perf_counter()
+    try:
+        if model is None:
+            # not trained (yet): every candidate goes to simulate()
+            results = [{"candidate": c["candidate"],
+                        "median_gap_after_5_laps": c["median_gap_after_5_laps"],
+                        "source": "simulate"} for c in run(cands)["candidates"]]
+        else:
+            results = model.score(DF, req.base_lap, req.current_compound,
+                                  req.current_tire_age, req.base_target_gap_s, cands,
+                                  max_error_s=req.max_error_s, run=run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "candidates": results,
+        "surrogate_ready": model is not None,
+        "simulated": sum(r["source"] == "simulate" for r in results),
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3),
+        "model": model.report if model is not None else None,
+    }
+
+
+class PlanRequest(BaseModel):
+    user_text: str
+    # "llm": refiner LLM proposes variations; "optimizer": deterministic pit-lap search
+    refinement: Literal["llm", "optimizer"] = "llm"
 
-    # Fallback to mock if no LLM key
-    if not cfg.api_key or cfg.api_key == "":
-        print("⚠️  No LLM_API_KEY found - using mock mode")
-        return plan_and_explain_mock(req)
+
+def _plan_and_explain(user_text: str, refinement: str, cfg,
+                      llm_limiter: Optional[threading.Semaphore] = None,
+                      shared_sims=None) -> Dict[str, Any]:
+    """Run one iterative plan plus explanation; raises HTTPException if the planner fails"""
+    from agent.iterative_planner import IterativePlanner
+    from agent.explainer import explain
 
     t0 = time.perf_counter()
     try:
-        planner = IterativePlanner(cfg)
-        result = planner.plan_iteratively(req.user_text)
+        planner = IterativePlanner(cfg, refinement=refinement,
+                                   llm_limiter=llm_limiter, shared_sims=shared_sims)
+        result = planner.plan_iteratively(user_text)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Planner failed: {e}")
     t1 = time.perf_counter()
@@ -272,6 +610,174 @@ def plan_and_explain(req: PlanRequest):
     }
 
 
+@app.post("/plan_and_explain")
+def plan_and_explain(req: PlanRequest):
+    """
+    Orchestrates the iterative planner -> /run_sim -> explainer with full agent trace.
+    Falls back to mock mode if LLM key is missing.
+    """
+    try:
+        from agent.config import LLMConfig
+        from agent.iterative_planner import IterativePlanner
+        from agent.explainer import explain
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Agent modules not available: {e}")
+
+    cfg = LLMConfig()
+
+    # Fallback to mock if no LLM key
+    if not cfg.api_key or cfg.api_key == "":
+        print("⚠️  No LLM_API_KEY found - using mock mode")
+        return plan_and_explain_mock(req)
+
+    return _plan_and_explain(req.user_text, req.refinement, cfg)
+
+
+class BatchPlanRequest(BaseModel):
+    user_texts: List[str] = Field(..., min_items=1, max_items=8,
+                                  description="What-if queries to plan concurrently")
+    refinement: Literal["llm", "optimizer"] = "llm"
+    max_llm_concurrency: int = Field(
+        4, ge=1, le=16, description="LLM requests in flight across all plans")
+
+
+@app.post("/plan_and_explain/batch")
+def plan_and_explain_batch(req: BatchPlanRequest):
+    """
+    Plan several what-if queries concurrently under one LLM concurrency budget.
+    Identical sub-simulations are shared between plans. Streams NDJSON: one line
+    per plan as it finishes (with its input `index`), then a summary line.
+    """
+    try:
+        from agent.config import LLMConfig
+        from agent.shared_sims import SharedSimulations
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Agent modules not available: {e}")
+
+    cfg = LLMConfig()
+    mock = not cfg.api_key
+    if mock:
+        print("⚠️  No LLM_API_KEY found - using mock mode")
+    limiter = threading.BoundedSemaphore(req.max_llm_concurrency)
+    shared = SharedSimulations()
+
+    def run_one(text: str) -> Dict[str, Any]:
+        if mock:
+            return plan_and_explain_mock(PlanRequest(user_text=text))
+        return _plan_and_explain(text, req.refinement, cfg,
+                                 llm_limiter=limiter, shared_sims=shared)
+
+    def stream():
+        t0 = time.perf_counter()
+        shared_total = 0
+        with ThreadPoolExecutor(max_workers=len(req.user_texts)) as pool:
+            futures = {pool.submit(run_one, text): i
+                       for i, text in enumerate(req.user_texts)}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                try:
+                    body = fut.result()
+                except HTTPException as e:
+                    body = {"error": e.detail}
+                except Exception as e:
+                    body = {"error": str(e)}
+                shared_total += ((body.get("trace") or {})
+                                 .get("shared_simulations", 0))
+                yield json.dumps({"index": i, "user_text": req.user_texts[i], **body}) + "\n"
+
+        yield json.dumps({"summary": {
+            "plans": len(req.user_texts),
+            "shared_simulations": shared_total,
+            "wall_s": round(time.perf_counter() - t0, 3),
+        }}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# ============ Race sessions (warm-start replanning) ============
+
+_SESSIONS = None
+
+
+def _session_store():
+    global _SESSIONS
+    if _SESSIONS is None:
+        from agent.session import SessionStore
+        _SESSIONS = SessionStore()
+    return _SESSIONS
+
+
+def _session_body(session, result: Dict[str, Any], elapsed: float) -> Dict[str, Any]:
+    from agent.explainer import explain
+    return {
+        "session_id": session.id,
+        "tool_args": result["tool_args"],
+        "sim_result": result["sim_result"],
+        "trace": result.get("trace"),
+        "explanation": explain(result["tool_args"], result["sim_result"]).dict(),
+        "timings": {"total_s": round(elapsed, 3)},
+    }
+
+
+class SessionUpdateRequest(BaseModel):
+    user_text: str
+
+
+@app.post("/sessions")
+def create_session(req: PlanRequest):
+    """Start a live race session with a full plan. Follow-ups go to /sessions/{id}/update."""
+    from agent.config import LLMConfig
+    from agent.session import RaceSession
+
+    session = RaceSession(LLMConfig(), refinement=req.refinement)
+    t0 = time.perf_counter()
+    try:
+        result = session.start(req.user_text)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Planner failed: {e}")
+    _session_store().add(session)
+    return _session_body(session, result, time.perf_counter() - t0)
+
+
+@app.post("/sessions/{session_id}/update")
+def update_session(session_id: str, req: SessionUpdateRequest):
+    """
+    Warm-start replanning, e.g. "now lap 13, gap 1.1s". Reuses the previous plan's
+    candidates (shifted by the laps that passed) and only simulates what changed.
+    """
+    session = _session_store().get(session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=404, detail=f"Session not found: {session_id}")
+    t0 = time.perf_counter()
+    try:
+        with session.lock:
+            result = session.update(req.user_text)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Replan failed: {e}")
+    return _session_body(session, result, time.perf_counter() - t0)
+
+
+@app.get("/sessions/{session_id}")
+def get_session(session_id: str):
+    """Current race state, carried candidates and update history of a session"""
+    session = _session_store().get(session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=404, detail=f"Session not found: {session_id}")
+    return session.summary()
+
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    if not _session_store().delete(session_id):
+        raise HTTPException(
+            status_code=404, detail=f"Session not found: {session_id}")
+    return {"status": "ok", "session_id": session_id}
+
+
 @app.post("/plan_and_explain_mock")
 def plan_and_explain_mock(req: PlanRequest):
     """
@@ -356,217 +862,109 @@ class MCPTriggerRequest(BaseModel):
     tool_args: Dict[str, Any]
     sim_result: Optional[Dict[str, Any]] = None
     explanation: Optional[Dict[str, Any]] = None
+    # Reports only: render in-process (default) or in the reporter container
+    backend: Literal["inprocess", "docker"] = "inprocess"
 
 
 @app.post("/mcp/trigger")
 def mcp_trigger(req: MCPTriggerRequest):
     """
     Trigger Docker MCP Gateway actions (report generation, burst simulation)
-    This demonstrates creative Docker orchestration for on-demand tasks
+    This demonstrates creative Docker orchestration for on-demand tasks.
+    Each action runs as a job with its own artifacts directory, so concurrent
+    requests don't overwrite each other; JOBS_MAX_WORKERS bounds how many run at once.
     """
-    import subprocess
-    import pathlib
-
     action = req.action.lower()
 
     # Gate behind feature flag to prevent misuse in public deployments
-    if os.getenv("ENABLE_MCP", "false").lower() not in ["1", "true", "yes"]:
+    if not _mcp_enabled():
         raise HTTPException(
             status_code=403, detail="MCP disabled on this deployment")
 
-    # Find docker command
-    docker_cmd = find_docker_command()
-
     if action not in ["report", "burst"]:
         raise HTTPException(
             status_code=400, detail=f"Invalid action: {action}")
 
-    try:
-        # Write tool_args to artifacts directory
-        artifacts_dir = pathlib.Path("./artifacts")
-        artifacts_dir.mkdir(exist_ok=True)
-
-        tool_args_path = artifacts_dir / "tool_args.json"
-        with open(tool_args_path, "w") as f:
-            json.dump(req.tool_args, f, indent=2)
-
-        # If sim_result and explanation provided, write them too
-        if req.sim_result and req.explanation:
-            result_data = {
-                "sim_result": req.sim_result,
-                "explanation": req.explanation
-            }
-            result_path = artifacts_dir / "sim_result.json"
-            with open(result_path, "w") as f:
-                json.dump(result_data, f, indent=2)
-
-        # Trigger Docker Compose run via MCP
-        # Use PROJECT_ROOT environment variable to find compose file on host
-        project_root = os.getenv("PROJECT_ROOT", "/app")
-        compose_file = pathlib.Path(project_root) / "docker-compose.yml"
-
-        if action == "report":
-            print(
-                f"🐳 MCP: Triggering reporter container using {docker_cmd}...")
-            print(
-                f"🐳 MCP: Project root: {project_root}, Compose file: {compose_file}")
-            result = subprocess.run(
-                [docker_cmd, "compose", "-f",
-                    str(compose_file), "run", "--rm", "reporter"],
-                capture_output=True,
-                text=True,
-                timeout=60,
-                cwd=str(project_root)
-            )
-
-            if result.returncode == 0:
-                # Read report metadata
-                reports_dir = pathlib.Path("./reports")
-                meta_path = reports_dir / "latest.json"
-
-                if meta_path.exists():
-                    with open(meta_path, "r") as f:
-                        meta = json.load(f)
-
-                    return {
-                        "status": "success",
-                        "action": "report",
-                        "message": "Report generated successfully",
-                        "artifact": {
-                            "filename": meta["filename"],
-                            "path": f"/reports/{meta['filename']}",
-                            "timestamp": meta["timestamp"]
-                        },
-                        "logs": result.stdout
-                    }
-                else:
-                    return {
-                        "status": "success",
-                        "action": "report",
-                        "message": "Report generated",
-                        "logs": result.stdout
-                    }
-            else:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Reporter failed: {result.stderr}"
-                )
-
-        elif action == "burst":
-            print(
-                f"🐳 MCP: Triggering burst simulation container using {docker_cmd}...")
-            print(
-                f"🐳 MCP: Project root: {project_root}, Compose file: {compose_file}")
-            result = subprocess.run(
-                [docker_cmd, "compose", "-f",
-                    str(compose_file), "run", "--rm", "sim-burst"],
-                capture_output=True,
-                text=True,
-                timeout=180,
-                cwd=str(project_root)
-            )
-
-            if result.returncode == 0:
-                # Read burst result
-                burst_path = pathlib.Path("./artifacts/sim_burst.json")
-
-                if burst_path.exists():
-                    with open(burst_path, "r") as f:
-                        burst_data = json.load(f)
-
-                    return {
-                        "status": "success",
-                        "action": "burst",
-                        "message": "High accuracy simulation complete",
-                        "data": burst_data,
-                        "logs": result.stdout
-                    }
-                else:
-                    return {
-                        "status": "success",
-                        "action": "burst",
-                        "message": "Burst simulation complete",
-                        "logs": result.stdout
-                    }
-            else:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Burst simulation failed: {result.stderr}"
-                )
-
-    except subprocess.TimeoutExpired:
+    if action == "report" and req.backend == "inprocess":
+        # Warm in-process renderer; identical inputs are served from the hash cache
+        try:
+            meta = REPORTS.get_or_render(
+                req.tool_args, req.sim_result, req.explanation)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Report rendering failed: {e}")
+        return {
+            "status": "success",
+            "action": "report",
+            "message": "Report served from cache" if meta["cached"] else "Report generated successfully",
+            "artifact": meta,
+            "cached": meta["cached"],
+            "logs": "",
+        }
+
+    params = {
+        "tool_args": req.tool_args,
+        "sim_result": req.sim_result,
+        "explanation": req.explanation,
+    }
+    fn = _report_docker if action == "report" else _burst_docker
+    job = JOBS.submit(action, fn, params, backend="docker")
+    timeout = MCP_TIMEOUTS[action]
+
+    # Allow for time spent queued behind other jobs on top of the container timeout
+    job = JOBS.wait(job.id, timeout=2 * timeout)
+    if job.status == "succeeded":
+        return {"status": "success", "action": action, "job_id": job.id, **job.result}
+    if job.status in ("queued", "running") or job.error_type == "TimeoutError":
+        JOBS.cancel(job.id)
         raise HTTPException(
             status_code=504,
             detail=f"MCP action '{action}' timed out"
         )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"MCP trigger failed: {str(e)}"
-        )
+    raise HTTPException(
+        status_code=500,
+        detail=f"MCP trigger failed: {job.error}"
+    )
+
+
+# Docker is sampled in the background and log tails are shared, so polling
+# these endpoints never spawns a subprocess per request
+DOCKER_SAMPLER = DockerSampler(
+    lambda: find_docker_command(),
+    interval_s=float(os.getenv("MCP_STATUS_INTERVAL_S", "5")))
+DOCKER_LOGS = LogHub(lambda: find_docker_command())
+MCP_SERVICES = ["api", "frontend", "reporter", "sim-burst"]
+
+
+@app.on_event("shutdown")
+def stop_docker_monitoring():
+    DOCKER_SAMPLER.stop()
+    DOCKER_LOGS.stop()
 
 
 @app.get("/mcp/status")
 def mcp_status():
     """
-    Get Docker container status (demonstrates MCP read operations)
+    Get Docker container status (demonstrates MCP read operations).
+    Served from the background sampler's latest snapshot (`age_s` old).
     """
-    import subprocess
-
-    if os.getenv("ENABLE_MCP", "false").lower() not in ["1", "true", "yes"]:
+    if not _mcp_enabled():
         return {"status": "disabled", "mcp_enabled": False}
 
-    docker_cmd = find_docker_command()
+    snapshot = DOCKER_SAMPLER.snapshot(wait_s=2 * DOCKER_SAMPLER.timeout_s)
+    if snapshot is None:
+        return {"status": "pending", "mcp_enabled": True}
+    if snapshot["status"] == "error":
+        return {**snapshot, "mcp_enabled": False}
+    return {**snapshot, "mcp_enabled": True}
 
-    try:
-        # Get container status
-        ps_result = subprocess.run(
-            [docker_cmd, "compose", "ps", "--format", "json"],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
 
-        containers = []
-        if ps_result.returncode == 0 and ps_result.stdout.strip():
-            try:
-                # Parse JSON lines
-                for line in ps_result.stdout.strip().split('\n'):
-                    if line.strip():
-                        containers.append(json.loads(line))
-            except json.JSONDecodeError:
-                pass
-
-        # Get stats (CPU, memory)
-        stats_result = subprocess.run(
-            [docker_cmd, "stats", "--no-stream", "--format", "{{json .}}"],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-
-        stats = []
-        if stats_result.returncode == 0 and stats_result.stdout.strip():
-            try:
-                for line in stats_result.stdout.strip().split('\n'):
-                    if line.strip():
-                        stats.append(json.loads(line))
-            except json.JSONDecodeError:
-                pass
-
-        return {
-            "status": "ok",
-            "containers": containers,
-            "stats": stats,
-            "mcp_enabled": True
-        }
-
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": str(e),
-            "mcp_enabled": False
-        }
+def _check_log_service(service: str):
+    if not _mcp_enabled():
+        raise HTTPException(status_code=403, detail="MCP disabled")
+    if service not in MCP_SERVICES:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid service: {service}")
 
 
 @app.get("/mcp/logs/{service}")
@@ -574,28 +972,13 @@ def mcp_logs(service: str, tail: int = 50):
     """
     Get container logs (demonstrates MCP observability)
     """
-    import subprocess
-
-    if os.getenv("ENABLE_MCP", "false").lower() not in ["1", "true", "yes"]:
-        raise HTTPException(status_code=403, detail="MCP disabled")
-
-    docker_cmd = find_docker_command()
-
-    if service not in ["api", "frontend", "reporter", "sim-burst"]:
-        raise HTTPException(
-            status_code=400, detail=f"Invalid service: {service}")
+    _check_log_service(service)
 
     try:
-        result = subprocess.run(
-            [docker_cmd, "compose", "logs", "--tail", str(tail), service],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-
+        lines = DOCKER_LOGS.recent(service, tail)
         return {
             "service": service,
-            "logs": result.stdout,
+            "logs": "".join(f"{line}\n" for line in lines),
             "tail": tail
         }
 
@@ -604,3 +987,358 @@ def mcp_logs(service: str, tail: int = 50):
             status_code=500,
             detail=f"Failed to get logs: {str(e)}"
         )
+
+
+@app.get("/mcp/logs/{service}/stream")
+async def mcp_logs_stream(service: str, tail: int = 50):
+    """Server-Sent Events: the last `tail` lines, then a `log` event per new line"""
+    _check_log_service(service)
+    try:
+        log_tail = DOCKER_LOGS.acquire(service)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to get logs: {str(e)}")
+
+    async def events():
+        try:
+            backlog = log_tail.since(0)
+            seq = backlog[-1][0] if backlog else 0
+            for _, line in backlog[-tail:] if tail > 0 else []:
+                yield f"event: log\ndata: {json.dumps(line)}\n\n"
+            while True:
+                for seq, line in log_tail.since(seq):
+                    yield f"event: log\ndata: {json.dumps(line)}\n\n"
+                if log_tail.done and not log_tail.since(seq):
+                    yield "event: end\ndata: {}\n\n"
+                    return
+                await asyncio.sleep(0.2)
+        finally:
+            DOCKER_LOGS.release(log_tail)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# ============ Live race ingest ============
+
+# Active live races; the oldest is dropped beyond LIVE_MAX_RACES
+LIVE_RACES: Dict[str, LiveRace] = {}
+LIVE_MAX_RACES = int(os.getenv("LIVE_MAX_RACES", "32"))
+_LIVE_LOCK = threading.Lock()
+
+
+class LiveRaceRequest(BaseModel):
+    base_lap: int = Field(..., ge=1)
+    base_target_gap_s: float
+    current_compound: Compound
+    current_tire_age: int = Field(..., ge=0)
+    candidates: List[Candidate] = Field(..., min_items=1, max_items=6)
+    mc_samples: int = Field(200, ge=10, le=2000)
+    seed: Optional[int] = Field(None, ge=0)
+
+
+class LapUpdate(BaseModel):
+    lap: int = Field(..., ge=1)
+    lap_time_s: float = Field(..., gt=0)
+    compound: Compound
+    gap_s: float
+
+
+def _live_race(race_id: str) -> LiveRace:
+    race = LIVE_RACES.get(race_id)
+    if race is None:
+        raise HTTPException(status_code=404, detail=f"Live race not found: {race_id}")
+    return race
+
+
+@app.post("/live/races")
+def create_live_race(req: LiveRaceRequest):
+    """Start tracking a race; laps are then pushed via POST .../laps or the WebSocket"""
+    if DF is None:
+        raise HTTPException(
+            status_code=500, detail="Race data not loaded. Check server logs.")
+    try:
+        race = LiveRace(DF, req.base_lap, req.current_compound, req.current_tire_age,
+                        req.base_target_gap_s,
+                        [Strategy(pit_lap=c.pit_lap, compound=c.compound) for c in req.candidates],
+                        cfg=SimConfig(mc_samples=req.mc_samples),
+                        seed=DEFAULT_SEED if req.seed is None else req.seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    race_id = uuid.uuid4().hex[:12]
+    with _LIVE_LOCK:
+        LIVE_RACES[race_id] = race
+        while len(LIVE_RACES) > LIVE_MAX_RACES:
+            LIVE_RACES.pop(next(iter(LIVE_RACES)))
+    return {"race_id": race_id, **race.projection}
+
+
+@app.get("/live/races/{race_id}")
+def get_live_race(race_id: str):
+    race = _live_race(race_id)
+    return {"race_id": race_id, "laps": race.laps, **race.projection}
+
+
+@app.post("/live/races/{race_id}/laps")
+def ingest_lap(race_id: str, update: LapUpdate):
+    """Append a completed lap; re-simulates the remaining laps and notifies subscribers"""
+    race = _live_race(race_id)
+    try:
+        return race.ingest(update.lap, update.lap_time_s, update.compound, update.gap_s)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.websocket("/live/races/{race_id}/ws")
+async def live_race_ws(websocket: WebSocket, race_id: str):
+    """
+    Receives the current projection, then every update. Lap messages sent on the
+    socket ({lap, lap_time_s, compound, gap_s}) are ingested like POST .../laps.
+    """
+    race = LIVE_RACES.get(race_id)
+    if race is None:
+        await websocket.close(code=4404)
+        return
+    await websocket.accept()
+    queue = race.subscribe(asyncio.get_running_loop())
+
+    async def push():
+        while True:
+            await websocket.send_json(await queue.get())
+
+    pusher = None
+    try:
+        # The snapshot goes out before the pusher starts, so no update can overtake it
+        await websocket.send_json(race.projection)
+        pusher = asyncio.create_task(push())
+        while True:
+            text = await websocket.receive_text()
+            try:
+                update = LapUpdate(**json.loads(text))
+                await run_in_threadpool(race.ingest, update.lap, update.lap_time_s,
+                                        update.compound, update.gap_s)
+            except (json.JSONDecodeError, ValueError, TypeError) as e:
+                await websocket.send_json({"event": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if pusher is not None:
+            pusher.cancel()
+        race.unsubscribe(queue)
+
+
+# ============ Background jobs ============
+
+# Shared by API-submitted jobs and MCP actions; JOBS_MAX_WORKERS caps concurrent jobs
+JOBS = JobManager(max_workers=int(os.getenv("JOBS_MAX_WORKERS", "4")),
+                  max_finished=int(os.getenv("JOBS_MAX_FINISHED", "200")),
+                  finished_ttl_s=float(os.getenv("JOBS_FINISHED_TTL_S", "3600")))
+
+
+def _mcp_enabled() -> bool:
+    return os.getenv("ENABLE_MCP", "false").lower() in ["1", "true", "yes"]
+
+
+MCP_TIMEOUTS = {"report": 60, "burst": 180}
+
+
+def _compose_run(service: str, timeout: float, job: Optional[Job] = None,
+                 env: Optional[Dict[str, str]] = None):
+    """
+    `docker compose run --rm <service>` with extra container env vars.
+    Terminates the run if the job is cancelled; raises TimeoutError after `timeout`.
+    """
+    import subprocess
+
+    project_root = os.getenv("PROJECT_ROOT", "/app")
+    compose_file = Path(project_root) / "docker-compose.yml"
+    env_args = [arg for k, v in (env or {}).items() for arg in ("-e", f"{k}={v}")]
+    print(f"🐳 MCP: Running {service} (project root: {project_root})")
+    proc = subprocess.Popen(
+        [find_docker_command(), "compose", "-f", str(compose_file),
+         "run", "--rm", *env_args, service],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=str(project_root),
+    )
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            stdout, stderr = proc.communicate(timeout=0.5)
+            return proc.returncode, stdout, stderr
+        except subprocess.TimeoutExpired:
+            cancelled = job is not None and job.cancel_event.is_set()
+            if cancelled or time.monotonic() > deadline:
+                proc.terminate()
+                proc.communicate()
+                if cancelled:
+                    job.check_cancelled()
+                raise TimeoutError(f"{service} timed out after {timeout}s")
+
+
+def _job_artifacts(job: Job) -> Dict[str, str]:
+    """
+    Write the job's inputs to artifacts/jobs/<id>/ and return the env vars that point
+    the container at them. Paths are relative to the project root, which both the API
+    (/app/artifacts) and the sibling containers (${PWD}/artifacts) see as the same files.
+    """
+    job_dir = JOBS.job_dir(job.id)
+    rel_dir = f"artifacts/jobs/{job.id}"
+    with open(job_dir / "tool_args.json", "w") as f:
+        json.dump(job.params["tool_args"], f, indent=2)
+
+    # If sim_result and explanation provided, write them too
+    if job.params.get("sim_result") and job.params.get("explanation"):
+        with open(job_dir / "sim_result.json", "w") as f:
+            json.dump({
+                "sim_result": job.params["sim_result"],
+                "explanation": job.params["explanation"],
+            }, f, indent=2)
+
+    return {
+        "JOB_ID": job.id,
+        "ARTIFACTS_DIR": rel_dir,
+        "TOOL_ARGS_PATH": f"{rel_dir}/tool_args.json",
+    }
+
+
+def _report_docker(job: Job) -> Dict[str, Any]:
+    """Render a report in the reporter container, unless the same inputs were rendered before"""
+    env = _job_artifacts(job)
+    logs = []
+
+    def render(key: str, path: Path):
+        job.set_progress(0.05, "Starting reporter container")
+        code, stdout, stderr = _compose_run(
+            "reporter", timeout=MCP_TIMEOUTS["report"], job=job,
+            env={**env, "REPORT_FILENAME": path.name})
+        logs.append(stdout)
+        if code != 0:
+            raise RuntimeError(f"Reporter failed: {stderr}")
+
+    meta = REPORTS.get_or_render(
+        job.params["tool_args"], job.params.get("sim_result"),
+        job.params.get("explanation"), render=render)
+    return {
+        "message": "Report served from cache" if meta["cached"] else "Report generated successfully",
+        "artifact": meta,
+        "cached": meta["cached"],
+        "logs": "".join(logs),
+    }
+
+
+def _burst_docker(job: Job) -> Dict[str, Any]:
+    """High Accuracy burst in the sim-burst container (original Docker MCP path)"""
+    env = _job_artifacts(job)
+    job.set_progress(0.05, "Starting sim-burst container")
+    code, stdout, stderr = _compose_run(
+        "sim-burst", timeout=MCP_TIMEOUTS["burst"], job=job, env=env)
+    if code != 0:
+        raise RuntimeError(f"Burst simulation failed: {stderr}")
+
+    burst_path = JOBS.job_dir(job.id) / "sim_burst.json"
+    if not burst_path.exists():
+        return {"message": "Burst simulation complete", "logs": stdout}
+    with open(burst_path, "r") as f:
+        data = json.load(f)
+    return {"message": "High accuracy simulation complete", "data": data, "logs": stdout}
+
+
+def _burst_inprocess(job: Job) -> Dict[str, Any]:
+    """High Accuracy burst inside the API: one cached simulation per candidate, for progress/cancel"""
+    args = job.params["sim_args"]
+    candidates = args["candidates"]
+    results = []
+    for i, cand in enumerate(candidates):
+        job.check_cancelled()
+        # Preemption point: let queued interactive queries go before the next batch
+        SCHEDULER.checkpoint()
+        one = json.dumps({**args, "candidates": [cand]}, sort_keys=True)
+        results.append(_simulate_shared(one, "bulk")["candidates"][0])
+        job.set_progress((i + 1) / len(candidates),
+                         f"Simulated L{cand['pit_lap']} {cand['compound']} ({i + 1}/{len(candidates)})")
+
+    sim_result = {
+        "base_lap": args["base_lap"],
+        "base_target_gap_s": args["base_target_gap_s"],
+        "seed": args["seed"],
+        "candidates": results,
+    }
+    return {"data": burst_summary(sim_result, args["mc_samples"]), "sim_result": sim_result}
+
+
+class BurstJobRequest(BaseModel):
+    tool_args: Dict[str, Any]
+    mc_samples: int = Field(2000, ge=10, le=2000)
+    backend: Literal["inprocess", "docker"] = "inprocess"
+
+
+@app.post("/jobs/burst", status_code=202)
+def create_burst_job(req: BurstJobRequest):
+    """
+    Queue a High Accuracy burst and return its job id immediately.
+    Poll GET /jobs/{id} or stream GET /jobs/{id}/events; cancel with DELETE /jobs/{id}.
+    """
+    if req.backend == "docker":
+        if not _mcp_enabled():
+            raise HTTPException(
+                status_code=403, detail="MCP disabled on this deployment")
+        job = JOBS.submit("burst", _burst_docker,
+                          {"tool_args": req.tool_args}, backend="docker")
+    else:
+        if DF is None:
+            raise HTTPException(
+                status_code=500, detail="Race data not loaded. Check server logs.")
+        try:
+            sim_req = SimRequest(**{**req.tool_args, "mc_samples": req.mc_samples})
+        except Exception as e:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid tool_args: {e}")
+        job = JOBS.submit("burst", _burst_inprocess,
+                          {"sim_args": _sim_args(sim_req)})
+    return job.to_dict()
+
+
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": [j.to_dict() for j in JOBS.list()]}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = JOBS.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events: a `progress` event on every change, then a final `done` event"""
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    async def events():
+        last = None
+        while True:
+            state = job.to_dict()
+            done = state["status"] in ("succeeded", "failed", "cancelled")
+            snapshot = (state["status"], state["progress"], state["message"])
+            if done:
+                yield f"event: done\ndata: {json.dumps(state)}\n\n"
+                return
+            if snapshot != last:
+                last = snapshot
+                yield f"event: progress\ndata: {json.dumps(state)}\n\n"
+            await asyncio.sleep(0.2)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -0,0 +1,204 @@
+# api/monitor.py
+"""
+Docker observability for the MCP endpoints without a subprocess per request.
+
+- DockerSampler refreshes `docker compose ps` and `docker stats` on a fixed
+  interval in a background thread; /mcp/status only reads the latest snapshot.
+- LogHub keeps at most one `docker compose logs --follow` per service. Every
+  reader (JSON polls and SSE streams) shares that tail's ring buffer, and the
+  tail is stopped once nobody has read it for `linger_s` seconds.
+"""
+
+import json
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _json_lines(text: str) -> List[Dict[str, Any]]:
+    rows = []
+    for line in text.strip().split("\n"):
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except json.JSONDecodeError:
+            pass
+    return rows
+
+
+class DockerSampler:
+    """Background `docker compose ps` + `docker stats` sampler"""
+
+    def __init__(self, docker_cmd: Callable[[], str], interval_s: float = 5.0,
+                 timeout_s: float = 10.0):
+        self.docker_cmd = docker_cmd
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self.samples = 0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._first = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name="docker-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout_s)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._snapshot = self.sample()
+            self.samples += 1
+            self._first.set()
+            self._stop.wait(self.interval_s)
+
+    def _run(self, args: List[str]) -> List[Dict[str, Any]]:
+        result = subprocess.run([self.docker_cmd(), *args], capture_output=True,
+                                text=True, timeout=self.timeout_s)
+        if result.returncode != 0 or not result.stdout.strip():
+            return []
+        return _json_lines(result.stdout)
+
+    def sample(self) -> Dict[str, Any]:
+        try:
+            containers = self._run(["compose", "ps", "--format", "json"])
+            stats = self._run(
+                ["stats", "--no-stream", "--format", "{{json .}}"])
+            return {"status": "ok", "containers": containers, "stats": stats,
+                    "sampled_at": time.time()}
+        except Exception as e:
+            return {"status": "error", "message": str(e), "sampled_at": time.time()}
+
+    def snapshot(self, wait_s: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Latest sample (None until the first one lands); starts the sampler lazily"""
+        self.start()
+        if wait_s:
+            self._first.wait(wait_s)
+        snap = self._snapshot
+        if snap is None:
+            return None
+        return {**snap, "age_s": round(time.time() - snap["sampled_at"], 3),
+                "interval_s": self.interval_s}
+
+
+class LogTail:
+    """A single `docker compose logs --follow` process and its recent lines"""
+
+    def __init__(self, service: str, docker_cmd: str, buffer_lines: int = 1000):
+        self.service = service
+        self.lines: deque = deque(maxlen=buffer_lines)  # (seq, line)
+        self.seq = 0
+        self.done = False
+        self.cond = threading.Condition()
+        self.readers = 0
+        self.last_read = time.monotonic()
+        self.proc = subprocess.Popen(
+            [docker_cmd, "compose", "logs", "--follow", "--no-color",
+             "--tail", str(buffer_lines), service],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        threading.Thread(target=self._pump, name=f"logs-{service}",
+                         daemon=True).start()
+
+    def _pump(self):
+        for line in self.proc.stdout:
+            with self.cond:
+                self.seq += 1
+                self.lines.append((self.seq, line.rstrip("\n")))
+                self.cond.notify_all()
+        self.proc.wait()
+        with self.cond:
+            self.done = True
+            self.cond.notify_all()
+
+    def since(self, seq: int) -> List[Tuple[int, str]]:
+        with self.cond:
+            self.last_read = time.monotonic()
+            return [item for item in self.lines if item[0] > seq]
+
+    def wait_for_output(self, timeout: float):
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq > 0 or self.done, timeout)
+
+    def stop(self):
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+class LogHub:
+    """One shared LogTail per service, fanned out to every reader"""
+
+    def __init__(self, docker_cmd: Callable[[], str], linger_s: float = 30.0,
+                 buffer_lines: int = 1000):
+        self.docker_cmd = docker_cmd
+        self.linger_s = linger_s
+        self.buffer_lines = buffer_lines
+        self.started = 0
+        self._tails: Dict[str, LogTail] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+
+    def acquire(self, service: str) -> LogTail:
+        with self._lock:
+            tail = self._tails.get(service)
+            if tail is None or tail.done:
+                tail = LogTail(service, self.docker_cmd(), self.buffer_lines)
+                self._tails[service] = tail
+                self.started += 1
+            tail.readers += 1
+            tail.last_read = time.monotonic()
+            if self._reaper is None or not self._reaper.is_alive():
+                self._reaper = threading.Thread(
+                    target=self._reap, name="logs-reaper", daemon=True)
+                self._reaper.start()
+            return tail
+
+    def release(self, tail: LogTail):
+        with self._lock:
+            tail.readers -= 1
+            tail.last_read = time.monotonic()
+
+    def recent(self, service: str, tail: int, wait_s: float = 1.0) -> List[str]:
+        """Last `tail` lines from the shared buffer (waits briefly on a cold tail)"""
+        log_tail = self.acquire(service)
+        try:
+            log_tail.wait_for_output(wait_s)
+            return [line for _, line in log_tail.since(0)][-tail:] if tail > 0 else []
+        finally:
+            self.release(log_tail)
+
+    def _reap(self):
+        while True:
+            time.sleep(min(self.linger_s, 1.0))
+            with self._lock:
+                now = time.monotonic()
+                for service, tail in list(self._tails.items()):
+                    if tail.done or (tail.readers == 0
+                                     and now - tail.last_read > self.linger_s):
+                        tail.stop()
+                        del self._tails[service]
+                if not self._tails:
+                    self._reaper = None
+                    return
+
+    def stop(self):
+        with self._lock:
+            for tail in self._tails.values():
+                tail.stop()
+            self._tails.clear()
@@ -0,0 +1,198 @@
+# api/reports.py
+"""
+Strategy report rendering with a content-hash cache.
+
+Reports are keyed by a SHA-256 of their inputs (tool_args, sim_result,
+explanation). A repeat request for the same inputs is served straight from
+./reports without rendering again, and the hash doubles as the file's ETag.
+Rendering happens in-process from the same template file as
+scripts/reporter.mjs (scripts/report_template.html), so there is no
+per-request container cold start; the Docker reporter remains available and
+writes to the same content-addressed filename.
+
+Only those content-addressed reports are immutable. Anything else under
+./reports (latest.json, timestamped reports) is served with `no-cache` and
+revalidated by ETag.
+"""
+
+import functools
+import hashlib
+import html
+import json
+import threading
+import time
+from pathlib import Path
+from string import Template
+from typing import Any, Dict, Optional
+
+REPORT_PREFIX = "strategy-report-"
+
+# Shared with scripts/reporter.mjs so both renderers produce the same page
+REPORT_TEMPLATE_PATH = Path(__file__).resolve().parent.parent / "scripts" / "report_template.html"
+
+
+@functools.lru_cache(maxsize=1)
+def report_template() -> Template:
+    return Template(REPORT_TEMPLATE_PATH.read_text(encoding="utf-8"))
+
+
+def report_key(tool_args: Dict[str, Any], sim_result: Optional[Dict[str, Any]],
+               explanation: Optional[Dict[str, Any]]) -> str:
+    """Content hash of the report inputs (canonical JSON)"""
+    payload = json.dumps(
+        {"tool_args": tool_args, "sim_result": sim_result, "explanation": explanation},
+        sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def report_filename(key: str) -> str:
+    return f"{REPORT_PREFIX}{key[:16]}.html"
+
+
+def content_digest(path: Path) -> Optional[str]:
+    """The hash in a content-addressed report name (strategy-report-<16 hex>.html), else None"""
+    name = path.name
+    if name.startswith(REPORT_PREFIX) and name.endswith(".html"):
+        digest = name[len(REPORT_PREFIX):-len(".html")]
+        if len(digest) == 16 and all(c in "0123456789abcdef" for c in digest):
+            return digest
+    return None
+
+
+def etag_for(path: Path) -> str:
+    """Content-addressed reports carry their hash in the name; other files are hashed on read"""
+    digest = content_digest(path)
+    if digest is not None:
+        return f'"{digest}"'
+    return f'"{hashlib.sha256(path.read_bytes()).hexdigest()[:16]}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """If-None-Match comparison: comma-separated tags, weak (W/) prefixes ignored, * matches"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+def _fmt(x) -> str:
+    try:
+        return f"{float(x):.2f}"
+    except (TypeError, ValueError):
+        return "N/A"
+
+
+def render_report_html(tool_args: Dict[str, Any], sim_result: Optional[Dict[str, Any]],
+                       explanation: Optional[Dict[str, Any]]) -> str:
+    """Fill scripts/report_template.html the way scripts/reporter.mjs generateHTML() does"""
+    best = ((sim_result or {}).get("candidates") or [{}])[0]
+    cand = best.get("candidate") or {}
+    first = (tool_args.get("candidates") or [{}])[0]
+    pit_lap = cand.get("pit_lap") or first.get("pit_lap") or "N/A"
+    compound = str(cand.get("compound") or "N/A").upper()
+    final_gap = _fmt(best.get("median_gap_after_5_laps"))
+    base_gap = _fmt(tool_args.get("base_target_gap_s"))
+    try:
+        net_change = f"{float(final_gap) - float(base_gap):.2f}"
+    except ValueError:
+        net_change = "NaN"
+
+    rationale_block = ""
+    if explanation:
+        items = "".join(f"<li>• {html.escape(str(r))}</li>"
+                        for r in (explanation.get("rationale") or [])[:3])
+        rationale_block = f"""
+      <div class="rationale">
+        <h3>💡 Why This Strategy Works</h3>
+        <ul>
+          {items or "<li>Analysis complete</li>"}
+        </ul>
+      </div>
+"""
+
+    return report_template().substitute(
+        pit_lap=html.escape(str(pit_lap)),
+        compound=html.escape(compound),
+        base_gap=base_gap,
+        final_gap=final_gap,
+        net_change=net_change,
+        rationale_block=rationale_block,
+        base_lap=html.escape(str(tool_args.get("base_lap"))),
+        current_compound=html.escape(str(tool_args.get("current_compound") or "").upper()),
+        current_tire_age=html.escape(str(tool_args.get("current_tire_age"))),
+        n_candidates=len(tool_args.get("candidates") or []),
+        mc_samples=html.escape(str(tool_args.get("mc_samples") or 400)),
+        generated_at=time.strftime("%Y-%m-%d %H:%M:%S"),
+        generator="",
+        footer_note="Rendered in-process and cached by content hash",
+    )
+
+
+class ReportCache:
+    """Renders each distinct set of report inputs once; concurrent requests for the same key wait"""
+
+    def __init__(self, reports_dir: Path = Path("./reports")):
+        self.reports_dir = Path(reports_dir)
+        self._lock = threading.Lock()
+        # key -> [lock, holders + waiters]; an entry lives only while someone uses it
+        self._key_locks: Dict[str, list] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, key: str) -> Path:
+        return self.reports_dir / report_filename(key)
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.path_for(key)
+        if not path.exists():
+            return None
+        return self._meta(key, path, cached=True)
+
+    def _meta(self, key: str, path: Path, cached: bool) -> Dict[str, Any]:
+        return {
+            "filename": path.name,
+            "path": f"/reports/{path.name}",
+            "timestamp": time.strftime("%Y-%m-%dT%H-%M-%S", time.gmtime(path.stat().st_mtime)),
+            "etag": f'"{key[:16]}"',
+            "cached": cached,
+        }
+
+    def get_or_render(self, tool_args: Dict[str, Any], sim_result: Optional[Dict[str, Any]],
+                      explanation: Optional[Dict[str, Any]], render=None) -> Dict[str, Any]:
+        """
+        Return report metadata, rendering only on a cache miss. `render(key, path)` can
+        replace the in-process renderer (e.g. the Docker reporter writing to `path`).
+        """
+        key = report_key(tool_args, sim_result, explanation)
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                return self._build(key, tool_args, sim_result, explanation, render)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def _build(self, key: str, tool_args: Dict[str, Any], sim_result: Optional[Dict[str, Any]],
+               explanation: Optional[Dict[str, Any]], render) -> Dict[str, Any]:
+        meta = self.lookup(key)
+        if meta is not None:
+            self.hits += 1
+            return meta
+        self.misses += 1
+        path = self.path_for(key)
+        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        if render is None:
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(render_report_html(
+                tool_args, sim_result, explanation), encoding="utf-8")
+            tmp.replace(path)  # atomic, so readers never see a partial file
+        else:
+            render(key, path)
+        if not path.exists():
+            raise RuntimeError(f"Renderer did not produce {path.name}")
+        return self._meta(key, path, cached=False)
@@ -1,6 +1,6 @@
 # api/schemas.py
-from typing import List, Literal, Optional
-from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, Field, validator
 
 Compound = Literal["soft", "medium", "hard"]
 
@@ -17,6 +17,28 @@ class SCWindow(BaseModel):
     end_lap: int = Field(..., ge=1, description="Last lap of SC period")
 
 
+class SCHazard(BaseModel):
+    """Stochastic Safety Car: each simulated path draws its own SC start and duration"""
+    rate_per_lap: Union[float, List[float]] = Field(
+        ..., description="SC probability per lap; a list gives per-lap values from base_lap "
+                         "(the last value repeats)")
+    min_laps: int = Field(2, ge=1, description="Shortest SC period in laps")
+    max_laps: int = Field(5, ge=1, description="Longest SC period in laps")
+
+    @validator("rate_per_lap")
+    def _rates_are_probabilities(cls, v):
+        rates = v if isinstance(v, list) else [v]
+        if not rates or any(not 0.0 <= r <= 1.0 for r in rates):
+            raise ValueError("rate_per_lap must be probabilities in [0, 1]")
+        return v
+
+    @validator("max_laps")
+    def _max_not_below_min(cls, v, values):
+        if v < values.get("min_laps", 1):
+            raise ValueError("max_laps must be >= min_laps")
+        return v
+
+
 class SimRequest(BaseModel):
     base_lap: int = Field(..., ge=1,
                           description="Starting absolute lap for simulation window")
@@ -31,8 +53,22 @@ class SimRequest(BaseModel):
         None, ge=10, le=2000, description="Optional override for Monte Carlo samples")
     sc_window: Optional[SCWindow] = Field(
         None, description="Optional Safety Car window for reduced pit loss")
+    sc_hazard: Optional[SCHazard] = Field(
+        None, description="Optional stochastic Safety Car risk (instead of sc_window)")
     sc_pit_loss_factor: Optional[float] = Field(
         0.6, ge=0.1, le=1.0, description="Pit loss multiplier during SC (default 0.6 = 40% faster)")
+    seed: Optional[int] = Field(
+        None, ge=0, description="Random seed; same seed and inputs give identical results (default 42)")
+    quantiles: Optional[List[float]] = Field(
+        None, max_items=32, description="Extra per-lap quantiles in [0, 1], e.g. [0.05, 0.95]")
+    histogram_bins: Optional[int] = Field(
+        None, ge=2, le=200, description="Also return a per-lap gap histogram with this many bins")
+
+    @validator("quantiles")
+    def _quantiles_in_range(cls, v):
+        if v is not None and any(not 0.0 <= q <= 1.0 for q in v):
+            raise ValueError("quantiles must be in [0, 1]")
+        return v
 
 
 class CandidateResult(BaseModel):
@@ -41,13 +77,54 @@ class CandidateResult(BaseModel):
     p90_by_lap: List[float]
     p10_by_lap: List[float]
     median_gap_after_5_laps: float
+    p_ahead_by_lap: Optional[List[float]] = Field(
+        None, description="P(gap > 0) per lap, i.e. ahead of the target")
+    quantiles_by_lap: Optional[Dict[str, List[float]]] = Field(
+        None, description="Requested quantiles per lap, keyed by quantile (\"0.05\")")
+    histogram: Optional[dict] = Field(
+        None, description="Per-lap histogram: lo[lap], width[lap], counts[lap][bin]")
     pit_index: Optional[int]
     breakeven_lap: Optional[int] = Field(
         None, description="First lap where gap returns to pre-pit level")
     assumptions: dict
+    sc_breakdown: Optional[List[dict]] = Field(
+        None, description="With sc_hazard: probability and median gap per SC start lap")
 
 
 class SimResponse(BaseModel):
     base_lap: int
     base_target_gap_s: float
+    seed: Optional[int] = None
     candidates: List[CandidateResult]
+    win_probability: Optional[Dict[str, List[List[Optional[float]]]]] = Field(
+        None, description="[i][j] = P(candidate i ends ahead of candidate j), from paired "
+                          "samples: after_5_laps and end_of_window")
+
+
+class Scenario(BaseModel):
+    base_lap: int = Field(..., ge=1)
+    base_target_gap_s: float
+    current_compound: Compound
+    current_tire_age: int = Field(..., ge=0)
+
+
+class ScenarioGrid(BaseModel):
+    """Cartesian spec: every combination of the listed values"""
+    base_lap: List[int] = Field(..., min_items=1)
+    base_target_gap_s: List[float] = Field(..., min_items=1)
+    current_compound: List[Compound] = Field(..., min_items=1)
+    current_tire_age: List[int] = Field(..., min_items=1)
+
+
+class BatchSimRequest(BaseModel):
+    scenarios: Optional[List[Scenario]] = Field(
+        None, description="Explicit starting conditions")
+    grid: Optional[ScenarioGrid] = Field(
+        None, description="Cartesian grid of starting conditions (added to scenarios)")
+    candidates: List[Candidate] = Field(..., min_items=1, max_items=12,
+                                        description="Candidates evaluated for every scenario")
+    mc_samples: Optional[int] = Field(
+        None, ge=10, le=2000, description="Optional override for Monte Carlo samples")
+    sc_window: Optional[SCWindow] = None
+    sc_pit_loss_factor: Optional[float] = Field(0.6, ge=0.1, le=1.0)
+    seed: Optional[int] = Field(None, ge=0)
@@ -0,0 +1,34 @@
+# api/test_batch.py
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+
+
+def test_batch_grid_matches_single_run_sim(monkeypatch):
+    monkeypatch.setenv("DECISION_TABLE", "false")
+    candidates = [{"pit_lap": 12, "compound": "medium"}, {"pit_lap": 14, "compound": "hard"}]
+
+    with TestClient(app) as client:
+        r = client.post("/run_sim/batch", json={
+            "grid": {"base_lap": [10], "current_compound": ["soft"],
+                     "current_tire_age": [4, 9, 14], "base_target_gap_s": [-3.0, 0.0, 3.0]},
+            "scenarios": [{"base_lap": 11, "base_target_gap_s": -1.5,
+                           "current_compound": "medium", "current_tire_age": 6}],
+            "candidates": candidates, "mc_samples": 100})
+        assert r.status_code == 200, r.text
+        data = r.json()
+        assert (data["scenarios"], data["states"], data["rows"]) == (10, 4, 20)
+        cols = data["columns"]
+        assert all(len(v) == 20 for v in cols.values())
+        assert cols["scenario"][:4] == [0, 0, 1, 1]
+        assert cols["base_lap"][:3] == [11, 11, 10]
+        assert cols["pit_lap"][:2] == [12, 14]
+
+        # explicit scenarios come first: scenario 0, second candidate
+        single = client.post("/run_sim", json={
+            "base_lap": 11, "base_target_gap_s": -1.5, "current_compound": "medium",
+            "current_tire_age": 6, "candidates": candidates, "mc_samples": 100}).json()
+        assert cols["median_gap_after_5_laps"][1] == pytest.approx(
+            single["candidates"][1]["median_gap_after_5_laps"])
+
+        assert client.post("/run_sim/batch", json={"candidates": candidates}).status_code == 400
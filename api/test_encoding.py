@@ -0,0 +1,135 @@
+# api/test_encoding.py
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from api.encoding import ARROW, JSON, MSGPACK, negotiate, to_columnar
+from api.schemas import SimResponse
+
+REQ = {"base_lap": 10, "base_target_gap_s": -1.5, "current_compound": "soft",
+       "current_tire_age": 8, "mc_samples": 100,
+       "candidates": [{"pit_lap": 12, "compound": "medium"}, {"pit_lap": 14, "compound": "hard"}]}
+
+
+def test_fast_json_matches_model_and_is_gzipped(monkeypatch):
+    monkeypatch.setenv("DECISION_TABLE", "false")
+    with TestClient(app) as client:
+        r = client.post("/run_sim", json=REQ, headers={"Accept-Encoding": "gzip"})
+        assert r.status_code == 200, r.text
+        assert r.headers["content-encoding"] == "gzip"
+        data = r.json()
+        # same shape and values as validating through the response model
+        assert SimResponse(**data).model_dump() == data
+        assert data["candidates"][0]["sc_breakdown"] is None
+
+        plain = client.post("/run_sim", json=REQ, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.json() == data
+
+
+def test_columnar_layout():
+    out = {"base_lap": 10, "seed": 42, "candidates": [
+        {"candidate": {"pit_lap": 12, "compound": "medium"}, "median_gap_after_5_laps": -1.0,
+         "p10_by_lap": [0.0, 1.0, 2.0], "p50_by_lap": [1.0, 2.0, 3.0],
+         "p90_by_lap": [2.0, 3.0, 4.0], "p_ahead_by_lap": [0.5, 0.6, 0.7],
+         "quantiles_by_lap": {"0.05": [-1.0, 0.0, 1.0]}},
+        {"candidate": {"pit_lap": 14, "compound": "hard"}, "median_gap_after_5_laps": -2.0,
+         "p10_by_lap": [5.0, 6.0, 7.0], "p50_by_lap": [6.0, 7.0, 8.0],
+         "p90_by_lap": [7.0, 8.0, 9.0], "p_ahead_by_lap": [0.1, 0.2, 0.3],
+         "quantiles_by_lap": {"0.05": [4.0, 5.0, 6.0]}}]}
+    meta, cols = to_columnar(out)
+    assert meta["laps"] == 3 and meta["seed"] == 42
+    assert meta["candidates"][1] == {"candidate": {"pit_lap": 14, "compound": "hard"},
+                                     "median_gap_after_5_laps": -2.0}
+    assert cols["candidate"].tolist() == [0, 0, 0, 1, 1, 1]
+    assert cols["lap_index"].tolist() == [0, 1, 2, 0, 1, 2]
+    assert cols["p50_by_lap"].dtype == np.float32
+    assert cols["q0.05"].tolist() == [-1.0, 0.0, 1.0, 4.0, 5.0, 6.0]
+
+    meta, cols = to_columnar({"rows": 2, "columns": {
+        "pit_lap": [12, 14], "compound": ["medium", "hard"], "p10": [-1.5, 0.25]}})
+    assert meta == {"rows": 2}
+    assert cols["pit_lap"].dtype == np.int32 and cols["compound"] == ["medium", "hard"]
+
+
+def test_accept_media_ranges_and_q_values():
+    assert negotiate("") == JSON
+    assert negotiate("text/html,application/xhtml+xml,*/*;q=0.8") == JSON
+    assert negotiate("application/json;q=0.5, application/msgpack") == MSGPACK
+    assert negotiate("application/json, application/x-msgpack") == JSON
+    assert negotiate("application/msgpack;q=0") == JSON  # refusing msgpack is not asking for it
+    assert negotiate("application/*;q=0.9, " + ARROW) == ARROW
+    assert negotiate("application/json;q=0") is None
+
+
+def test_binary_type_without_library_is_not_acceptable(monkeypatch):
+    import api.encoding as encoding
+    monkeypatch.setenv("DECISION_TABLE", "false")
+    monkeypatch.setattr(encoding, "msgpack", None)
+    with TestClient(app) as client:
+        r = client.post("/run_sim", json=REQ, headers={"Accept": "application/msgpack"})
+        assert r.status_code == 406
+        r = client.post("/run_sim", json=REQ, headers={"Accept": "application/json;q=0"})
+        assert r.status_code == 406
+
+
+def _json_result(client):
+    return client.post("/run_sim", json=REQ).json()
+
+
+def test_msgpack_round_trip(monkeypatch):
+    msgpack = pytest.importorskip("msgpack")
+    monkeypatch.setenv("DECISION_TABLE", "false")
+    with TestClient(app) as client:
+        r = client.post("/run_sim", json=REQ, headers={"Accept": MSGPACK})
+        assert r.status_code == 200, r.text
+        assert r.headers["content-type"] == MSGPACK
+        body = msgpack.unpackb(r.content, raw=False)
+        data = _json_result(client)
+
+    meta, cols = body["meta"], body["columns"]
+    T = meta["laps"]
+    assert meta["seed"] == data["seed"] and meta["win_probability"] == data["win_probability"]
+    assert [c["candidate"] for c in meta["candidates"]] == [c["candidate"] for c in data["candidates"]]
+    assert "p50_by_lap" not in meta["candidates"][0]
+
+    def column(name):
+        col = cols[name]
+        return np.frombuffer(col["data"], dtype=col["dtype"]).reshape(col["shape"])
+
+    assert column("candidate").tolist() == [0] * T + [1] * T
+    for i, c in enumerate(data["candidates"]):
+        np.testing.assert_allclose(column("p50_by_lap")[i * T:(i + 1) * T], c["p50_by_lap"],
+                                   rtol=1e-6, atol=1e-5)
+
+
+def test_arrow_round_trip(monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    import json
+    monkeypatch.setenv("DECISION_TABLE", "false")
+    with TestClient(app) as client:
+        r = client.post("/run_sim", json=REQ, headers={"Accept": ARROW})
+        assert r.status_code == 200, r.text
+        assert r.headers["content-type"] == ARROW
+        table = pa.ipc.open_stream(r.content).read_all()
+        data = _json_result(client)
+
+        batch = client.post("/run_sim/batch", headers={"Accept": ARROW}, json={
+            "grid": {"base_lap": [10], "current_compound": ["soft"],
+                     "current_tire_age": [4, 9], "base_target_gap_s": [0.0]},
+            "candidates": REQ["candidates"], "mc_samples": 100})
+        assert batch.status_code == 200, batch.text
+        rows = pa.ipc.open_stream(batch.content).read_all()
+
+    meta = json.loads(table.schema.metadata[b"meta"])
+    T = meta["laps"]
+    assert table.num_rows == 2 * T
+    assert table.schema.field("p90_by_lap").type == pa.float32()
+    np.testing.assert_allclose(table.column("p90_by_lap").to_numpy()[T:],
+                               data["candidates"][1]["p90_by_lap"], rtol=1e-6, atol=1e-5)
+    assert meta["candidates"][1]["median_gap_after_5_laps"] == \
+        data["candidates"][1]["median_gap_after_5_laps"]
+
+    assert rows.num_rows == 4
+    assert rows.column("compound").to_pylist() == ["medium", "hard"] * 2
+    assert json.loads(rows.schema.metadata[b"meta"])["rows"] == 4
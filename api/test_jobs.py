@@ -0,0 +1,126 @@
+# api/test_jobs.py
+import threading
+import time
+from fastapi.testclient import TestClient
+from api.main import app
+from api.jobs import JobManager
+
+TOOL_ARGS = {
+    "base_lap": 10,
+    "base_target_gap_s": -1.5,
+    "current_compound": "soft",
+    "current_tire_age": 8,
+    "candidates": [
+        {"pit_lap": 12, "compound": "medium"},
+        {"pit_lap": 14, "compound": "hard"}
+    ],
+}
+
+
+def test_burst_job_runs_in_process_and_persists(tmp_path, monkeypatch):
+    import api.main as main
+    monkeypatch.setattr(main, "JOBS", JobManager(root=tmp_path))
+
+    with TestClient(app) as client:
+        r = client.post("/jobs/burst", json={"tool_args": TOOL_ARGS, "mc_samples": 100})
+        assert r.status_code == 202, r.text
+        job_id = r.json()["job_id"]
+
+        events = client.get(f"/jobs/{job_id}/events").text
+        assert "event: done" in events
+
+        job = client.get(f"/jobs/{job_id}").json()
+        assert job["status"] == "succeeded"
+        assert job["progress"] == 1.0
+        assert job["result"]["data"]["mc_samples"] == 100
+        assert len(job["result"]["sim_result"]["candidates"]) == 2
+
+    assert (tmp_path / job_id / "job.json").exists()
+    # persisted results are still served by a fresh manager (e.g. after restart)
+    assert JobManager(root=tmp_path).get(job_id).status == "succeeded"
+
+
+def test_running_job_can_be_cancelled(tmp_path):
+    jobs = JobManager(max_workers=1, root=tmp_path)
+    started = threading.Event()
+
+    def slow(job):
+        started.set()
+        while True:
+            job.check_cancelled()
+            time.sleep(0.01)
+
+    running = jobs.submit("burst", slow)
+    queued = jobs.submit("burst", slow)
+    started.wait(2)
+    jobs.cancel(queued.id)
+    jobs.cancel(running.id)
+
+    assert jobs.wait(running.id, timeout=2).status == "cancelled"
+    assert jobs.get(queued.id).status == "cancelled"
+
+
+def test_finished_jobs_are_evicted_but_still_readable(tmp_path):
+    jobs = JobManager(max_workers=1, root=tmp_path, max_finished=2)
+    done = [jobs.submit("burst", lambda job, i=i: {"i": i}) for i in range(4)]
+    for job in done:
+        job.future.result(timeout=2)  # persisted and evicted by now
+    assert [j.status for j in done] == ["succeeded"] * 4
+
+    assert sorted(j.id for j in jobs.list()) == sorted(j.id for j in done[2:])
+    reloaded = jobs.get(done[0].id)  # evicted from memory, reloaded from job.json
+    assert reloaded is not done[0] and reloaded.result == {"i": 0}
+
+    assert jobs.get("../../etc") is None
+    assert jobs.get(done[0].id.upper()) is None
+
+
+def test_listing_is_safe_while_jobs_finish(tmp_path):
+    jobs = JobManager(max_workers=4, root=tmp_path, max_finished=1)
+    submitted = [jobs.submit("burst", lambda job: None) for _ in range(100)]
+    while not all(j.future.done() for j in submitted):
+        jobs.list()  # eviction on worker threads must not break iteration
+        jobs.get(submitted[-1].id)
+    assert len(jobs.list()) <= 1
+
+
+FAKE_DOCKER = """#!/usr/bin/env python3
+import json, os, sys, time
+args = sys.argv[1:]
+env = dict(a.split("=", 1) for a in args[args.index("run") + 1:] if "=" in a)
+time.sleep(0.5)
+with open(os.path.join(env["ARTIFACTS_DIR"], "sim_burst.json"), "w") as f:
+    json.dump({"job_id": env["JOB_ID"], "tool_args": json.load(open(env["TOOL_ARGS_PATH"]))}, f)
+"""
+
+
+def test_concurrent_mcp_bursts_use_isolated_artifacts(tmp_path, monkeypatch):
+    import api.main as main
+    from concurrent.futures import ThreadPoolExecutor
+
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    docker = bin_dir / "docker"
+    docker.write_text(FAKE_DOCKER)
+    docker.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{main.os.environ['PATH']}")
+    monkeypatch.setenv("ENABLE_MCP", "true")
+    monkeypatch.setenv("PROJECT_ROOT", str(tmp_path))
+    monkeypatch.setattr(main, "JOBS", JobManager(
+        max_workers=2, root=tmp_path / "artifacts" / "jobs"))
+
+    def trigger(gap):
+        req = main.MCPTriggerRequest(
+            action="burst", tool_args={**TOOL_ARGS, "base_target_gap_s": gap})
+        return main.mcp_trigger(req)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        a, b = pool.map(trigger, [-1.0, 2.0])
+    elapsed = time.perf_counter() - t0
+
+    assert elapsed < 1.0  # both containers ran at the same time
+    assert a["job_id"] != b["job_id"]
+    assert a["data"]["job_id"] == a["job_id"]
+    assert a["data"]["tool_args"]["base_target_gap_s"] == -1.0
+    assert b["data"]["tool_args"]["base_target_gap_s"] == 2.0
@@ -0,0 +1,62 @@
+# api/test_live.py
+from fastapi.testclient import TestClient
+from api.main import app
+
+RACE = {
+    "base_lap": 10,
+    "base_target_gap_s": -1.5,
+    "current_compound": "soft",
+    "current_tire_age": 8,
+    "candidates": [{"pit_lap": 11, "compound": "medium"},
+                   {"pit_lap": 14, "compound": "hard"}],
+    "mc_samples": 100,
+}
+
+
+def test_laps_resimulate_the_suffix_and_reach_every_subscriber(monkeypatch):
+    monkeypatch.setenv("DECISION_TABLE", "false")
+    with TestClient(app) as client:
+        created = client.post("/live/races", json=RACE).json()
+        race_id = created["race_id"]
+        assert created["horizon_laps"] == 11
+
+        with client.websocket_connect(f"/live/races/{race_id}/ws") as a, \
+                client.websocket_connect(f"/live/races/{race_id}/ws") as b:
+            assert a.receive_json()["version"] == 0
+            assert b.receive_json()["version"] == 0
+
+            # lap 10 over the socket, a bit slower than base pace
+            a.send_json({"lap": 10, "lap_time_s": 95.0, "compound": "soft", "gap_s": -1.2})
+            for ws in (a, b):
+                update = ws.receive_json()
+                assert update["version"] == 1
+                assert update["horizon_laps"] == 10
+                assert update["state"]["current_tire_age"] == 9
+                assert update["state"]["pace_offset_s"] != 0
+
+            # lap 11 over HTTP: the pit stop onto mediums
+            r = client.post(f"/live/races/{race_id}/laps",
+                            json={"lap": 11, "lap_time_s": 116.0, "compound": "medium",
+                                  "gap_s": -20.0})
+            assert r.status_code == 200
+            for ws in (a, b):
+                update = ws.receive_json()
+                assert update["state"]["current_compound"] == "medium"
+                assert update["state"]["current_tire_age"] == 1
+                assert update["state"]["candidates"] == []
+                assert len(update["sim_result"]["candidates"][0]["p50_by_lap"]) == 9
+
+            a.send_json({"lap": 15, "lap_time_s": 95.0, "compound": "medium", "gap_s": 0})
+            assert a.receive_json()["event"] == "error"
+
+            # malformed frames are answered, not fatal to the socket
+            for frame in ("not json", "[1, 2]"):
+                a.send_text(frame)
+                assert a.receive_json()["event"] == "error"
+            a.send_json({"lap": 12, "lap_time_s": 96.0, "compound": "medium", "gap_s": -19.5})
+            assert a.receive_json()["version"] == 3
+            assert b.receive_json()["version"] == 3
+
+        assert client.get(f"/live/races/{race_id}").json()["state"]["laps_ingested"] == 3
+        assert client.post(f"/live/races/{race_id}/laps", json={
+            "lap": 99, "lap_time_s": 95.0, "compound": "medium", "gap_s": 0}).status_code == 409
@@ -0,0 +1,62 @@
+# api/test_lookup.py
+from fastapi.testclient import TestClient
+from api.main import app
+from sim.lookup import DecisionGrid, DecisionTable
+
+
+def test_lookup_uses_table_and_falls_back_to_simulation(monkeypatch):
+    import api.main as main
+    monkeypatch.setenv("DECISION_TABLE", "false")
+
+    with TestClient(app) as client:
+        monkeypatch.setattr(main, "DECISION_TABLE", DecisionTable.build(
+            main.DF, DecisionGrid(mc_samples=50, pit_horizon=3)))
+        params = {"lap": 10, "compound": "soft", "tire_age": 9, "gap": -1.5, "top": 3}
+        r = client.get("/lookup", params=params)
+        assert r.status_code == 200, r.text
+        data = r.json()
+        assert data["source"] == "table"
+        assert len(data["options"]) == 3
+        assert data["best"] == data["options"][0]
+
+        r = client.get("/lookup", params={**params, "tire_age": 35})
+        assert r.json()["source"] == "simulate"
+        assert r.json()["best"]["pit_lap"] >= 10
+
+        assert client.get("/lookup", params={**params, "compound": "wet"}).status_code == 400
+
+        # the fallback validates the lap instead of failing inside the simulation
+        assert client.get("/lookup", params={**params, "lap": 0}).status_code == 422
+        last_lap = int(main.DF["lap"].max())
+        assert client.get("/lookup", params={**params, "lap": last_lap + 1}).status_code == 400
+        r = client.get("/lookup", params={**params, "lap": last_lap - 2, "tire_age": 40})
+        assert r.status_code == 200, r.text
+        assert r.json()["source"] == "simulate"
+
+
+def test_lookup_fallback_shares_the_run_sim_cache(monkeypatch):
+    import api.main as main
+    from types import SimpleNamespace
+    monkeypatch.setenv("DECISION_TABLE", "false")
+
+    with TestClient(app) as client:
+        # a table that never covers the query, with a one-lap pit horizon (6 candidates)
+        monkeypatch.setattr(main, "DECISION_TABLE", SimpleNamespace(
+            grid=SimpleNamespace(pit_horizon=1), lookup=lambda *a, **k: None))
+        lap = int(main.DF["lap"].max()) - 3
+        r = client.get("/lookup", params={"lap": lap, "compound": "soft", "tire_age": 9,
+                                          "gap": -1.5, "top": 6})
+        assert r.status_code == 200, r.text
+
+        hits = main._cached_simulate.cache_info().hits
+        r = client.post("/run_sim", json={
+            "base_lap": lap, "base_target_gap_s": -1.5, "current_compound": "soft",
+            "current_tire_age": 9,
+            "candidates": [{"pit_lap": p, "compound": c} for p in (lap, lap + 1)
+                           for c in ("soft", "medium", "hard")]})
+        assert r.status_code == 200, r.text
+        assert main._cached_simulate.cache_info().hits == hits + 1
+        best = max(r.json()["candidates"], key=lambda c: c["median_gap_after_5_laps"])
+        assert best["median_gap_after_5_laps"] == \
+            client.get("/lookup", params={"lap": lap, "compound": "soft", "tire_age": 9,
+                                          "gap": -1.5}).json()["best"]["median_gap_after_5_laps"]
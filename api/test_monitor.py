@@ -0,0 +1,84 @@
+# api/test_monitor.py
+import threading
+from fastapi.testclient import TestClient
+from api.main import app
+from api.monitor import DockerSampler, LogHub
+
+FAKE_DOCKER = """#!/usr/bin/env python3
+import json, os, sys, time
+args = sys.argv[1:]
+with open(os.environ["FAKE_DOCKER_CALLS"], "a") as f:
+    f.write(" ".join(args) + "\\n")
+if args[:2] == ["compose", "ps"]:
+    print(json.dumps({"Service": "api", "State": "running"}))
+elif args[:1] == ["stats"]:
+    print(json.dumps({"Name": "pitstop-api", "CPUPerc": "1.5%"}))
+elif args[:2] == ["compose", "logs"]:
+    for i in range(3):
+        print(f"{args[-1]} line {i}", flush=True)
+    time.sleep(1.0)
+"""
+
+
+def _fake_docker(tmp_path, monkeypatch):
+    import api.main as main
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    docker = bin_dir / "docker"
+    docker.write_text(FAKE_DOCKER)
+    docker.chmod(0o755)
+    calls = tmp_path / "calls.txt"
+    calls.touch()
+    monkeypatch.setenv("PATH", f"{bin_dir}:{main.os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_DOCKER_CALLS", str(calls))
+    monkeypatch.setenv("ENABLE_MCP", "true")
+    return calls
+
+
+def test_status_polls_read_the_sampled_snapshot(tmp_path, monkeypatch):
+    import api.main as main
+    calls = _fake_docker(tmp_path, monkeypatch)
+    sampler = DockerSampler(main.find_docker_command, interval_s=60)
+    monkeypatch.setattr(main, "DOCKER_SAMPLER", sampler)
+    client = TestClient(app)
+
+    try:
+        statuses = [client.get("/mcp/status").json() for _ in range(10)]
+    finally:
+        sampler.stop()
+
+    assert statuses[-1]["status"] == "ok"
+    assert statuses[-1]["containers"] == [{"Service": "api", "State": "running"}]
+    assert statuses[-1]["stats"][0]["CPUPerc"] == "1.5%"
+    # ten polls, one ps + one stats
+    assert sampler.samples == 1
+    assert len(calls.read_text().splitlines()) == 2
+
+
+def test_log_readers_share_one_tail(tmp_path, monkeypatch):
+    import api.main as main
+    calls = _fake_docker(tmp_path, monkeypatch)
+    hub = LogHub(main.find_docker_command, linger_s=5)
+    monkeypatch.setattr(main, "DOCKER_LOGS", hub)
+    client = TestClient(app)
+    streams = []
+
+    def read_stream():
+        streams.append(client.get("/mcp/logs/reporter/stream").text)
+
+    readers = [threading.Thread(target=read_stream) for _ in range(3)]
+    for t in readers:
+        t.start()
+    logs = client.get("/mcp/logs/reporter", params={"tail": 2}).json()
+    for t in readers:
+        t.join(5)
+
+    assert 1 <= len(logs["logs"].splitlines()) <= 2
+    assert logs["logs"].startswith("reporter line")
+    assert len(streams) == 3
+    for text in streams:
+        assert text.count("event: log") == 3
+        assert text.endswith("event: end\ndata: {}\n\n")
+    assert hub.started == 1
+    assert sum("logs" in c for c in calls.read_text().splitlines()) == 1
+    assert client.get("/mcp/logs/nope").status_code == 400
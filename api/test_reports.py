@@ -0,0 +1,53 @@
+# api/test_reports.py
+from fastapi.testclient import TestClient
+from api.main import app
+from api.reports import ReportCache
+
+REQ = {
+    "action": "report",
+    "tool_args": {"base_lap": 8, "base_target_gap_s": 0.5, "current_compound": "medium",
+                  "current_tire_age": 10, "candidates": [{"pit_lap": 12, "compound": "hard"}]},
+    "sim_result": {"candidates": [{"candidate": {"pit_lap": 12, "compound": "hard"},
+                                   "median_gap_after_5_laps": 1.24}]},
+    "explanation": {"rationale": ["Hards hold pace to the flag"]},
+}
+
+
+def test_repeat_reports_are_served_from_hash_cache(tmp_path, monkeypatch):
+    import api.main as main
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ENABLE_MCP", "true")
+    monkeypatch.setattr(main, "REPORTS", ReportCache())
+    client = TestClient(app)
+
+    first = client.post("/mcp/trigger", json=REQ).json()
+    second = client.post("/mcp/trigger", json=REQ).json()
+    assert first["cached"] is False and second["cached"] is True
+    assert first["artifact"]["filename"] == second["artifact"]["filename"]
+
+    changed = client.post("/mcp/trigger", json={**REQ, "explanation": None}).json()
+    assert changed["artifact"]["filename"] != first["artifact"]["filename"]
+
+    r = client.get(first["artifact"]["path"])
+    assert r.status_code == 200
+    assert "Pit Lap 12 (HARD)" in r.text
+    assert r.headers["etag"] == first["artifact"]["etag"]
+    assert "immutable" in r.headers["cache-control"]
+    etag = r.headers["etag"]
+
+    r = client.get(first["artifact"]["path"], headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    r = client.get(first["artifact"]["path"],
+                   headers={"If-None-Match": f'"other", W/{etag}'})
+    assert r.status_code == 304
+    # a tag that merely contains the ETag is not a match
+    r = client.get(first["artifact"]["path"], headers={"If-None-Match": f'"v{etag}"'})
+    assert r.status_code == 200
+    assert not main.REPORTS._key_locks  # per-key locks dropped after each build
+
+    # files that are not content-addressed are revalidated, never immutable
+    (tmp_path / "reports" / "latest.json").write_text("{}")
+    r = client.get("/reports/latest.json")
+    assert r.headers["cache-control"] == "no-cache"
+    assert client.get("/reports/latest.json",
+                      headers={"If-None-Match": r.headers["etag"]}).status_code == 304
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_encoding.py
+Benchmark /run_sim response encoding: pydantic re-validation + JSON (the old
+path) against the shaped-once fast path (orjson / json) and the columnar
+msgpack / Arrow formats when those libraries are installed. Reports encode time
+and payload size, raw and gzipped.
+
+    python scripts/bench_encoding.py [--data data/synth_race.csv] [--candidates 6] [--repeat 200]
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api import encoding  # noqa: E402
+from api.schemas import SimResponse  # noqa: E402
+from sim.core import SimConfig, Strategy, simulate, simulate_batch  # noqa: E402
+
+
+def _time(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        body = fn()
+    return (time.perf_counter() - t0) / repeat, body
+
+
+def bench(name, payload, encoders, repeat):
+    rows = []
+    for label, fn in encoders:
+        seconds, body = _time(lambda: fn(payload), repeat)
+        rows.append({
+            "payload": name,
+            "encoding": label,
+            "encode_us": round(seconds * 1e6, 1),
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body, compresslevel=5)),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default="data/synth_race.csv")
+    parser.add_argument("--candidates", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=200)
+    opts = parser.parse_args()
+
+    df = pd.read_csv(opts.data)
+    first = int(df["lap"].min())
+    cands = [Strategy(first + 2 + i, ("soft", "medium", "hard")[i % 3])
+             for i in range(opts.candidates)]
+    sim = simulate(df, "soft", 8, -1.5, first, cands, cfg=SimConfig(mc_samples=400),
+                   quantiles=[0.05, 0.95])
+    grid = [{"base_lap": first, "current_compound": "soft", "current_tire_age": a,
+             "base_target_gap_s": g / 2} for a in range(4, 15) for g in range(-6, 7)]
+    batch = simulate_batch(df, grid, cands)
+
+    def old_path(out):
+        # what FastAPI did before: validate into the model, dump, then json.dumps
+        return json.dumps(SimResponse(**out).model_dump()).encode()
+
+    sim_encoders = [("pydantic+json", old_path),
+                    ("shaped+json", lambda o: json.dumps(encoding.conform(o, SimResponse)).encode())]
+    batch_encoders = [("json", lambda o: json.dumps(o).encode())]
+    if encoding.orjson is not None:
+        sim_encoders.append(("shaped+orjson",
+                             lambda o: encoding.dumps_json(encoding.conform(o, SimResponse))))
+        batch_encoders.append(("orjson", encoding.dumps_json))
+    for label, lib, fn in (("msgpack", encoding.msgpack, encoding.dumps_msgpack),
+                           ("arrow", encoding.pa, encoding.dumps_arrow)):
+        if lib is not None:
+            sim_encoders.append((label, fn))
+            batch_encoders.append((label, fn))
+        else:
+            print(f'⚠️  {label} not installed - skipped')
+
+    rows = (bench(f"run_sim ({opts.candidates} candidates)", sim, sim_encoders, opts.repeat)
+            + bench(f"batch ({batch['rows']} rows)", batch, batch_encoders, opts.repeat))
+    print('📊 Results:')
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_surrogate.py
+Benchmark the learned surrogate against simulate(): train time, accuracy on
+unseen race states, error-bar coverage and per-candidate speedup.
+
+    python scripts/bench_surrogate.py [--data data/synth_race.csv] [--states 400] [--test 60]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sim.core import SimConfig, Strategy, simulate  # noqa: E402
+from sim.surrogate import COMPOUNDS, Surrogate, SurrogateConfig  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default="data/synth_race.csv")
+    parser.add_argument("--states", type=int, default=400)
+    parser.add_argument("--test", type=int, default=60, help="unseen states to evaluate")
+    parser.add_argument("--seed", type=int, default=7)
+    opts = parser.parse_args()
+
+    df = pd.read_csv(opts.data)
+    cfg = SurrogateConfig(states=opts.states)
+    print(f'🧠 Training surrogate on {opts.data} ({opts.states} states)...')
+    model = Surrogate.train(df, cfg)
+    print(f'✅ Trained in {model.report["train_s"]}s '
+          f'(simulation {model.report["simulate_s"]}s, {model.report["rows"]} rows)')
+
+    rng = np.random.default_rng(opts.seed)
+    first, last = model.first_lap, model.last_lap
+    errors, covered, t_pred, t_sim, n_cands = [], 0, 0.0, 0.0, 0
+    for _ in range(opts.test):
+        lap = int(rng.integers(first, last + 1))
+        current = COMPOUNDS[int(rng.integers(3))]
+        age = int(rng.integers(0, cfg.max_age + 1))
+        gap = float(rng.normal(0, 3))
+        cands = [Strategy(p, c) for p in range(lap, min(lap + cfg.pit_horizon, last) + 1)
+                 for c in COMPOUNDS]
+
+        t0 = time.perf_counter()
+        preds = model.predict(df, lap, current, age, gap, cands)
+        t_pred += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        sim = simulate(df, current, age, gap, lap, cands,
+                       cfg=SimConfig(mc_samples=cfg.mc_samples), seed=cfg.seed)
+        t_sim += time.perf_counter() - t0
+
+        for p, s in zip(preds, sim["candidates"]):
+            err = abs(p["median_gap_after_5_laps"] - s["median_gap_after_5_laps"])
+            errors.append(err)
+            covered += err <= p["error_s"]
+        n_cands += len(cands)
+
+    errors = np.array(errors)
+    result = {
+        "train_s": model.report["train_s"],
+        "calibrated_error_s": model.report["error_s"][0],
+        "test_candidates": n_cands,
+        "mae_s": round(float(errors.mean()), 4),
+        "p95_error_s": round(float(np.quantile(errors, 0.95)), 4),
+        "max_error_s": round(float(errors.max()), 4),
+        "coverage": round(covered / n_cands, 3),
+        "surrogate_us_per_candidate": round(t_pred / n_cands * 1e6, 1),
+        "simulate_us_per_candidate": round(t_sim / n_cands * 1e6, 1),
+        "speedup": round(t_sim / t_pred, 1),
+    }
+    print('📊 Results:')
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -12,11 +12,15 @@ import requests
 from pathlib import Path
 
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
-TOOL_ARGS_PATH = os.getenv('TOOL_ARGS_PATH', './artifacts/tool_args.json')
-OUTPUT_PATH = './artifacts/sim_burst.json'
+# Job-scoped artifacts (artifacts/jobs/<JOB_ID>/) when launched by the API job scheduler
+JOB_ID = os.getenv('JOB_ID', '')
+ARTIFACTS_DIR = os.getenv('ARTIFACTS_DIR', './artifacts')
+TOOL_ARGS_PATH = os.getenv('TOOL_ARGS_PATH', f'{ARTIFACTS_DIR}/tool_args.json')
+OUTPUT_PATH = os.getenv('OUTPUT_PATH', f'{ARTIFACTS_DIR}/sim_burst.json')
 
 print('🎲 PitStop AI Burst Simulation - High Accuracy Mode')
 print(f'   API: {API_BASE_URL}')
+print(f'   Job: {JOB_ID or "(none)"}')
 print(f'   Tool args: {TOOL_ARGS_PATH}')
 
 
@@ -43,7 +47,8 @@ def main():
         url = f'{API_BASE_URL}/run_sim'
         print(f'🔗 Calling: {url}')
 
-        response = requests.post(url, json=tool_args, timeout=120)
+        response = requests.post(url, json=tool_args, timeout=120,
+                                 headers={'X-Sim-Priority': 'bulk'})
         response.raise_for_status()
 
         sim_result = response.json()
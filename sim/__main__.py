@@ -0,0 +1,76 @@
+# sim/__main__.py
+"""
+Offline simulation CLI.
+
+    python -m sim run scenarios.jsonl -o results.npz [--workers 8] [--chunk-size 64]
+    python -m sim run grid.csv -o results.parquet --candidates "12:medium;14:hard"
+    python -m sim backtest archive/ -o backtest/ [--workers 8] [--every 2] [--no-resume]
+"""
+
+import argparse
+import json
+import sys
+
+from sim.backtest import BacktestConfig, run_backtest
+from sim.offline import parse_candidates, print_progress, read_scenarios, run_offline
+
+
+def _run(opts):
+    scenarios = read_scenarios(
+        opts.scenarios, parse_candidates(opts.candidates) if opts.candidates else None)
+    print(f"🎲 Simulating {opts.scenarios} with {opts.data} -> {opts.output}", file=sys.stderr)
+    summary = run_offline(scenarios, opts.data, opts.output, workers=opts.workers,
+                          chunk_size=opts.chunk_size,
+                          progress=None if opts.quiet else print_progress)
+    if not opts.quiet:
+        print(file=sys.stderr)
+    print(json.dumps(summary))
+
+
+def _backtest(opts):
+    cfg = BacktestConfig(horizon=opts.horizon, every=opts.every, mc_samples=opts.mc_samples,
+                         seed=opts.seed)
+
+    def progress(info):
+        if not opts.quiet:
+            print(f"🏁 {info['race']} ({info['done']}/{info['total']})", file=sys.stderr)
+
+    summary = run_backtest(opts.races, opts.output, cfg, workers=opts.workers,
+                           resume=not opts.no_resume, progress=progress)
+    summary.pop("by_race")
+    print(json.dumps(summary))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sim", description="PitStop AI simulations")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="simulate a scenario file (.jsonl / .csv) in bulk")
+    run.add_argument("scenarios")
+    run.add_argument("-o", "--output", required=True, help=".npz or .parquet")
+    run.add_argument("--data", default="data/synth_race.csv")
+    run.add_argument("--candidates", default=None,
+                     help='candidates for scenarios without any, e.g. "12:medium;14:hard"')
+    run.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    run.add_argument("--chunk-size", type=int, default=64, help="scenarios per task")
+    run.add_argument("--quiet", action="store_true")
+    run.set_defaults(func=_run)
+
+    bt = sub.add_parser("backtest", help="replay archived races and score recommendations")
+    bt.add_argument("races", nargs="+", help="race CSVs or directories of them")
+    bt.add_argument("-o", "--output", required=True, help="directory for checkpoints + summary")
+    bt.add_argument("--horizon", type=int, default=BacktestConfig.horizon)
+    bt.add_argument("--every", type=int, default=BacktestConfig.every)
+    bt.add_argument("--mc-samples", type=int, default=BacktestConfig.mc_samples)
+    bt.add_argument("--seed", type=int, default=BacktestConfig.seed)
+    bt.add_argument("--workers", type=int, default=None, help="processes (default: one per race)")
+    bt.add_argument("--no-resume", action="store_true", help="ignore existing checkpoints")
+    bt.add_argument("--quiet", action="store_true")
+    bt.set_defaults(func=_backtest)
+
+    opts = parser.parse_args(argv)
+    opts.func(opts)
+
+
+if __name__ == "__main__":
+    main()
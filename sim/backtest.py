@@ -0,0 +1,211 @@
+# sim/backtest.py
+"""
+Historical backtests: replay archived races lap by lap and score what PitStop AI
+would have recommended against what actually happened.
+
+A race archive is a directory of race CSVs in the data/synth_race.csv format
+(lap, compound, base_pace_s, stint). An optional `gap_s` column holds the
+observed gap to the target at the end of each lap.
+
+At each decision point (lap L), the state is rebuilt from the laps before L:
+compound, tyre age in the current stint, and the gap. Candidates (stop on each
+of the next `horizon` laps on every compound, stay out, and the stop that
+was actually made) are simulated with simulate(). The explainer's
+deterministic best pick becomes the recommendation. Each decision records:
+- agreement with the actual next stop (pit lap within `pit_tolerance`, same compound)
+- the model's predicted gain of the recommendation over the actual strategy
+- with gap_s: the error of the actual strategy's predicted median against the
+  observed gap, and whether the observation fell inside p10..p90
+
+Races run in parallel across processes. Every finished race is checkpointed to
+<out>/races/<race id>.json together with its BacktestConfig, so an interrupted
+run resumes where it stopped. The race id is the file name plus a hash of its
+full path (same-named races in different directories stay apart), and
+checkpoints written with a different config are recomputed, not merged.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from agent.explainer import explain
+from sim.core import DEFAULT_SEED, SimConfig, Strategy, metric_index, simulate
+
+COMPOUNDS = ("soft", "medium", "hard")
+
+
+@dataclass
+class BacktestConfig:
+    horizon: int = 8          # candidate stops on laps L .. L + horizon
+    every: int = 1            # a decision point every N laps
+    mc_samples: int = 200
+    seed: int = DEFAULT_SEED
+    pit_tolerance: int = 1    # recommendation agrees if within this many laps
+
+
+def race_id(path: str) -> str:
+    """<file stem>-<8 hex of the resolved path>"""
+    digest = hashlib.sha256(str(Path(path).resolve()).encode()).hexdigest()[:8]
+    return f"{Path(path).stem}-{digest}"
+
+
+def _stint_of(df: pd.DataFrame) -> pd.Series:
+    if "stint" in df.columns:
+        return df["stint"]
+    return (df["compound"] != df["compound"].shift()).cumsum()
+
+
+def _next_stop(df: pd.DataFrame, stint: pd.Series, lap: int, current_stint) -> Optional[Strategy]:
+    later = df[(df["lap"] >= lap) & (stint != current_stint)]
+    if later.empty:
+        return None
+    row = later.iloc[0]
+    return Strategy(pit_lap=int(row["lap"]), compound=row["compound"])
+
+
+def backtest_race(path: str, cfg: BacktestConfig) -> Dict[str, Any]:
+    df = pd.read_csv(path).sort_values("lap").reset_index(drop=True)
+    stint = _stint_of(df)
+    first_lap, last_lap = int(df["lap"].iloc[0]), int(df["lap"].iloc[-1])
+    has_gaps = "gap_s" in df.columns
+    sim_cfg = SimConfig(mc_samples=cfg.mc_samples)
+    decisions = []
+
+    for lap in range(first_lap + 1, last_lap, cfg.every):
+        prev = df.index[df["lap"] == lap - 1][0]
+        compound = df.at[prev, "compound"]
+        tire_age = int(((stint == stint[prev]) & (df["lap"] <= lap - 1)).sum())
+        gap = float(df.at[prev, "gap_s"]) if has_gaps else 0.0
+
+        stay_out = Strategy(pit_lap=last_lap + 1, compound=compound)
+        actual = _next_stop(df, stint, lap, stint[prev]) or stay_out
+        candidates = [Strategy(p, c) for p in range(lap, min(lap + cfg.horizon, last_lap) + 1)
+                      for c in COMPOUNDS] + [stay_out]
+        if actual not in candidates:
+            candidates.append(actual)
+
+        sim = simulate(df, compound, tire_age, gap, lap, candidates, cfg=sim_cfg, seed=cfg.seed)
+        tool_args = {"base_lap": lap, "base_target_gap_s": gap, "current_compound": compound,
+                     "current_tire_age": tire_age,
+                     "candidates": [asdict(c) for c in candidates]}
+        rec = sim["candidates"][explain(tool_args, sim).metrics["selected_index"]]
+        act = sim["candidates"][candidates.index(actual)]
+
+        rec_stop = rec["candidate"] if rec["pit_index"] is not None else None
+        act_stop = act["candidate"] if act["pit_index"] is not None else None
+        agree = (rec_stop is None and act_stop is None) or (
+            rec_stop is not None and act_stop is not None
+            and abs(rec_stop["pit_lap"] - act_stop["pit_lap"]) <= cfg.pit_tolerance
+            and rec_stop["compound"] == act_stop["compound"])
+        decision = {
+            "lap": lap,
+            "state": {"compound": compound, "tire_age": tire_age, "gap_s": gap},
+            "recommended": rec_stop,
+            "actual": act_stop,
+            "agree": bool(agree),
+            "pit_lap_error": (abs(rec_stop["pit_lap"] - act_stop["pit_lap"])
+                              if rec_stop and act_stop else None),
+            "predicted_gain_s": rec["median_gap_after_5_laps"] - act["median_gap_after_5_laps"],
+        }
+        if has_gaps:
+            idx = metric_index(act)
+            observed = float(df.loc[df["lap"] == lap + idx, "gap_s"].iloc[0])
+            decision.update({
+                "observed_gap_s": observed,
+                "gap_error_s": act["median_gap_after_5_laps"] - observed,
+                "covered": bool(act["p10_by_lap"][idx] <= observed <= act["p90_by_lap"][idx]),
+            })
+        decisions.append(decision)
+
+    return {"race": race_id(path), "path": str(path), "config": asdict(cfg),
+            "laps": last_lap - first_lap + 1,
+            "decisions": decisions, "summary": aggregate(decisions)}
+
+
+def aggregate(decisions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Accuracy metrics over any set of decisions (one race or the whole archive)"""
+    if not decisions:
+        return {"decisions": 0}
+    pit_errors = [d["pit_lap_error"] for d in decisions if d["pit_lap_error"] is not None]
+    out = {
+        "decisions": len(decisions),
+        "agreement_rate": round(float(np.mean([d["agree"] for d in decisions])), 4),
+        "pit_lap_mae_laps": round(float(np.mean(pit_errors)), 3) if pit_errors else None,
+        "mean_predicted_gain_s": round(float(np.mean(
+            [d["predicted_gain_s"] for d in decisions])), 4),
+    }
+    observed = [d for d in decisions if "gap_error_s" in d]
+    if observed:
+        errors = np.array([d["gap_error_s"] for d in observed])
+        out.update({
+            "gap_mae_s": round(float(np.abs(errors).mean()), 4),
+            "gap_bias_s": round(float(errors.mean()), 4),
+            "p10_p90_coverage": round(float(np.mean([d["covered"] for d in observed])), 4),
+        })
+    return out
+
+
+def _write_json(path: Path, data: Dict[str, Any]):
+    """Atomic write: a checkpoint is either complete or absent"""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    os.replace(tmp, path)
+
+
+def run_backtest(races: List[str], out_dir: str, cfg: Optional[BacktestConfig] = None,
+                 workers: Optional[int] = None, resume: bool = True,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Backtest every race CSV (or every CSV in a directory) into out_dir, skipping races
+    already checkpointed when `resume` is set. Returns (and writes) the archive summary.
+    """
+    cfg = cfg or BacktestConfig()
+    paths = []
+    for r in races:
+        paths += sorted(str(p) for p in Path(r).glob("*.csv")) if Path(r).is_dir() else [r]
+    checkpoints = Path(out_dir) / "races"
+    checkpoints.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    todo = []
+    stale = 0
+    for p in paths:
+        ckpt = checkpoints / f"{race_id(p)}.json"
+        if resume and ckpt.exists():
+            saved = json.loads(ckpt.read_text())
+            if saved.get("config") == asdict(cfg):
+                results[saved["race"]] = saved
+                continue
+            stale += 1  # other horizon / seed / samples: recompute
+        todo.append(p)
+
+    t0 = time.perf_counter()
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers or min(len(todo), os.cpu_count() or 1)) as pool:
+            futures = {pool.submit(backtest_race, p, cfg): p for p in todo}
+            for fut in as_completed(futures):
+                result = fut.result()
+                _write_json(checkpoints / f"{result['race']}.json", result)
+                results[result["race"]] = result
+                if progress:
+                    progress({"race": result["race"], "done": len(results), "total": len(paths)})
+
+    summary = {
+        "races": len(results),
+        "resumed": len(paths) - len(todo),
+        "stale_checkpoints": stale,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+        "config": asdict(cfg),
+        **aggregate([d for r in results.values() for d in r["decisions"]]),
+        "by_race": {name: results[name]["summary"] for name in sorted(results)},
+    }
+    _write_json(Path(out_dir) / "summary.json", summary)
+    return summary
@@ -1,8 +1,12 @@
+from concurrent.futures import Executor, TimeoutError as FuturesTimeout
 from dataclasses import dataclass
-from typing import List, Literal, Dict, Any
+import time
+from typing import List, Literal, Dict, Any, Sequence
 import numpy as np
 import pandas as pd
 
+from sim.sketch import QuantileSketch, lap_histograms
+
 Compound = Literal["soft", "medium", "hard"]
 
 
@@ -28,8 +32,12 @@ class SimConfig:
     deg_med_per_lap: float = 0.10
     deg_hard_start: int = 22
     deg_hard_per_lap: float = 0.08
-    traffic_penalty_s: float = 0.25  # simple penalty when rejoining behind target car
+    traffic_penalty_s: float = 0.25  # per lap stuck behind a slower car (sim.field)
     mc_samples: int = 200
+    # Chunked mode: fold samples into per-lap quantile sketches `chunk_size` at a time
+    # instead of keeping the full (mc_samples, laps) matrix. None = exact quantiles.
+    chunk_size: int | None = None
+    quantile_error_s: float = 0.005  # max abs error of chunked-mode quantiles
 
 
 def _deg_for(compound: Compound, age: int, cfg: SimConfig) -> float:
@@ -40,6 +48,363 @@ def _deg_for(compound: Compound, age: int, cfg: SimConfig) -> float:
     return max(0, age - cfg.deg_hard_start) * cfg.deg_hard_per_lap
 
 
+def _deg_curve(compound: Compound, start_age: int, num_laps: int, cfg: SimConfig) -> np.ndarray:
+    """Vectorised _deg_for over a stint starting at `start_age`"""
+    start, per_lap = {
+        "soft": (cfg.deg_soft_start, cfg.deg_soft_per_lap),
+        "medium": (cfg.deg_med_start, cfg.deg_med_per_lap),
+    }.get(compound, (cfg.deg_hard_start, cfg.deg_hard_per_lap))
+    ages = start_age + np.arange(num_laps)
+    return np.maximum(0, ages - start) * per_lap
+
+
+# ---------------------------------------------------------------------------
+# Random streams
+#
+# Samples are drawn in fixed blocks of RNG_BLOCK. Block b always uses the
+# counter-based Philox generator of SeedSequence(seed).spawn(...)[b], whatever
+# shard, process or node computes it, so results are bit-identical however
+# the blocks are distributed. Every candidate reads the same block streams in
+# the same order (common random numbers), which also makes candidate
+# comparisons less noisy.
+# ---------------------------------------------------------------------------
+
+RNG_BLOCK = 1024
+DEFAULT_SEED = 42
+NOISE_STD_PER_LAP_S = 0.03  # ~30ms per lap noise
+
+
+def block_rng(seed: int, block: int) -> np.random.Generator:
+    """Generator for sample block `block` (same as SeedSequence(seed).spawn(block + 1)[block])"""
+    return np.random.Generator(np.random.Philox(
+        np.random.SeedSequence(seed, spawn_key=(block,))))
+
+
+def n_blocks(mc_samples: int) -> int:
+    return -(-mc_samples // RNG_BLOCK)
+
+
+@dataclass
+class CandidatePlan:
+    """Everything needed to sample one candidate; small and picklable for worker processes"""
+    candidate: Strategy
+    first_lap: int
+    you_mean: np.ndarray     # (T,) base pace + deterministic deg, your car
+    target_mean: np.ndarray  # (T,) base pace + deterministic deg, target car
+    pit_index: int | None
+    pit_loss_mean: float
+    pit_loss_std: float
+    base_target_gap_s: float
+    mc_samples: int
+    chunk_size: int | None
+    quantile_error_s: float
+    # Stochastic Safety Car: per-lap hazard (T,) and duration range; None = no hazard
+    sc_hazard: np.ndarray | None = None
+    sc_min_laps: int = 2
+    sc_max_laps: int = 5
+    sc_pit_loss_factor: float = 1.0
+    # Lap indices at which per-sample gaps are kept for head-to-head comparisons
+    pair_indices: np.ndarray | None = None
+
+    @property
+    def metric_index(self) -> int:
+        """Lap index of median_gap_after_5_laps: 5 laps after the stop (or from now if no pit)"""
+        return _metric_index(self.pit_index, len(self.you_mean))
+
+
+def _metric_index(pit_index: int | None, total_laps: int) -> int:
+    return min(4 if pit_index is None else pit_index + 5, total_laps - 1)
+
+
+def metric_index(candidate: Dict[str, Any]) -> int:
+    """Lap index of median_gap_after_5_laps in a simulate() result candidate"""
+    return _metric_index(candidate["pit_index"], len(candidate["p50_by_lap"]))
+
+
+def _hazard_curve(sc_hazard: Dict[str, Any], total_laps: int) -> np.ndarray:
+    """Per-lap SC hazard; a list gives lap-by-lap rates from base_lap (last one repeats)"""
+    rate = sc_hazard.get("rate_per_lap", 0.0)
+    if np.isscalar(rate):
+        return np.full(total_laps, float(rate))
+    rate = np.asarray(rate, dtype=float)[:total_laps]
+    return np.concatenate([rate, np.full(total_laps - len(rate), rate[-1])])
+
+
+def plan_candidate(laps: pd.DataFrame, cand: Strategy, current_compound: Compound,
+                   current_tire_age: int, base_target_gap_s: float, cfg: SimConfig,
+                   sc_window: Dict[str, int] | None = None,
+                   sc_pit_loss_factor: float = 1.0,
+                   pace_offset_s: float = 0.0,
+                   sc_hazard: Dict[str, Any] | None = None) -> CandidatePlan:
+    total_laps = len(laps)
+    lap_numbers = laps["lap"].values
+    first_lap = int(lap_numbers[0])
+    base = laps["base_pace_s"].values.astype(float)
+
+    # assume pit happens relative to absolute lap number
+    if cand.pit_lap < first_lap or cand.pit_lap > lap_numbers[-1]:
+        # treat as "no pit within window": stay on current compound entire window
+        pit_index = None
+        you_deg = _deg_curve(current_compound, current_tire_age, total_laps, cfg)
+    else:
+        # 0-based index; switch to candidate compound after the stop
+        pit_index = int(cand.pit_lap - first_lap)
+        you_deg = np.concatenate([
+            _deg_curve(current_compound, current_tire_age, pit_index, cfg),
+            _deg_curve(cand.compound, 0, total_laps - pit_index, cfg)])
+
+    # Simple target model: assume target keeps base pace with mild deg on its own medium tires
+    target_base_age = max(0, current_tire_age - 3)  # rough guess
+    target_deg = _deg_curve("medium", target_base_age, total_laps, cfg)
+
+    # pit loss - reduced if pitting during SC
+    factor = 1.0
+    if sc_window and sc_window.get("start_lap", 999) <= cand.pit_lap <= sc_window.get("end_lap", 0):
+        factor = sc_pit_loss_factor
+
+    return CandidatePlan(
+        candidate=cand, first_lap=first_lap,
+        you_mean=base + you_deg + pace_offset_s, target_mean=base + target_deg,
+        pit_index=pit_index,
+        pit_loss_mean=cfg.pit_loss_mean * factor, pit_loss_std=cfg.pit_loss_std * factor,
+        base_target_gap_s=float(base_target_gap_s), mc_samples=cfg.mc_samples,
+        chunk_size=cfg.chunk_size, quantile_error_s=cfg.quantile_error_s,
+        sc_hazard=_hazard_curve(sc_hazard, total_laps) if sc_hazard else None,
+        sc_min_laps=int(sc_hazard.get("min_laps", 2)) if sc_hazard else 2,
+        sc_max_laps=int(sc_hazard.get("max_laps", 5)) if sc_hazard else 5,
+        sc_pit_loss_factor=sc_pit_loss_factor)
+
+
+def block_draws(seed: int, block: int, n: int, T: int, sc_hazard: bool = False):
+    """
+    Raw draws for one RNG block: fixed order and shapes whatever the candidate.
+    SC hazard draws come last, so enabling the hazard leaves the other streams unchanged.
+    """
+    rg = block_rng(seed, block)
+    you_noise = rg.normal(0.0, NOISE_STD_PER_LAP_S, size=(n, T))
+    target_noise = rg.normal(0.0, NOISE_STD_PER_LAP_S, size=(n, T))
+    pit_z = rg.standard_normal(n)
+    if not sc_hazard:
+        return you_noise, target_noise, pit_z
+    return you_noise, target_noise, pit_z, rg.random((n, T)), rg.random(n)
+
+
+def sc_paths(plan: CandidatePlan, draws):
+    """Per-path SC (start, end) lap indices, end exclusive; start == T means no SC"""
+    sc_u, dur_u = draws[3], draws[4]
+    T = len(plan.you_mean)
+    hits = sc_u < plan.sc_hazard
+    start = np.where(hits.any(axis=1), hits.argmax(axis=1), T)
+    duration = plan.sc_min_laps + np.floor(
+        dur_u * (plan.sc_max_laps - plan.sc_min_laps + 1)).astype(int)
+    return start, np.minimum(start + duration, T)
+
+
+def gaps_from_draws(plan: CandidatePlan, draws) -> np.ndarray:
+    """(n, T) gap trajectories; the gap is "you − target" (negative = behind)"""
+    you_noise, target_noise, pit_z = draws[:3]
+    you = plan.you_mean + you_noise
+    target = plan.target_mean + target_noise
+    # if target faster, your gap becomes more negative
+    delta = target - you
+    pit_loss = plan.pit_loss_mean + plan.pit_loss_std * pit_z
+    if plan.sc_hazard is not None:
+        start, end = sc_paths(plan, draws)
+        laps = np.arange(delta.shape[1])
+        # neutralised laps: both cars follow the SC, no relative pace change
+        delta[(laps >= start[:, None]) & (laps < end[:, None])] = 0.0
+        if plan.pit_index is not None:
+            under_sc = (start <= plan.pit_index) & (plan.pit_index < end)
+            pit_loss = np.where(under_sc, pit_loss * plan.sc_pit_loss_factor, pit_loss)
+    gap = np.cumsum(delta, axis=1)
+    if plan.pit_index is not None:
+        gap[:, plan.pit_index:] -= pit_loss[:, None]
+    # Start from base_target_gap_s
+    return gap + plan.base_target_gap_s
+
+
+@dataclass
+class Partial:
+    """simulate_blocks() output for a set of blocks"""
+    gaps: Any                            # (n, T) array, or a QuantileSketch in chunked mode
+    sc_start: np.ndarray | None = None   # (n,) SC start index per path (SC hazard only)
+    metric: np.ndarray | None = None     # (n,) gap at the metric lap per path (SC hazard only)
+    ahead: np.ndarray | None = None      # (T,) number of paths with gap > 0 per lap
+    paired: np.ndarray | None = None     # (n, len(pair_indices)) gaps at the comparison laps
+
+
+def simulate_blocks(plan: CandidatePlan, seed: int, blocks: Sequence[int]) -> Partial:
+    """
+    Partial result for a set of blocks: the raw (n, T) gaps, or a QuantileSketch in chunked
+    mode. Partials of disjoint blocks combine with merge_partials().
+    """
+    T = len(plan.you_mean)
+    hazard = plan.sc_hazard is not None
+    sketch = QuantileSketch(T, plan.quantile_error_s) if plan.chunk_size else None
+    kept, pending, rows, starts, metrics, paired = [], [], 0, [], [], []
+    ahead = np.zeros(T, dtype=np.int64)
+    for b in blocks:
+        n = min(RNG_BLOCK, plan.mc_samples - b * RNG_BLOCK)
+        draws = block_draws(seed, b, n, T, hazard)
+        gaps = gaps_from_draws(plan, draws)
+        ahead += np.count_nonzero(gaps > 0, axis=0)
+        if plan.pair_indices is not None:
+            paired.append(gaps[:, plan.pair_indices])
+        if hazard:
+            starts.append(sc_paths(plan, draws)[0])
+            metrics.append(gaps[:, plan.metric_index])
+        if sketch is None:
+            kept.append(gaps)
+            continue
+        pending.append(gaps)
+        rows += len(gaps)
+        if rows >= plan.chunk_size:
+            sketch.update(np.vstack(pending))
+            pending, rows = [], 0
+    if sketch is not None and pending:
+        sketch.update(np.vstack(pending))
+    return Partial(
+        gaps=sketch if sketch is not None else np.vstack(kept),
+        sc_start=np.concatenate(starts) if hazard else None,
+        metric=np.concatenate(metrics) if hazard else None,
+        ahead=ahead,
+        paired=np.vstack(paired) if paired else None)
+
+
+def merge_partials(partials: List[Partial]) -> Partial:
+    """Combine partials in block order (sketch merges are order-independent anyway)"""
+    if isinstance(partials[0].gaps, QuantileSketch):
+        gaps = partials[0].gaps
+        for other in partials[1:]:
+            gaps.merge(other.gaps)
+    else:
+        gaps = np.vstack([p.gaps for p in partials])
+
+    def concat(name):
+        parts = [getattr(p, name) for p in partials]
+        return None if parts[0] is None else np.concatenate(parts)
+
+    return Partial(gaps, sc_start=concat("sc_start"), metric=concat("metric"),
+                   ahead=sum(p.ahead for p in partials), paired=concat("paired"))
+
+
+def _win_fraction(a: np.ndarray, b: np.ndarray, max_cells: int = 1 << 24) -> np.ndarray:
+    """(A, B) fraction of paired samples where a[i] > b[j]; a: (A, n), b: (B, n)"""
+    n = a.shape[1]
+    step = max(1, max_cells // max(1, a.shape[0] * b.shape[0]))
+    wins = np.zeros((a.shape[0], b.shape[0]), dtype=np.int64)
+    for s in range(0, n, step):
+        wins += (a[:, None, s:s + step] > b[None, :, s:s + step]).sum(axis=2)
+    return wins / n
+
+
+def win_probabilities(plans: List[CandidatePlan], merged: List[Partial]) -> Dict[str, Any]:
+    """
+    P(candidate i ends ahead of candidate j) from paired samples (every candidate reads the
+    same random streams). "after_5_laps" compares both at the later of their metric laps,
+    "end_of_window" at the last lap. Entry [i][j]; the diagonal is None.
+    """
+    pos = {int(k): c for c, k in enumerate(plans[0].pair_indices)}
+    last = len(plans[0].you_mean) - 1
+    C = len(plans)
+    paired = np.stack([m.paired for m in merged])  # (C, n, len(pair_indices))
+    metric = np.array([p.metric_index for p in plans])
+
+    after_5 = np.empty((C, C))
+    for lap in np.unique(metric):
+        # pairs whose later metric lap is `lap`: rows at `lap` against everyone at or before it
+        rows, cols = np.flatnonzero(metric == lap), np.flatnonzero(metric <= lap)
+        at = paired[:, :, pos[int(lap)]]
+        after_5[np.ix_(rows, cols)] = _win_fraction(at[rows], at[cols])
+        after_5[np.ix_(cols, rows)] = _win_fraction(at[cols], at[rows])
+    at = paired[:, :, pos[last]]
+    end = _win_fraction(at, at)
+
+    def as_matrix(m: np.ndarray) -> List[List[float | None]]:
+        out = np.round(m, 4).tolist()
+        for i in range(C):
+            out[i][i] = None
+        return out
+
+    return {"after_5_laps": as_matrix(after_5), "end_of_window": as_matrix(end)}
+
+
+def sc_breakdown(plan: CandidatePlan, merged: Partial) -> List[Dict[str, Any]]:
+    """Probability and median metric gap per SC start lap (None = no SC before the end)"""
+    T = len(plan.you_mean)
+    out = []
+    for start in np.unique(merged.sc_start):
+        sel = merged.sc_start == start
+        out.append({
+            "sc_start_lap": None if start >= T else int(plan.first_lap + start),
+            "probability": round(float(sel.mean()), 4),
+            "median_gap_after_5_laps": float(np.median(merged.metric[sel])),
+        })
+    return out
+
+
+def finalize_candidate(plan: CandidatePlan, merged: Partial, cfg: SimConfig,
+                       sc_window: Dict[str, int] | None, sc_pit_loss_factor: float,
+                       sc_hazard: Dict[str, Any] | None = None,
+                       quantiles: Sequence[float] | None = None,
+                       histogram_bins: int | None = None) -> Dict[str, Any]:
+    # every quantile in one pass: a single multi-kth partition (or one sketch scan)
+    qs = sorted({0.1, 0.5, 0.9, *(quantiles or ())})
+    if isinstance(merged.gaps, QuantileSketch):
+        values = merged.gaps.quantiles(qs)
+    else:
+        values = np.quantile(merged.gaps, qs, axis=0)
+    by_q = dict(zip(qs, values))
+    p10, p50, p90 = by_q[0.1], by_q[0.5], by_q[0.9]
+
+    pit_index = plan.pit_index
+    # metric: median gap after 5 laps from pit (or from now if no pit)
+    med_gap_at_5 = float(p50[plan.metric_index])
+
+    # Breakeven lap: first lap where median gap returns to pre-pit level
+    breakeven_lap = None
+    if pit_index is not None and pit_index > 0:
+        pre_pit_gap = float(p50[pit_index - 1])
+        for i in range(pit_index, len(p50)):
+            if p50[i] >= pre_pit_gap:
+                breakeven_lap = int(plan.first_lap + i)
+                break
+
+    cand = plan.candidate
+    result = {
+        "candidate": {"pit_lap": int(cand.pit_lap), "compound": cand.compound},
+        "p50_by_lap": p50.tolist(),
+        "p90_by_lap": p90.tolist(),
+        "p10_by_lap": p10.tolist(),
+        "median_gap_after_5_laps": med_gap_at_5,
+        "p_ahead_by_lap": np.round(merged.ahead / plan.mc_samples, 4).tolist(),
+        "pit_index": None if pit_index is None else int(pit_index),
+        "breakeven_lap": breakeven_lap,
+        "assumptions": {
+            "pit_loss_mean": cfg.pit_loss_mean,
+            "pit_loss_std": cfg.pit_loss_std,
+            "deg_soft": f"start={cfg.deg_soft_start}, +{cfg.deg_soft_per_lap:.2f}s/lap",
+            "deg_medium": f"start={cfg.deg_med_start}, +{cfg.deg_med_per_lap:.2f}s/lap",
+            "deg_hard": f"start={cfg.deg_hard_start}, +{cfg.deg_hard_per_lap:.2f}s/lap",
+            "noise_std_per_lap_s": NOISE_STD_PER_LAP_S,
+            "sc_active": sc_window is not None or sc_hazard is not None,
+            "sc_pit_loss_factor": sc_pit_loss_factor if sc_window or sc_hazard else None,
+            "sc_hazard": sc_hazard,
+            "quantile_error_s": cfg.quantile_error_s if cfg.chunk_size else None
+        }
+    }
+    if quantiles:
+        result["quantiles_by_lap"] = {f"{q:g}": by_q[q].tolist() for q in sorted(set(quantiles))}
+    if histogram_bins:
+        if isinstance(merged.gaps, QuantileSketch):
+            result["histogram"] = merged.gaps.histogram(histogram_bins)
+        else:
+            result["histogram"] = lap_histograms(merged.gaps.T, histogram_bins)
+    if merged.sc_start is not None:
+        result["sc_breakdown"] = sc_breakdown(plan, merged)
+    return result
+
+
 def simulate(
     df: pd.DataFrame,
     current_compound: Compound,
@@ -50,145 +415,158 @@ def simulate(
     constraints: Constraints | None = None,
     cfg: SimConfig | None = None,
     sc_window: Dict[str, int] | None = None,
-    sc_pit_loss_factor: float = 1.0
+    sc_pit_loss_factor: float = 1.0,
+    seed: int = DEFAULT_SEED,
+    executor: Executor | None = None,
+    pace_offset_s: float = 0.0,
+    sc_hazard: Dict[str, Any] | None = None,
+    quantiles: Sequence[float] | None = None,
+    histogram_bins: int | None = None,
+    result_timeout: float | None = None
 ) -> Dict[str, Any]:
     """
     df: laps table with base_pace_s per lap (clean air). We simulate from base_lap onward.
     base_target_gap_s: positive => you're ahead; negative => you're behind (gap to target car)
     sc_window: Optional dict with 'start_lap' and 'end_lap' for Safety Car period
     sc_pit_loss_factor: Multiplier for pit loss during SC (e.g., 0.6 = 40% faster stop)
+    seed: root of the per-block random streams; same seed => same result
+    executor: optional pool (e.g. ProcessPoolExecutor) to spread RNG blocks over; the
+              result is bit-identical to the serial run
+    result_timeout: with an executor, seconds to wait for all blocks before cancelling the
+                    rest and raising concurrent.futures.TimeoutError
+    pace_offset_s: your per-lap pace relative to base_pace_s (e.g. measured live; + = slower)
+    sc_hazard: stochastic SC instead of a fixed sc_window: {"rate_per_lap": p or [p, ...],
+               "min_laps": 2, "max_laps": 5}. Each path samples its own SC start and
+               duration; results are marginalised over SC risk plus an `sc_breakdown`
+               per SC start lap.
+    quantiles: extra per-lap quantiles (0..1) returned as `quantiles_by_lap`
+    histogram_bins: also return a per-lap histogram of the gap with this many bins
+
+    Candidates share their random streams, so their samples are paired: the result
+    carries each candidate's P(gap > 0) per lap (`p_ahead_by_lap`) and, for two or more
+    candidates, a head-to-head `win_probability` matrix.
     """
     constraints = constraints or Constraints()
     cfg = cfg or SimConfig()
 
+    if sc_window and sc_hazard:
+        raise ValueError("Use either sc_window or sc_hazard, not both.")
+
     laps = df[df["lap"] >= base_lap].copy().reset_index(drop=True)
     if laps.empty:
         raise ValueError("No laps to simulate from base_lap.")
-    
-    # Helper to check if a lap is within SC window
-    def is_sc_lap(lap_num: int) -> bool:
-        if not sc_window:
-            return False
-        return sc_window.get("start_lap", 999) <= lap_num <= sc_window.get("end_lap", 0)
-
-    # helper to project lap times for a stint from a given starting tire age and compound
-    def project_stint(compound: Compound, start_age: int, num_laps: int, rng: np.random.Generator):
-        ages = start_age + np.arange(num_laps)
-        degs = np.array([_deg_for(compound, int(a), cfg) for a in ages])
-        # ~30ms per lap noise
-        noise = rng.normal(loc=0.0, scale=0.03, size=num_laps)
-        # Align with base pace from df rows
-        base = laps["base_pace_s"].values[:num_laps]
-        return base + degs + noise
-
-    # Monte Carlo samples of each candidate
-    rng = np.random.default_rng(42)
-    results = []
-
-    for cand in candidates:
-        # Constraint checks (simple)
-        if constraints.max_tire_age and constraints.max_tire_age < 10:
-            pass  # trivial example—extend later if needed
-
-        # Build two segments: before pit and after pit (switch to candidate compound)
-        # We'll simulate N laps total from base_lap to end of df
-        total_laps = len(laps)
-        # assume pit happens relative to absolute lap number
-        if cand.pit_lap < laps["lap"].iloc[0] or cand.pit_lap > laps["lap"].iloc[-1]:
-            # treat as "no pit within window"
-            pit_index = None
-        else:
-            # 0-based index
-            pit_index = int(cand.pit_lap - laps["lap"].iloc[0])
-
-        # Monte Carlo
-        gaps_by_lap = []
-        p50 = []
-        p90 = []
-        med_gap_at_5 = None
-
-        for _ in range(cfg.mc_samples):
-            seeder = rng.integers(0, 1_000_000)
-            rg = np.random.default_rng(int(seeder))
-
-            if pit_index is None:
-                # stay on current compound entire window
-                lt = project_stint(
-                    current_compound, current_tire_age, total_laps, rg)
-                pit_loss = 0.0
-            else:
-                before = project_stint(
-                    current_compound, current_tire_age, pit_index, rg)
-                # pit loss sample - reduced if pitting during SC
-                base_pit_loss = rg.normal(cfg.pit_loss_mean, cfg.pit_loss_std)
-                if is_sc_lap(cand.pit_lap):
-                    pit_loss = base_pit_loss * sc_pit_loss_factor
-                else:
-                    pit_loss = base_pit_loss
-                after = project_stint(
-                    cand.compound, 0, total_laps - pit_index, rg)
-                lt = np.concatenate([before, after])  # lap times
-
-            # Simple target model: assume target keeps base pace with mild deg on its own medium tires
-            target_compound = "medium"
-            target_base_age = max(0, current_tire_age - 3)  # rough guess
-            target = project_stint(
-                target_compound, target_base_age, total_laps, rg)
-
-            # Apply pit loss at the index (gap is “you − target”; negative means you're behind)
-            # if target faster, your gap becomes more negative
-            gap = np.cumsum(target - lt)
-            if pit_index is not None:
-                gap[pit_index:] -= pit_loss
-
-            # Start from base_target_gap_s
-            gap = gap + base_target_gap_s
-
-            gaps_by_lap.append(gap)
-
-        gaps_by_lap = np.vstack(gaps_by_lap)  # (mc, T)
-        p50 = np.median(gaps_by_lap, axis=0)
-        p90 = np.percentile(gaps_by_lap, 90, axis=0)
-        p10 = np.percentile(gaps_by_lap, 10, axis=0)
-
-        # metric: median gap after 5 laps from pit (or from now if no pit)
-        if pit_index is None:
-            idx = min(4, len(p50) - 1)
-        else:
-            idx = min(pit_index + 5, len(p50) - 1)
-        med_gap_at_5 = float(p50[idx])
-
-        # Breakeven lap: first lap where median gap returns to pre-pit level
-        breakeven_lap = None
-        if pit_index is not None and pit_index > 0:
-            pre_pit_gap = float(p50[pit_index - 1]) if pit_index > 0 else base_target_gap_s
-            for i in range(pit_index, len(p50)):
-                if p50[i] >= pre_pit_gap:
-                    breakeven_lap = int(laps["lap"].iloc[0] + i)
-                    break
-
-        results.append({
-            "candidate": {"pit_lap": int(cand.pit_lap), "compound": cand.compound},
-            "p50_by_lap": p50.tolist(),
-            "p90_by_lap": p90.tolist(),
-            "p10_by_lap": p10.tolist(),
-            "median_gap_after_5_laps": med_gap_at_5,
-            "pit_index": None if pit_index is None else int(pit_index),
-            "breakeven_lap": breakeven_lap,
-            "assumptions": {
-                "pit_loss_mean": cfg.pit_loss_mean,
-                "pit_loss_std": cfg.pit_loss_std,
-                "deg_soft": f"start={cfg.deg_soft_start}, +{cfg.deg_soft_per_lap:.2f}s/lap",
-                "deg_medium": f"start={cfg.deg_med_start}, +{cfg.deg_med_per_lap:.2f}s/lap",
-                "deg_hard": f"start={cfg.deg_hard_start}, +{cfg.deg_hard_per_lap:.2f}s/lap",
-                "noise_std_per_lap_s": 0.03,
-                "sc_active": sc_window is not None,
-                "sc_pit_loss_factor": sc_pit_loss_factor if sc_window else None
-            }
-        })
+
+    plans = [plan_candidate(laps, cand, current_compound, current_tire_age,
+                            base_target_gap_s, cfg, sc_window, sc_pit_loss_factor,
+                            pace_offset_s, sc_hazard)
+             for cand in candidates]
+    if len(plans) > 1:
+        # keep paired per-sample gaps only at the laps the head-to-head matrix compares
+        pair_indices = np.array(sorted({p.metric_index for p in plans} | {len(laps) - 1}))
+        for plan in plans:
+            plan.pair_indices = pair_indices
+    blocks = range(n_blocks(cfg.mc_samples))
+
+    if executor is None:
+        merged = [simulate_blocks(plan, seed, blocks) for plan in plans]
+    else:
+        futures = [[executor.submit(simulate_blocks, plan, seed, [b]) for b in blocks]
+                   for plan in plans]
+        deadline = None if result_timeout is None else time.monotonic() + result_timeout
+
+        def wait(f):
+            return f.result(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+        try:
+            merged = [merge_partials([wait(f) for f in fs]) for fs in futures]
+        except FuturesTimeout:
+            for fs in futures:
+                for f in fs:
+                    f.cancel()
+            raise
+
+    results = [finalize_candidate(plan, m, cfg, sc_window, sc_pit_loss_factor, sc_hazard,
+                                  quantiles, histogram_bins)
+               for plan, m in zip(plans, merged)]
 
     return {
         "base_lap": int(base_lap),
         "base_target_gap_s": float(base_target_gap_s),
-        "candidates": results
+        "seed": int(seed),
+        "candidates": results,
+        "win_probability": win_probabilities(plans, merged) if len(plans) > 1 else None
+    }
+
+
+def simulate_batch(
+    df: pd.DataFrame,
+    scenarios: List[Dict[str, Any]],
+    candidates: List[Strategy],
+    cfg: SimConfig | None = None,
+    sc_window: Dict[str, int] | None = None,
+    sc_pit_loss_factor: float = 1.0,
+    seed: int = DEFAULT_SEED,
+) -> Dict[str, Any]:
+    """
+    Evaluate the same candidates across many starting conditions in one call.
+
+    scenarios: dicts with base_lap, current_compound, current_tire_age, base_target_gap_s.
+    Returns columns with one row per (scenario, candidate): the p10 / p50 / p90 gap at
+    the median_gap_after_5_laps lap. Matches simulate() for the same seed.
+
+    Shared work: RNG blocks are drawn once per base_lap, and trajectories once per
+    (base_lap, compound, tyre age) state — the starting gap only shifts every
+    trajectory, so gap variations are a constant offset on the quantiles.
+    """
+    cfg = cfg or SimConfig()
+    n = cfg.mc_samples
+    columns: Dict[str, list] = {k: [] for k in (
+        "scenario", "base_lap", "current_compound", "current_tire_age", "base_target_gap_s",
+        "pit_lap", "compound", "pit_index", "median_gap_after_5_laps", "p10", "p90")}
+
+    states: Dict[tuple, List[int]] = {}
+    for i, s in enumerate(scenarios):
+        key = (int(s["base_lap"]), s["current_compound"], int(s["current_tire_age"]))
+        states.setdefault(key, []).append(i)
+
+    quantiles: Dict[tuple, tuple] = {}  # state -> (plans, (3, candidates) p10/p50/p90)
+    for base_lap in sorted({k[0] for k in states}):
+        laps = df[df["lap"] >= base_lap].reset_index(drop=True)
+        if laps.empty:
+            raise ValueError(f"No laps to simulate from base_lap {base_lap}.")
+        draws = [block_draws(seed, b, min(RNG_BLOCK, n - b * RNG_BLOCK), len(laps))
+                 for b in range(n_blocks(n))]
+        for key in (k for k in states if k[0] == base_lap):
+            plans = [plan_candidate(laps, cand, key[1], key[2], 0.0, cfg, sc_window,
+                                    sc_pit_loss_factor)
+                     for cand in candidates]
+            metric = np.stack([np.concatenate([gaps_from_draws(p, d)[:, p.metric_index]
+                                               for d in draws])
+                               for p in plans])
+            quantiles[key] = plans, np.quantile(metric, [0.1, 0.5, 0.9], axis=1)
+
+    for key, rows in states.items():
+        plans, (p10, p50, p90) = quantiles[key]
+        for i in rows:
+            gap = float(scenarios[i]["base_target_gap_s"])
+            for j, plan in enumerate(plans):
+                columns["scenario"].append(i)
+                columns["base_lap"].append(key[0])
+                columns["current_compound"].append(key[1])
+                columns["current_tire_age"].append(key[2])
+                columns["base_target_gap_s"].append(gap)
+                columns["pit_lap"].append(int(plan.candidate.pit_lap))
+                columns["compound"].append(plan.candidate.compound)
+                columns["pit_index"].append(plan.pit_index)
+                columns["median_gap_after_5_laps"].append(float(p50[j]) + gap)
+                columns["p10"].append(float(p10[j]) + gap)
+                columns["p90"].append(float(p90[j]) + gap)
+
+    # rows in scenario order, candidates in request order
+    order = sorted(range(len(columns["scenario"])),
+                   key=lambda r: (columns["scenario"][r], r))
+    return {
+        "seed": int(seed),
+        "rows": len(order),
+        "columns": {k: [v[r] for r in order] for k, v in columns.items()},
     }
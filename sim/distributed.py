@@ -0,0 +1,205 @@
+# sim/distributed.py
+"""
+Coordinator/worker mode for simulations too large for one process or host.
+
+The Coordinator is a concurrent.futures.Executor, so it plugs straight into
+simulate(executor=...): every RNG block becomes a task, workers compute it
+with simulate_blocks(), and simulate() merges the partial results (raw gaps,
+or quantile sketches in chunked mode) into one response. Because each block's
+random stream depends only on (seed, block), the result is bit-identical to a
+serial run however blocks land on workers.
+
+Workers connect over multiprocessing.connection (TCP + shared authkey), so no
+external broker is needed:
+
+    SIM_COORDINATOR_AUTHKEY=... python -m sim.distributed worker --address coordinator-host:7070
+
+Tasks and results are pickled, so the authkey is the only thing standing
+between the port and code execution: it must be a secret shared by the
+coordinator and its workers (SIM_COORDINATOR_AUTHKEY), and there is no default.
+A Coordinator built without one uses a random key, which only in-process
+workers (tests, local pools) can know.
+
+If a worker disconnects or exceeds `task_timeout` its in-flight task is
+re-issued to another worker.
+"""
+
+import argparse
+import itertools
+import os
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import Executor, Future, InvalidStateError
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, Optional, Tuple
+
+AUTHKEY_ENV = "SIM_COORDINATOR_AUTHKEY"
+MIN_AUTHKEY_BYTES = 16
+
+
+def authkey_from_env() -> bytes:
+    """The shared secret from SIM_COORDINATOR_AUTHKEY; refuses to run without one"""
+    key = os.getenv(AUTHKEY_ENV, "").encode()
+    if len(key) < MIN_AUTHKEY_BYTES:
+        raise RuntimeError(f"{AUTHKEY_ENV} must be set to a secret of at least "
+                           f"{MIN_AUTHKEY_BYTES} characters to use the sim coordinator")
+    return key
+
+
+class Coordinator(Executor):
+    def __init__(self, address: Tuple[str, int] = ("127.0.0.1", 0),
+                 authkey: Optional[bytes] = None, task_timeout: Optional[float] = None):
+        self.authkey = authkey or os.urandom(32)
+        self.task_timeout = task_timeout
+        self._listener = Listener(address, authkey=self.authkey)
+        self._tasks: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._workers: Dict[str, Dict[str, Any]] = {}
+        self._closed = False
+        self.completed = 0
+        self.reissued = 0
+        threading.Thread(target=self._accept, name="sim-coordinator", daemon=True).start()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._listener.address
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                if self._closed:
+                    return
+                continue  # failed handshake (bad authkey, port scan, ...)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            kind, name = conn.recv()
+            assert kind == "register"
+        except Exception:
+            conn.close()
+            return
+        with self._lock:
+            self._workers[name] = {"tasks": 0, "connected_at": time.time()}
+
+        while True:
+            task = self._tasks.get()
+            if task is None:  # shutdown
+                self._tasks.put(None)
+                break
+            task_id, fut, fn, args, kwargs = task
+            if fut.cancelled():
+                continue
+            try:
+                conn.send(("task", task_id, fn, args, kwargs))
+                if not conn.poll(self.task_timeout):
+                    raise TimeoutError(f"worker {name} timed out")
+                kind, _, payload = conn.recv()
+            except Exception:
+                # worker lost: hand its task to someone else and drop it
+                with self._lock:
+                    self.reissued += 1
+                self._tasks.put(task)
+                break
+            try:
+                if kind == "result":
+                    fut.set_result(payload)
+                else:
+                    fut.set_exception(payload)
+            except InvalidStateError:
+                pass  # caller gave up (result timeout) while the worker ran it
+            with self._lock:
+                self.completed += 1
+                self._workers[name]["tasks"] += 1
+
+        with self._lock:
+            self._workers.pop(name, None)
+        try:
+            conn.send(("stop", None, None, None, None))
+        except Exception:
+            pass
+        conn.close()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        if self._closed:
+            raise RuntimeError("coordinator is shut down")
+        fut: Future = Future()
+        self._tasks.put((next(self._ids), fut, fn, args, kwargs))
+        return fut
+
+    @property
+    def worker_count(self) -> int:
+        with self._lock:
+            return len(self._workers)
+
+    def wait_for_workers(self, n: int, timeout: float = 10.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if len(self._workers) >= n:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "address": f"{self.address[0]}:{self.address[1]}",
+                "workers": {name: dict(w) for name, w in self._workers.items()},
+                "completed": self.completed,
+                "reissued": self.reissued,
+                "queued": self._tasks.qsize(),
+            }
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self._closed = True
+        if cancel_futures:
+            while True:
+                try:
+                    task = self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not None:
+                    task[1].cancel()
+        self._tasks.put(None)
+        self._listener.close()
+
+
+def run_worker(address: Tuple[str, int], authkey: bytes,
+               name: Optional[str] = None):
+    """Register with a coordinator and run tasks until told to stop"""
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    conn = Client(address, authkey=authkey)
+    conn.send(("register", name))
+    try:
+        while True:
+            try:
+                kind, task_id, fn, args, kwargs = conn.recv()
+            except EOFError:
+                return
+            if kind == "stop":
+                return
+            try:
+                conn.send(("result", task_id, fn(*args, **kwargs)))
+            except Exception as e:
+                conn.send(("error", task_id, e))
+    finally:
+        conn.close()
+
+
+def _parse_address(text: str) -> Tuple[str, int]:
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PitStop AI simulation worker")
+    parser.add_argument("role", choices=["worker"])
+    parser.add_argument("--address", default=os.getenv("SIM_COORDINATOR", "127.0.0.1:7070"))
+    parser.add_argument("--name", default=None)
+    opts = parser.parse_args()
+    run_worker(_parse_address(opts.address), authkey_from_env(), opts.name)
@@ -0,0 +1,129 @@
+# sim/live.py
+"""
+Live race state fed one completed lap at a time.
+
+Each ingested lap (lap time, compound, gap) updates the tyre age, the gap, and
+an exponentially weighted estimate of your pace relative to base_pace_s. Only
+the remaining suffix of the race (laps after the one just completed) is then
+re-simulated for the candidates that are still ahead of us, so each lap costs
+work proportional to the remaining horizon. Updated projections are pushed to
+every subscriber's asyncio queue.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from sim.core import (DEFAULT_SEED, Compound, SimConfig, Strategy, _deg_for,
+                      simulate)
+
+
+class LiveRace:
+    def __init__(self, df: pd.DataFrame, base_lap: int, current_compound: Compound,
+                 current_tire_age: int, base_target_gap_s: float,
+                 candidates: List[Strategy], cfg: Optional[SimConfig] = None,
+                 seed: int = DEFAULT_SEED, pace_alpha: float = 0.3):
+        self.df = df
+        self.cfg = cfg or SimConfig()
+        self.seed = seed
+        self.pace_alpha = pace_alpha
+        self.next_lap = base_lap
+        self.current_compound = current_compound
+        self.tire_age = current_tire_age
+        self.gap_s = base_target_gap_s
+        self.pace_offset_s = 0.0
+        self.candidates = list(candidates)
+        self.laps: List[Dict[str, Any]] = []
+        self.version = 0
+        self._lock = threading.Lock()
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self.projection = self._project()
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "next_lap": self.next_lap,
+            "current_compound": self.current_compound,
+            "current_tire_age": self.tire_age,
+            "gap_s": self.gap_s,
+            "pace_offset_s": round(self.pace_offset_s, 4),
+            "laps_ingested": len(self.laps),
+            "candidates": [{"pit_lap": c.pit_lap, "compound": c.compound}
+                           for c in self.candidates],
+        }
+
+    def _project(self) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        remaining = self.df[self.df["lap"] >= self.next_lap]
+        result = None
+        if not remaining.empty:
+            # Nothing left to decide: project staying out on the current set
+            cands = self.candidates or [
+                Strategy(pit_lap=int(remaining["lap"].max()) + 1, compound=self.current_compound)]
+            result = simulate(self.df, self.current_compound, self.tire_age, self.gap_s,
+                              self.next_lap, cands, cfg=self.cfg, seed=self.seed,
+                              pace_offset_s=self.pace_offset_s)
+        return {
+            "event": "projection",
+            "version": self.version,
+            "state": self.state(),
+            "horizon_laps": len(remaining),
+            "finished": remaining.empty,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 3),
+            "sim_result": result,
+        }
+
+    def ingest(self, lap: int, lap_time_s: float, compound: Compound,
+               gap_s: float) -> Dict[str, Any]:
+        """Record a completed lap and re-simulate the rest of the race"""
+        with self._lock:
+            if lap != self.next_lap:
+                raise ValueError(f"Expected lap {self.next_lap}, got {lap}")
+            row = self.df[self.df["lap"] == lap]
+            pitted = compound != self.current_compound
+            if not pitted and not row.empty:
+                # Pace residual after base pace and modelled degradation (in/out laps skipped)
+                expected = float(row["base_pace_s"].iloc[0]) + _deg_for(
+                    compound, self.tire_age, self.cfg)
+                residual = float(lap_time_s) - expected
+                self.pace_offset_s += self.pace_alpha * (residual - self.pace_offset_s)
+
+            self.tire_age = 1 if pitted else self.tire_age + 1
+            self.current_compound = compound
+            self.gap_s = float(gap_s)
+            self.next_lap = lap + 1
+            # The stop is done (or its lap has passed) for these candidates
+            self.candidates = [] if pitted else [
+                c for c in self.candidates if c.pit_lap >= self.next_lap]
+            self.laps.append({"lap": lap, "lap_time_s": float(lap_time_s),
+                              "compound": compound, "gap_s": float(gap_s), "pitted": pitted})
+            self.version += 1
+            self.projection = self._project()
+            update = self.projection
+
+        self._publish(update)
+        return update
+
+    # ----- subscribers -----
+
+    def subscribe(self, loop: asyncio.AbstractEventLoop) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.append((loop, queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[1] is not queue]
+
+    def _publish(self, update: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, update)
+            except RuntimeError:
+                # subscriber's loop already closed
+                self.unsubscribe(queue)
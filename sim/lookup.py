@@ -0,0 +1,118 @@
+# sim/lookup.py
+"""
+Precomputed strategy decision table for live "when should we pit?" lookups.
+
+For every (lap, current compound, tyre-age bucket) the table stores p10/p50/p90
+of the gap five laps after each (pit lap, compound) option within
+`pit_horizon` laps. Gaps are simulated from a zero starting gap: the starting
+gap only shifts every trajectory by a constant, so it is added back at lookup
+time. Tyre age is interpolated linearly between buckets. A lookup is a handful
+of array reads; anything outside the grid (laps not in the dataset, tyre ages
+past `max_age`, SC windows) is left to simulate().
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from sim.core import (DEFAULT_SEED, RNG_BLOCK, SimConfig, Strategy, block_draws,
+                      gaps_from_draws, n_blocks, plan_candidate)
+
+COMPOUNDS = ("soft", "medium", "hard")
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+@dataclass
+class DecisionGrid:
+    age_step: int = 4
+    max_age: int = 28
+    pit_horizon: int = 12   # candidate pit laps L .. L + pit_horizon
+    mc_samples: int = 200
+    seed: int = DEFAULT_SEED
+
+    @property
+    def ages(self) -> np.ndarray:
+        return np.arange(0, self.max_age + 1, self.age_step)
+
+
+class DecisionTable:
+    def __init__(self, first_lap: int, last_lap: int, grid: DecisionGrid, values: np.ndarray):
+        # values: (lap, compound, age bucket, pit offset, candidate compound, quantile),
+        # NaN where the pit lap is past the end of the data
+        self.first_lap = first_lap
+        self.last_lap = last_lap
+        self.grid = grid
+        self.values = values
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, grid: Optional[DecisionGrid] = None,
+              cfg: Optional[SimConfig] = None,
+              progress: Optional[Callable[[float], None]] = None) -> "DecisionTable":
+        grid = grid or DecisionGrid()
+        cfg = cfg or SimConfig()
+        cfg = SimConfig(**{**cfg.__dict__, "mc_samples": grid.mc_samples, "chunk_size": None})
+        first_lap, last_lap = int(df["lap"].min()), int(df["lap"].max())
+        n_laps = last_lap - first_lap + 1
+        ages = grid.ages
+        values = np.full((n_laps, len(COMPOUNDS), len(ages), grid.pit_horizon + 1,
+                          len(COMPOUNDS), len(QUANTILES)), np.nan, dtype=np.float32)
+
+        for li, lap in enumerate(range(first_lap, last_lap + 1)):
+            laps = df[df["lap"] >= lap].reset_index(drop=True)
+            # Every candidate reads the same block streams, so draw them once per lap
+            draws = [block_draws(grid.seed, b, min(RNG_BLOCK, grid.mc_samples - b * RNG_BLOCK),
+                                 len(laps))
+                     for b in range(n_blocks(grid.mc_samples))]
+            for ci, current in enumerate(COMPOUNDS):
+                for ai, age in enumerate(ages):
+                    n_off = min(grid.pit_horizon, last_lap - lap) + 1
+                    metric = []
+                    for off in range(n_off):
+                        for compound in COMPOUNDS:
+                            plan = plan_candidate(laps, Strategy(lap + off, compound), current,
+                                                  int(age), 0.0, cfg)
+                            # same metric as median_gap_after_5_laps
+                            metric.append(np.concatenate(
+                                [gaps_from_draws(plan, d)[:, plan.metric_index] for d in draws]))
+                    q = np.quantile(np.vstack(metric), QUANTILES, axis=1)  # (quantile, option)
+                    values[li, ci, ai, :n_off] = q.T.reshape(n_off, len(COMPOUNDS), len(QUANTILES))
+            if progress:
+                progress((li + 1) / n_laps)
+        return cls(first_lap, last_lap, grid, values)
+
+    def covers(self, lap: int, tire_age: float) -> bool:
+        return self.first_lap <= lap <= self.last_lap and 0 <= tire_age <= self.grid.ages[-1]
+
+    def lookup(self, lap: int, compound: str, tire_age: float, gap_s: float,
+               top: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Options sorted best first (highest median gap), or None outside the grid"""
+        if not self.covers(lap, tire_age) or compound not in COMPOUNDS:
+            return None
+        a = tire_age / self.grid.age_step
+        a0 = min(int(a), len(self.grid.ages) - 1)
+        a1 = min(a0 + 1, len(self.grid.ages) - 1)
+        frac = a - a0
+        row = self.values[lap - self.first_lap, COMPOUNDS.index(compound)]
+        q = (1 - frac) * row[a0] + frac * row[a1] + gap_s  # (pit offset, compound, quantile)
+
+        p50 = q[..., 1].ravel()
+        order = np.argsort(np.where(np.isnan(p50), np.inf, -p50), kind="stable")
+        order = order[:int(np.count_nonzero(~np.isnan(p50)))][:top]
+        options = []
+        for flat in order:
+            off, ki = divmod(int(flat), len(COMPOUNDS))
+            p10, p50_, p90 = q[off, ki]
+            options.append({
+                "pit_lap": lap + off,
+                "compound": COMPOUNDS[ki],
+                "median_gap_after_5_laps": float(p50_),
+                "p10": float(p10),
+                "p90": float(p90),
+            })
+        return options
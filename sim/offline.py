@@ -0,0 +1,287 @@
+# sim/offline.py
+"""
+Offline bulk simulation: scenario files in, columnar results out, no API.
+
+Scenarios (JSONL, or CSV) are read lazily and sent in chunks to a process pool.
+Each worker loads the race data once and evaluates its chunk with
+simulate_batch(), so scenarios sharing candidates and settings share their
+RNG draws and trajectories. Results are written as they arrive, in scenario
+order, by a streaming writer: only `max_inflight` chunks are ever held in
+memory, however large the input. The file is written as <output>.tmp and
+renamed into place only when every chunk succeeded, so a failed run never
+leaves a complete-looking partial result.
+
+Output formats:
+- .npz      column arrays; rows are spooled to temp files and then streamed
+            into the zip with .npy headers, so memory stays bounded (NumPy only)
+- .parquet  one row group per chunk (needs pyarrow)
+"""
+
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from sim.core import DEFAULT_SEED, SimConfig, Strategy, simulate_batch
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for .parquet output
+    pa = pq = None
+
+# Output schema: one row per (scenario, candidate)
+COLUMNS = {
+    "scenario": np.int64,
+    "base_lap": np.int32,
+    "current_compound": "<U6",
+    "current_tire_age": np.int32,
+    "base_target_gap_s": np.float64,
+    "pit_lap": np.int32,
+    "compound": "<U6",
+    "pit_index": np.int32,   # -1 = no stop inside the window
+    "median_gap_after_5_laps": np.float64,
+    "p10": np.float64,
+    "p90": np.float64,
+}
+
+
+# ----- input -----
+
+def parse_candidates(text: str) -> List[Dict[str, Any]]:
+    """"12:medium;14:hard" (or comma separated) -> candidate dicts"""
+    out = []
+    for item in text.replace(",", ";").split(";"):
+        if item.strip():
+            lap, compound = item.strip().split(":")
+            out.append({"pit_lap": int(lap), "compound": compound.strip()})
+    return out
+
+
+def read_scenarios(path: str, candidates: Optional[List[Dict[str, Any]]] = None
+                   ) -> Iterator[Dict[str, Any]]:
+    """
+    Yield scenarios from a .jsonl or .csv file. Fields follow /run_sim: base_lap,
+    base_target_gap_s, current_compound, current_tire_age, candidates, and optional
+    mc_samples / seed / sc_window / sc_pit_loss_factor. CSV candidates use the
+    "12:medium;14:hard" form and the SC window is two columns, sc_start_lap and
+    sc_end_lap. `candidates` fills in scenarios that have none.
+    """
+    def finish(s: Dict[str, Any], where: str) -> Dict[str, Any]:
+        if not s.get("candidates"):
+            if candidates is None:
+                raise ValueError(f"{where}: no candidates (add a column or pass --candidates)")
+            s["candidates"] = candidates
+        return s
+
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            for i, row in enumerate(csv.DictReader(f), start=2):
+                s = {"base_lap": int(row["base_lap"]),
+                     "base_target_gap_s": float(row["base_target_gap_s"]),
+                     "current_compound": row["current_compound"],
+                     "current_tire_age": int(row["current_tire_age"]),
+                     "candidates": parse_candidates(row.get("candidates") or "")}
+                for key, cast in (("mc_samples", int), ("seed", int),
+                                  ("sc_pit_loss_factor", float)):
+                    if row.get(key):
+                        s[key] = cast(row[key])
+                if row.get("sc_start_lap") or row.get("sc_end_lap"):
+                    s["sc_window"] = {"start_lap": int(row["sc_start_lap"]),
+                                      "end_lap": int(row["sc_end_lap"])}
+                yield finish(s, f"{path}:{i}")
+    else:
+        with open(path) as f:
+            for i, line in enumerate(f, start=1):
+                if line.strip():
+                    yield finish(json.loads(line), f"{path}:{i}")
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ----- workers -----
+
+_DF: Optional[pd.DataFrame] = None
+
+
+def _init_worker(data_path: str):
+    global _DF
+    _DF = pd.read_csv(data_path)
+
+
+def run_chunk(first_id: int, scenarios: List[Dict[str, Any]],
+              df: Optional[pd.DataFrame] = None) -> Dict[str, np.ndarray]:
+    """Simulate one chunk; scenarios with the same candidates/settings share one batch call"""
+    df = _DF if df is None else df
+    groups: Dict[str, List[int]] = {}
+    for i, s in enumerate(scenarios):
+        key = json.dumps([s["candidates"], s.get("mc_samples"), s.get("seed"),
+                          s.get("sc_window"), s.get("sc_pit_loss_factor")], sort_keys=True)
+        groups.setdefault(key, []).append(i)
+
+    parts = []
+    for rows in groups.values():
+        s0 = scenarios[rows[0]]
+        out = simulate_batch(
+            df, [scenarios[i] for i in rows],
+            [Strategy(c["pit_lap"], c["compound"]) for c in s0["candidates"]],
+            SimConfig(mc_samples=int(s0.get("mc_samples") or 200)),
+            sc_window=s0.get("sc_window"),
+            sc_pit_loss_factor=s0.get("sc_pit_loss_factor") or 1.0,
+            seed=DEFAULT_SEED if s0.get("seed") is None else s0["seed"])
+        cols = out["columns"]
+        cols["scenario"] = [first_id + rows[i] for i in cols["scenario"]]
+        cols["pit_index"] = [-1 if p is None else p for p in cols["pit_index"]]
+        parts.append(cols)
+
+    merged = {name: np.concatenate([np.asarray(p[name], dtype=dtype) for p in parts])
+              for name, dtype in COLUMNS.items()}
+    order = np.argsort(merged["scenario"], kind="stable")
+    return {name: col[order] for name, col in merged.items()}
+
+
+# ----- output -----
+
+class NpzStreamWriter:
+    """Append column chunks; close() streams them into an .npz without loading them"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self._dir = tempfile.mkdtemp(prefix="sim-npz-")
+        self._files = {name: open(os.path.join(self._dir, name), "wb") for name in COLUMNS}
+
+    def write(self, columns: Dict[str, np.ndarray]):
+        for name, dtype in COLUMNS.items():
+            self._files[name].write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+        self.rows += len(columns["scenario"])
+
+    def abort(self):
+        """Drop the spooled rows without writing anything"""
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def close(self):
+        try:
+            with zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for name, dtype in COLUMNS.items():
+                    self._files[name].close()
+                    header = {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                              "fortran_order": False, "shape": (self.rows,)}
+                    with zf.open(f"{name}.npy", "w", force_zip64=True) as out, \
+                            open(os.path.join(self._dir, name), "rb") as src:
+                        np.lib.format.write_array_header_2_0(out, header)
+                        shutil.copyfileobj(src, out, 1 << 20)
+        finally:
+            shutil.rmtree(self._dir, ignore_errors=True)
+
+
+class ParquetStreamWriter:
+    """One Parquet row group per written chunk"""
+
+    def __init__(self, path: str):
+        if pq is None:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow); "
+                               "or write .npz")
+        self.path = path
+        self.rows = 0
+        self._writer = None
+
+    def write(self, columns: Dict[str, np.ndarray]):
+        table = pa.table({name: columns[name] for name in COLUMNS})
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def abort(self):
+        self.close()
+
+
+def open_writer(path: str, write_to: Optional[str] = None):
+    """Writer for `path`'s format, writing to `write_to` (default: `path` itself)"""
+    if path.endswith(".parquet"):
+        return ParquetStreamWriter(write_to or path)
+    if path.endswith(".npz"):
+        return NpzStreamWriter(write_to or path)
+    raise ValueError(f"Unsupported output format: {path} (use .npz or .parquet)")
+
+
+# ----- driver -----
+
+def run_offline(scenarios: Iterable[Dict[str, Any]], data_path: str, out_path: str,
+                workers: Optional[int] = None, chunk_size: int = 64,
+                max_inflight: Optional[int] = None,
+                progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Simulate every scenario across a process pool and stream results to `out_path`"""
+    workers = workers or os.cpu_count() or 1
+    max_inflight = max_inflight or 2 * workers
+    tmp_path = out_path + ".tmp"
+    writer = open_writer(out_path, tmp_path)
+    t0 = time.perf_counter()
+    done = 0
+    pending: deque = deque()
+
+    def drain_one():
+        nonlocal done
+        n, fut = pending.popleft()
+        writer.write(fut.result())
+        done += n
+        if progress:
+            elapsed = time.perf_counter() - t0
+            progress({"scenarios": done, "rows": writer.rows, "elapsed_s": elapsed,
+                      "scenarios_per_s": done / elapsed if elapsed else 0.0})
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(data_path,)) as pool:
+            first_id = 0
+            for chunk in chunked(scenarios, chunk_size):
+                if len(pending) >= max_inflight:
+                    drain_one()
+                pending.append((len(chunk), pool.submit(run_chunk, first_id, chunk)))
+                first_id += len(chunk)
+            while pending:
+                drain_one()
+        writer.close()
+    except BaseException:
+        # never leave a well-formed file holding only the chunks finished so far
+        writer.abort()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, out_path)
+
+    elapsed = time.perf_counter() - t0
+    return {"scenarios": done, "rows": writer.rows, "output": out_path,
+            "workers": workers, "elapsed_s": round(elapsed, 3),
+            "scenarios_per_s": round(done / elapsed, 1) if elapsed else None}
+
+
+def print_progress(info: Dict[str, Any]):
+    print(f"\r⏳ {info['scenarios']} scenarios, {info['rows']} rows, "
+          f"{info['scenarios_per_s']:.1f} scenarios/s", end="", file=sys.stderr, flush=True)
@@ -0,0 +1,159 @@
+# sim/scheduler.py
+"""
+Priority-aware admission in front of simulate().
+
+Work is tagged with a priority class:
+- interactive: UI /run_sim queries, latency sensitive
+- agent:       planner simulations (LLM / optimizer loops)
+- bulk:        High Accuracy bursts and sweeps
+
+Each class has its own concurrency budget, so a queue of bursts can never take
+the slots interactive queries need. On top of that, all running work shares a
+memory budget estimated from the size of the (samples x laps x candidates)
+gap matrices; a single run larger than the whole budget is rejected
+(OverBudget) rather than admitted alone. Bulk work is preemptible at batch
+granularity: between batches it calls checkpoint(), which parks it while any
+interactive work is running or waiting.
+
+A request still waiting for admission holds a Ticket whose priority can be
+raised with promote(): when an interactive caller coalesces onto an
+identical in-flight bulk request, the shared run jumps the queue with it.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+PRIORITIES = ("interactive", "agent", "bulk")
+DEFAULT_LIMITS = {"interactive": 4, "agent": 2, "bulk": 1}
+
+
+class OverBudget(ValueError):
+    """A single run needs more memory than the scheduler's whole budget"""
+
+
+class Ticket:
+    """One admission request; its priority may be raised while it waits"""
+
+    def __init__(self, priority: str):
+        self.priority = priority
+        self.waiting = False
+        self.admitted = False
+
+
+def estimate_bytes(mc_samples: int, laps: int, candidates: int = 1) -> int:
+    """Peak simulate() footprint: the float64 gap matrix plus a sorted copy for the percentiles"""
+    return 2 * 8 * max(1, mc_samples) * max(1, laps) * max(1, candidates)
+
+
+class SimScheduler:
+    def __init__(self, limits: Optional[Dict[str, int]] = None,
+                 memory_budget_bytes: int = 512 * 2**20):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.memory_budget_bytes = memory_budget_bytes
+        self._cond = threading.Condition()
+        self._running = {p: 0 for p in PRIORITIES}
+        self._waiting = {p: 0 for p in PRIORITIES}
+        self._memory_in_use = 0
+        self.completed = {p: 0 for p in PRIORITIES}
+        self.preempted = 0
+        self.wait_s = {p: 0.0 for p in PRIORITIES}
+
+    def _check(self, priority: str):
+        if priority not in PRIORITIES:
+            raise ValueError(
+                f"Unknown priority '{priority}' (expected one of {', '.join(PRIORITIES)})")
+
+    def _admissible(self, priority: str, cost: int) -> bool:
+        if self._running[priority] >= self.limits[priority]:
+            return False
+        if priority != "interactive" and self._interactive_pending():
+            return False
+        return self._memory_in_use + cost <= self.memory_budget_bytes
+
+    def _interactive_pending(self) -> bool:
+        return self._waiting["interactive"] > 0
+
+    @contextmanager
+    def slot(self, priority: str, est_bytes: int = 0, ticket: Optional[Ticket] = None):
+        """
+        Hold a concurrency slot (and est_bytes of memory budget) for `priority`, or for
+        `ticket`'s priority if it gets promoted while waiting.
+        """
+        self._check(priority)
+        if est_bytes > self.memory_budget_bytes:
+            raise OverBudget(
+                f"Simulation needs ~{est_bytes / 2**20:.0f} MB, more than the whole "
+                f"{self.memory_budget_bytes / 2**20:.0f} MB budget; "
+                "lower mc_samples or the number of candidates")
+        ticket = ticket or Ticket(priority)
+        t0 = time.perf_counter()
+        with self._cond:
+            if PRIORITIES.index(priority) < PRIORITIES.index(ticket.priority):
+                ticket.priority = priority
+            self._waiting[ticket.priority] += 1
+            ticket.waiting = True
+            try:
+                self._cond.wait_for(lambda: self._admissible(ticket.priority, est_bytes))
+            finally:
+                self._waiting[ticket.priority] -= 1
+                ticket.waiting = False
+            ticket.admitted = True
+            admitted_as = ticket.priority
+            self._running[admitted_as] += 1
+            self._memory_in_use += est_bytes
+            self.wait_s[admitted_as] += time.perf_counter() - t0
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running[admitted_as] -= 1
+                self._memory_in_use -= est_bytes
+                self.completed[admitted_as] += 1
+                self._cond.notify_all()
+
+    def run(self, priority: str, fn: Callable[[], Any], est_bytes: int = 0,
+            ticket: Optional[Ticket] = None) -> Any:
+        with self.slot(priority, est_bytes, ticket):
+            return fn()
+
+    def promote(self, ticket: Ticket, priority: str) -> bool:
+        """Raise a waiting ticket to `priority` if that is higher; True if it changed"""
+        self._check(priority)
+        with self._cond:
+            if ticket.admitted or PRIORITIES.index(priority) >= PRIORITIES.index(ticket.priority):
+                return False
+            if ticket.waiting:
+                self._waiting[ticket.priority] -= 1
+                self._waiting[priority] += 1
+            ticket.priority = priority
+            self._cond.notify_all()
+            return True
+
+    def checkpoint(self, timeout: Optional[float] = None) -> bool:
+        """
+        Called by bulk work between batches (outside slot()): waits while interactive work
+        is running or queued. Returns True if it had to yield.
+        """
+        with self._cond:
+            busy = lambda: self._running["interactive"] > 0 or self._interactive_pending()
+            if not busy():
+                return False
+            self.preempted += 1
+            self._cond.wait_for(lambda: not busy(), timeout)
+            return True
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limits": dict(self.limits),
+                "running": dict(self._running),
+                "waiting": dict(self._waiting),
+                "completed": dict(self.completed),
+                "wait_s": {p: round(v, 4) for p, v in self.wait_s.items()},
+                "bulk_preemptions": self.preempted,
+                "memory_in_use_bytes": self._memory_in_use,
+                "memory_budget_bytes": self.memory_budget_bytes,
+            }
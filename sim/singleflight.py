@@ -0,0 +1,77 @@
+# sim/singleflight.py
+"""
+Request coalescing for identical concurrent simulations.
+
+The API's LRU cache only helps once a result has been stored. When the UI, the
+planner and a burst job submit the same scenario at the same moment, the first
+caller computes it and every other caller with the same key waits for that
+in-flight result. Nothing is kept once the call finishes; caching stays the
+caller's job.
+
+The leader can attach `state` to its flight (e.g. its scheduler ticket); each
+caller that joins gets it through `on_join`, so a more urgent follower can
+promote the shared run instead of waiting at the leader's priority.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class SingleFlight:
+    """Run `fn` once per key among concurrent callers; counts leaders vs. coalesced calls"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Tuple[Future, Any]] = {}
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def do(self, key: str, fn: Callable[[], Any], state: Any = None,
+           on_join: Optional[Callable[[Any], None]] = None) -> Tuple[Any, bool]:
+        """
+        Return (result, shared); shared is True when another caller computed it.
+        A caller that joins an in-flight call has `on_join(leader_state)` called first.
+        """
+        with self._lock:
+            self.calls += 1
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                fut = Future()
+                self._in_flight[key] = (fut, state)
+                self.executed += 1
+            else:
+                fut, leader_state = flight
+                self.coalesced += 1
+
+        if not leader:
+            if on_join is not None:
+                on_join(leader_state)
+            return fut.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self.errors += 1
+                del self._in_flight[key]
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+        fut.set_result(result)
+        return result, False
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "in_flight": len(self._in_flight),
+                "coalesced_rate": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+            }
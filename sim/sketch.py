@@ -0,0 +1,141 @@
+# sim/sketch.py
+"""
+Streaming per-lap quantile sketch for chunked Monte Carlo.
+
+Each lap keeps a fixed-width histogram of gap values (bin width = twice the
+error bound). Blocks of sampled trajectories are folded in as they are
+produced, so memory depends on the spread of the gaps, not on the number of
+samples.
+
+Quantiles use numpy's default (linear) definition over bin midpoints. Every
+order statistic is off by at most half a bin and interpolation cannot add to
+that, so with bins `2 * error_s` wide any quantile is within `error_s` of
+np.quantile over the same samples. Sketches with the same error bound merge
+exactly (counts add), which lets independent sample blocks be reduced in any
+order.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+
+def lap_histograms(points: np.ndarray, bins: int,
+                   weights: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Per-lap equal-width histograms spanning each lap's min..max. points: (laps, m) values
+    per lap, with optional (laps, m) weights (counts; zero-weight points are ignored).
+    """
+    T = points.shape[0]
+    live = np.ones(points.shape, dtype=bool) if weights is None else weights > 0
+    lo = np.where(live, points, np.inf).min(axis=1)
+    hi = np.where(live, points, -np.inf).max(axis=1)
+    width = (hi - lo) / bins
+    safe = np.where(width > 0, width, 1.0)
+    idx = np.clip(np.floor((points - lo[:, None]) / safe[:, None]), 0, bins - 1).astype(np.int64)
+    flat = idx + np.arange(T)[:, None] * bins
+    counts = np.bincount(flat.ravel(), weights=None if weights is None else weights.ravel(),
+                         minlength=T * bins).reshape(T, bins)
+    return {"lo": lo.tolist(), "width": width.tolist(),
+            "counts": counts.astype(np.int64).tolist()}
+
+
+class QuantileSketch:
+    def __init__(self, n_laps: int, error_s: float = 0.01, max_bins: int = 200_000):
+        if error_s <= 0:
+            raise ValueError("error_s must be positive")
+        self.n_laps = n_laps
+        self.error_s = float(error_s)
+        self.width = 2 * self.error_s
+        self.max_bins = max_bins
+        self.count = 0
+        self.origin: Optional[np.ndarray] = None  # (laps,) bin index of counts[:, 0]
+        self.counts = np.zeros((n_laps, 0), dtype=np.int64)
+
+    @property
+    def nbytes(self) -> int:
+        return self.counts.nbytes
+
+    def _grow(self, lo: np.ndarray, hi: np.ndarray):
+        """Widen every lap's window so bin indices [lo, hi] are covered"""
+        if self.origin is None:
+            self.origin = lo.copy()
+            self.counts = np.zeros((self.n_laps, int((hi - lo).max()) + 1), dtype=np.int64)
+            return
+        new_origin = np.minimum(self.origin, lo)
+        end = np.maximum(self.origin + self.counts.shape[1], hi + 1)
+        n = int((end - new_origin).max())
+        if n > self.max_bins:
+            raise ValueError(
+                f"Gap spread needs {n} bins at {self.width}s; raise error_s or max_bins")
+        if (new_origin == self.origin).all() and n == self.counts.shape[1]:
+            return
+        grown = np.zeros((self.n_laps, n), dtype=np.int64)
+        shift = self.origin - new_origin
+        for lap in range(self.n_laps):
+            grown[lap, shift[lap]:shift[lap] + self.counts.shape[1]] = self.counts[lap]
+        self.origin, self.counts = new_origin, grown
+
+    def update(self, block: np.ndarray):
+        """Fold in a (samples, laps) block of gap trajectories"""
+        block = np.asarray(block, dtype=float)
+        if block.ndim != 2 or block.shape[1] != self.n_laps:
+            raise ValueError(f"expected a (samples, {self.n_laps}) block")
+        if block.shape[0] == 0:
+            return
+        idx = np.floor(block / self.width).astype(np.int64)
+        lo, hi = idx.min(axis=0), idx.max(axis=0)
+        if (self.origin is None or (lo < self.origin).any()
+                or (hi >= self.origin + self.counts.shape[1]).any()):
+            self._grow(lo, hi)
+        n = self.counts.shape[1]
+        flat = (idx - self.origin) + np.arange(self.n_laps) * n
+        self.counts += np.bincount(flat.ravel(), minlength=self.n_laps * n).reshape(self.n_laps, n)
+        self.count += block.shape[0]
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.width != self.width or other.n_laps != self.n_laps:
+            raise ValueError("can only merge sketches with the same laps and error bound")
+        if other.origin is None:
+            return self
+        lo, hi = other.origin, other.origin + other.counts.shape[1] - 1
+        if self.origin is None:
+            self._grow(lo, hi)
+        else:
+            self._grow(np.minimum(self.origin, lo),
+                       np.maximum(self.origin + self.counts.shape[1] - 1, hi))
+        shift = other.origin - self.origin
+        for lap in range(self.n_laps):
+            self.counts[lap, shift[lap]:shift[lap] + other.counts.shape[1]] += other.counts[lap]
+        self.count += other.count
+        return self
+
+    def _order_stat(self, cum: np.ndarray, k: np.ndarray) -> np.ndarray:
+        """Midpoint of the bin holding the k-th smallest sample, per lap"""
+        bins = (cum > k[:, None]).argmax(axis=1)
+        return (self.origin + bins + 0.5) * self.width
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """(len(qs), laps) array of quantiles, q in [0, 1]"""
+        if self.count == 0:
+            raise ValueError("empty sketch")
+        cum = np.cumsum(self.counts, axis=1)
+        out = []
+        for q in qs:
+            pos = q * (self.count - 1)
+            k = int(np.floor(pos))
+            frac = pos - k
+            lower = self._order_stat(cum, np.full(self.n_laps, k))
+            if frac == 0:
+                out.append(lower)
+                continue
+            upper = self._order_stat(cum, np.full(self.n_laps, min(k + 1, self.count - 1)))
+            out.append(lower + frac * (upper - lower))
+        return np.vstack(out)
+
+    def histogram(self, bins: int) -> Dict[str, Any]:
+        """Per-lap histogram with `bins` equal-width bins over the occupied range"""
+        if self.count == 0:
+            raise ValueError("empty sketch")
+        mids = (self.origin[:, None] + np.arange(self.counts.shape[1]) + 0.5) * self.width
+        return lap_histograms(mids, bins, weights=self.counts)
@@ -0,0 +1,244 @@
+# sim/surrogate.py
+"""
+Learned surrogate for sub-millisecond strategy scoring.
+
+A polynomial ridge regression (NumPy only) is fitted to simulate() outputs for
+one dataset + SimConfig. It predicts the median / P10 / P90 gap five laps after
+the stop (relative to the starting gap, which only shifts the result). The
+inputs are cheap deterministic summaries of a candidate: the noise-free gap
+(pace, degradation and mean pit loss, no sampling) and the number of noisy
+laps summed up to the metric lap. The regression learns how the Monte Carlo
+quantiles spread around that.
+
+Error bars are calibrated split-conformally per region: the `coverage`
+quantile of the absolute residuals on a held-out set of simulated states,
+taken separately for each (candidate compound, pit-offset band), since the fit
+is much tighter for some strategies than others. Regions with too few held-out
+rows use the quantile over all of them. score() serves each prediction whose
+own error bar is within `max_error_s` and whose state is inside the training
+range, and sends the rest to simulate().
+"""
+
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sim.core import (DEFAULT_SEED, RNG_BLOCK, SimConfig, Strategy, block_draws,
+                      gaps_from_draws, n_blocks, plan_candidate, simulate)
+
+COMPOUNDS = ("soft", "medium", "hard")
+QUANTILES = (0.5, 0.1, 0.9)
+TARGETS = ("median_gap_after_5_laps", "p10", "p90")
+
+
+def _poly_features(x: np.ndarray, degree: int) -> np.ndarray:
+    """All monomials of the (scaled) columns of x up to `degree`, including the constant"""
+    cols = [np.ones(len(x))]
+    for d in range(1, degree + 1):
+        for combo in itertools.combinations_with_replacement(range(x.shape[1]), d):
+            cols.append(np.prod(x[:, combo], axis=1))
+    return np.column_stack(cols)
+
+
+def summarize_plan(plan) -> Tuple[float, int, float]:
+    """(noise-free gap, noisy laps, pit-loss std) at the median_gap_after_5_laps lap"""
+    idx = plan.metric_index
+    if plan.pit_index is None:
+        pit_mean, pit_std = 0.0, 0.0
+    else:
+        pit_mean, pit_std = plan.pit_loss_mean, plan.pit_loss_std
+    mean_gap = float(np.sum(plan.target_mean[:idx + 1] - plan.you_mean[:idx + 1])) - pit_mean
+    return mean_gap, idx + 1, pit_std
+
+
+@dataclass
+class SurrogateConfig:
+    degree: int = 2
+    ridge: float = 1e-6
+    max_age: int = 30
+    pit_horizon: int = 12
+    states: int = 400         # (lap, compound, tyre age) states simulated for training
+    holdout: float = 0.25     # fraction of states kept for calibration
+    coverage: float = 0.9     # error bars cover this share of held-out residuals
+    offset_band: int = 4      # calibration regions: compound x pit offset // offset_band
+    min_region_rows: int = 20  # fewer held-out rows than this: use the global error bar
+    mc_samples: int = 400
+    seed: int = DEFAULT_SEED
+
+
+@dataclass
+class Surrogate:
+    cfg: SurrogateConfig
+    sim_cfg: SimConfig
+    first_lap: int
+    last_lap: int
+    coef: Optional[np.ndarray] = None     # (n_features, 3)
+    error_s: Optional[np.ndarray] = None  # (3,) calibrated abs error per target, all regions
+    region_error_s: Dict[Tuple[str, int], np.ndarray] = field(default_factory=dict)
+    report: Dict[str, Any] = field(default_factory=dict)
+
+    # ----- training -----
+
+    @staticmethod
+    def simulate_states(df: pd.DataFrame, states: List[Tuple[int, str, int]],
+                        cfg: SurrogateConfig, sim_cfg: SimConfig) -> pd.DataFrame:
+        """Simulated targets for every (pit offset, compound) option of each state"""
+        last_lap = int(df["lap"].max())
+        sim_cfg = SimConfig(**{**sim_cfg.__dict__, "mc_samples": cfg.mc_samples,
+                               "chunk_size": None})
+        rows = []
+        for lap in sorted({s[0] for s in states}):
+            laps = df[df["lap"] >= lap].reset_index(drop=True)
+            draws = [block_draws(cfg.seed, b, min(RNG_BLOCK, cfg.mc_samples - b * RNG_BLOCK),
+                                 len(laps))
+                     for b in range(n_blocks(cfg.mc_samples))]
+            for _, current, age in (s for s in states if s[0] == lap):
+                for off in range(min(cfg.pit_horizon, last_lap - lap) + 1):
+                    for compound in COMPOUNDS:
+                        plan = plan_candidate(laps, Strategy(lap + off, compound), current,
+                                              age, 0.0, sim_cfg)
+                        mean_gap, k, pit_std = summarize_plan(plan)
+                        metric = np.concatenate(
+                            [gaps_from_draws(plan, d)[:, k - 1] for d in draws])
+                        q = np.quantile(metric, QUANTILES)
+                        rows.append((lap, current, age, off, compound, mean_gap, k, pit_std,
+                                     *q))
+        return pd.DataFrame(rows, columns=["lap", "current", "age", "offset", "compound",
+                                           "mean_gap", "k", "pit_std", *TARGETS])
+
+    def region(self, compound: str, offset: int) -> Tuple[str, int]:
+        return compound, max(0, int(offset)) // self.cfg.offset_band
+
+    def _error_bar(self, residuals: np.ndarray) -> np.ndarray:
+        """Split-conformal quantile per target (finite-sample corrected)"""
+        n = len(residuals)
+        level = min(1.0, np.ceil((n + 1) * self.cfg.coverage) / n)
+        return np.quantile(residuals, level, axis=0)
+
+    def error_bar(self, compound: str, offset: int) -> np.ndarray:
+        return self.region_error_s.get(self.region(compound, offset), self.error_s)
+
+    def _x(self, mean_gap, k, pit_std) -> np.ndarray:
+        x = np.column_stack([
+            np.asarray(mean_gap, float) / 30.0,
+            np.sqrt(np.asarray(k, float)) / 10.0,
+            np.asarray(pit_std, float),
+        ])
+        return _poly_features(x, self.cfg.degree)
+
+    @classmethod
+    def train(cls, df: pd.DataFrame, cfg: Optional[SurrogateConfig] = None,
+              sim_cfg: Optional[SimConfig] = None) -> "Surrogate":
+        cfg = cfg or SurrogateConfig()
+        sim_cfg = sim_cfg or SimConfig()
+        first_lap, last_lap = int(df["lap"].min()), int(df["lap"].max())
+        model = cls(cfg, sim_cfg, first_lap, last_lap)
+
+        t0 = time.perf_counter()
+        rng = np.random.default_rng(cfg.seed)
+        states = sorted({(int(rng.integers(first_lap, last_lap + 1)),
+                          COMPOUNDS[int(rng.integers(3))],
+                          int(rng.integers(0, cfg.max_age + 1)))
+                         for _ in range(cfg.states)})
+        order = rng.permutation(len(states))
+        n_hold = max(1, int(len(states) * cfg.holdout))
+        hold = {states[i] for i in order[:n_hold]}
+        data = cls.simulate_states(df, states, cfg, sim_cfg)
+        t_sim = time.perf_counter() - t0
+
+        is_hold = np.array([(r.lap, r.current, r.age) in hold
+                            for r in data.itertuples(index=False)])
+        train, cal = data[~is_hold], data[is_hold]
+        X = model._x(train["mean_gap"], train["k"], train["pit_std"])
+        Y = train[list(TARGETS)].to_numpy()
+        model.coef = np.linalg.solve(X.T @ X + cfg.ridge * np.eye(X.shape[1]), X.T @ Y)
+        residuals = np.abs(model._x(cal["mean_gap"], cal["k"], cal["pit_std"]) @ model.coef
+                           - cal[list(TARGETS)].to_numpy())
+        model.error_s = model._error_bar(residuals)
+        regions = [model.region(c, o) for c, o in zip(cal["compound"], cal["offset"])]
+        for region in set(regions):
+            sel = np.array([r == region for r in regions])
+            if sel.sum() >= cfg.min_region_rows:
+                model.region_error_s[region] = model._error_bar(residuals[sel])
+
+        model.report = {
+            "states": len(states),
+            "rows": len(data),
+            "simulate_s": round(t_sim, 3),
+            "train_s": round(time.perf_counter() - t0, 3),
+            "holdout_mae_s": round(float(residuals[:, 0].mean()), 4),
+            "holdout_max_error_s": round(float(residuals[:, 0].max()), 4),
+            "coverage": cfg.coverage,
+            "error_s": [round(float(e), 4) for e in model.error_s],
+            "median_error_s_by_region": {
+                f"{c}+{b * cfg.offset_band}..{(b + 1) * cfg.offset_band - 1}": round(float(e[0]), 4)
+                for (c, b), e in sorted(model.region_error_s.items())},
+        }
+        return model
+
+    # ----- serving -----
+
+    def covers(self, base_lap: int, tire_age: int, pit_lap: int) -> bool:
+        return (self.first_lap <= base_lap <= self.last_lap
+                and 0 <= tire_age <= self.cfg.max_age
+                and 0 <= pit_lap - base_lap <= self.cfg.pit_horizon
+                and pit_lap <= self.last_lap)
+
+    def predict(self, df: pd.DataFrame, base_lap: int, current_compound: str, tire_age: int,
+                base_target_gap_s: float, candidates: List[Strategy]) -> List[Dict[str, Any]]:
+        laps = df[df["lap"] >= base_lap].reset_index(drop=True)
+        if laps.empty:
+            raise ValueError("No laps to simulate from base_lap.")
+        summaries = [summarize_plan(plan_candidate(laps, cand, current_compound, tire_age,
+                                                   0.0, self.sim_cfg))
+                     for cand in candidates]
+        Y = self._x(*zip(*summaries)) @ self.coef + base_target_gap_s
+        return [{
+            "candidate": {"pit_lap": int(cand.pit_lap), "compound": cand.compound},
+            "median_gap_after_5_laps": float(y[0]),
+            "p10": float(y[1]),
+            "p90": float(y[2]),
+            "error_s": float(self.error_bar(cand.compound, cand.pit_lap - base_lap)[0]),
+            "in_range": self.covers(base_lap, tire_age, cand.pit_lap),
+        } for cand, y in zip(candidates, Y)]
+
+    def score(self, df: pd.DataFrame, base_lap: int, current_compound: str, tire_age: int,
+              base_target_gap_s: float, candidates: List[Strategy],
+              max_error_s: float = 0.25,
+              run: Optional[Callable[[List[Strategy]], Dict[str, Any]]] = None
+              ) -> List[Dict[str, Any]]:
+        """
+        Predictions where trustworthy; simulate() for the rest (marked source='simulate').
+        `run(candidates)` replaces the direct simulate() call for the fallback (e.g. to go
+        through the API's scheduler and cache); it must use the model's mc_samples and seed.
+        """
+        preds = self.predict(df, base_lap, current_compound, tire_age, base_target_gap_s,
+                             candidates)
+        fallback = [i for i, p in enumerate(preds)
+                    if not p["in_range"] or p["error_s"] > max_error_s]
+        for p in preds:
+            p["source"] = "surrogate"
+        if fallback:
+            todo = [candidates[i] for i in fallback]
+            if run is not None:
+                sim = run(todo)
+            else:
+                sim_cfg = SimConfig(**{**self.sim_cfg.__dict__,
+                                       "mc_samples": self.cfg.mc_samples})
+                sim = simulate(df, current_compound, tire_age, base_target_gap_s, base_lap,
+                               todo, cfg=sim_cfg, seed=self.cfg.seed)
+            for i, c in zip(fallback, sim["candidates"]):
+                idx = min((c["pit_index"] if c["pit_index"] is not None else -1) + 5,
+                          len(c["p50_by_lap"]) - 1)
+                preds[i].update({
+                    "median_gap_after_5_laps": c["median_gap_after_5_laps"],
+                    "p10": c["p10_by_lap"][idx],
+                    "p90": c["p90_by_lap"][idx],
+                    "error_s": 0.0,
+                    "source": "simulate",
+                })
+        return preds
@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from sim.backtest import BacktestConfig, backtest_race, run_backtest
+
+
+def _archive(path, n=2):
+    path.mkdir()
+    df = pd.read_csv("data/synth_race.csv")
+    for i in range(n):
+        race = df.copy()
+        rng = np.random.default_rng(i)
+        race["gap_s"] = -1.5 + np.cumsum(rng.normal(0, 0.2, len(race))) - np.where(
+            race["lap"] >= 11, 21.0, 0.0)
+        race.to_csv(path / f"race{i}.csv", index=False)
+    return path
+
+
+def test_backtest_race_scores_against_actual_stop():
+    cfg = BacktestConfig(every=4, mc_samples=50)
+    result = backtest_race("data/synth_race.csv", cfg)
+    first = result["decisions"][0]
+    assert first["lap"] == 2
+    assert first["state"] == {"compound": "soft", "tire_age": 1, "gap_s": 0.0}
+    assert first["actual"] == {"pit_lap": 11, "compound": "medium"}
+    assert first["predicted_gain_s"] >= 0
+    # after the only stop the actual strategy is staying out
+    assert result["decisions"][-1]["actual"] is None
+    assert "gap_mae_s" not in result["summary"]  # no gap_s column
+
+
+def test_run_backtest_checkpoints_and_resumes(tmp_path):
+    archive = _archive(tmp_path / "archive")
+    out = tmp_path / "out"
+    cfg = BacktestConfig(every=3, mc_samples=50)
+    seen = []
+    summary = run_backtest([str(archive)], str(out), cfg, workers=2, progress=seen.append)
+    assert summary["races"] == 2 and summary["resumed"] == 0
+    assert len(seen) == 2
+    assert 0 <= summary["p10_p90_coverage"] <= 1
+    assert json.loads((out / "summary.json").read_text())["decisions"] == summary["decisions"]
+
+    again = run_backtest([str(archive)], str(out), cfg)
+    assert again["resumed"] == 2
+    assert again["decisions"] == summary["decisions"]
+    assert again["by_race"] == summary["by_race"]
+
+
+def test_checkpoints_are_keyed_by_path_and_config(tmp_path):
+    a = _archive(tmp_path / "a", n=1)
+    b = _archive(tmp_path / "b", n=1)  # also race0.csv
+    out = tmp_path / "out"
+    cfg = BacktestConfig(every=6, mc_samples=50)
+    summary = run_backtest([str(a), str(b)], str(out), cfg, workers=1)
+    assert summary["races"] == 2
+    assert len(list((out / "races").glob("race0-*.json"))) == 2
+
+    changed = run_backtest([str(a), str(b)], str(out),
+                           BacktestConfig(every=6, mc_samples=50, horizon=4), workers=1)
+    assert changed["resumed"] == 0 and changed["stale_checkpoints"] == 2
+    assert changed["config"]["horizon"] == 4
@@ -1,5 +1,6 @@
+import pytest
 import pandas as pd
-from sim.core import simulate, Strategy
+from sim.core import metric_index, simulate, Strategy
 
 
 def test_sim_runs():
@@ -19,3 +20,118 @@ def test_sim_runs():
     # should give medians
     for c in out["candidates"]:
         assert "median_gap_after_5_laps" in c
+        assert c["p50_by_lap"][metric_index(c)] == pytest.approx(c["median_gap_after_5_laps"])
+
+
+def test_seeded_results_are_identical_serial_and_in_a_process_pool():
+    from concurrent.futures import ProcessPoolExecutor
+    from sim.core import SimConfig, RNG_BLOCK
+
+    df = pd.read_csv("data/synth_race.csv")
+    kwargs = dict(df=df, current_compound="soft", current_tire_age=8,
+                  base_target_gap_s=-1.5, base_lap=10,
+                  candidates=[Strategy(pit_lap=12, compound="medium"),
+                              Strategy(pit_lap=25, compound="hard")],
+                  cfg=SimConfig(mc_samples=2 * RNG_BLOCK + 100))
+
+    serial = simulate(**kwargs, seed=7)
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        pooled = simulate(**kwargs, seed=7, executor=pool)
+    assert serial == pooled
+    assert serial["seed"] == 7
+    assert simulate(**kwargs, seed=8) != serial
+
+
+def test_sc_hazard_marginalises_over_sc_start_laps():
+    from sim.core import SimConfig
+
+    df = pd.read_csv("data/synth_race.csv")
+    kwargs = dict(df=df, current_compound="soft", current_tire_age=8,
+                  base_target_gap_s=-1.5, base_lap=10,
+                  candidates=[Strategy(pit_lap=14, compound="hard")],
+                  cfg=SimConfig(mc_samples=1500))
+
+    # rate 0: no SC ever, same gaps as without a hazard
+    plain = simulate(**kwargs)["candidates"][0]
+    calm = simulate(**kwargs, sc_hazard={"rate_per_lap": 0.0})["candidates"][0]
+    assert calm["p50_by_lap"] == plain["p50_by_lap"]
+    assert calm["sc_breakdown"] == [{"sc_start_lap": None, "probability": 1.0,
+                                     "median_gap_after_5_laps": pytest.approx(
+                                         plain["median_gap_after_5_laps"])}]
+
+    risky = simulate(**kwargs, sc_pit_loss_factor=0.6,
+                     sc_hazard={"rate_per_lap": [0.05] * 4 + [0.02], "min_laps": 2,
+                                "max_laps": 4})["candidates"][0]
+    breakdown = risky["sc_breakdown"]
+    assert len(breakdown) > 10
+    assert sum(b["probability"] for b in breakdown) == pytest.approx(1.0, abs=1e-3)
+    assert breakdown[0]["sc_start_lap"] == 10 and breakdown[-1]["sc_start_lap"] is None
+    by_lap = {b["sc_start_lap"]: b for b in breakdown}
+    # an SC covering the stop makes it cheaper
+    assert by_lap[14]["median_gap_after_5_laps"] > by_lap[None]["median_gap_after_5_laps"]
+
+    with pytest.raises(ValueError):
+        simulate(**kwargs, sc_window={"start_lap": 12, "end_lap": 14},
+                 sc_hazard={"rate_per_lap": 0.05})
+
+
+def test_paired_win_probabilities_and_p_ahead():
+    df = pd.read_csv("data/synth_race.csv")
+    out = simulate(df=df, current_compound="soft", current_tire_age=8,
+                   base_target_gap_s=0.2, base_lap=10,
+                   candidates=[Strategy(12, "medium"), Strategy(12, "hard"),
+                               Strategy(30, "hard")])
+    T = len(out["candidates"][0]["p50_by_lap"])
+    for c in out["candidates"]:
+        assert len(c["p_ahead_by_lap"]) == T
+        assert all(0.0 <= p <= 1.0 for p in c["p_ahead_by_lap"])
+    # staying out keeps you ahead early; pitting drops you 21 s behind
+    assert out["candidates"][2]["p_ahead_by_lap"][0] > 0.5
+    assert out["candidates"][0]["p_ahead_by_lap"][2] == 0.0
+
+    for matrix in out["win_probability"].values():
+        assert [matrix[i][i] for i in range(3)] == [None] * 3
+        for i in range(3):
+            for j in range(i + 1, 3):
+                assert matrix[i][j] + matrix[j][i] <= 1.0 + 1e-9
+    # same stop lap, medium vs hard: paired noise cancels, only the compound differs
+    assert out["win_probability"]["after_5_laps"][0][1] in (0.0, 1.0)
+    assert simulate(df=df, current_compound="soft", current_tire_age=8,
+                    base_target_gap_s=0.2, base_lap=10,
+                    candidates=[Strategy(12, "medium")])["win_probability"] is None
+
+
+def test_win_fraction_chunks_match_pairwise_means():
+    import numpy as np
+    from sim.core import _win_fraction
+
+    rng = np.random.default_rng(0)
+    a, b = rng.normal(size=(5, 101)), rng.normal(size=(3, 101))
+    naive = np.array([[np.mean(a[i] > b[j]) for j in range(3)] for i in range(5)])
+    assert np.array_equal(_win_fraction(a, b, max_cells=40), naive)  # 2-sample chunks
+    assert np.array_equal(_win_fraction(a, b), naive)
+
+
+def test_requested_quantiles_and_histograms():
+    import numpy as np
+    from sim.core import SimConfig
+
+    df = pd.read_csv("data/synth_race.csv")
+    kwargs = dict(df=df, current_compound="soft", current_tire_age=8,
+                  base_target_gap_s=-1.5, base_lap=10,
+                  candidates=[Strategy(pit_lap=13, compound="hard")],
+                  quantiles=[0.95, 0.05, 0.5], histogram_bins=12)
+    exact = simulate(**kwargs, cfg=SimConfig(mc_samples=500))["candidates"][0]
+    q = exact["quantiles_by_lap"]
+    assert list(q) == ["0.05", "0.5", "0.95"]
+    assert q["0.5"] == exact["p50_by_lap"]
+    assert all(a <= b <= c <= d for a, b, c, d in
+               zip(q["0.05"], exact["p10_by_lap"], exact["p90_by_lap"], q["0.95"]))
+    hist = exact["histogram"]
+    assert np.array(hist["counts"]).shape == (len(exact["p50_by_lap"]), 12)
+    assert all(sum(row) == 500 for row in hist["counts"])
+
+    chunked = simulate(**kwargs, cfg=SimConfig(mc_samples=500, chunk_size=200))["candidates"][0]
+    assert all(sum(row) == 500 for row in chunked["histogram"]["counts"])
+    assert np.allclose(chunked["quantiles_by_lap"]["0.95"], q["0.95"], atol=0.005 + 1e-9)
+    assert "quantiles_by_lap" not in simulate(**{**kwargs, "quantiles": None})["candidates"][0]
@@ -0,0 +1,78 @@
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import TimeoutError as FuturesTimeout
+import pandas as pd
+import pytest
+from multiprocessing.connection import Client
+from sim.core import RNG_BLOCK, SimConfig, Strategy, simulate
+from sim.distributed import Coordinator, authkey_from_env, run_worker
+
+
+def _flaky_worker(address, authkey):
+    """Registers, takes one task and dies without answering"""
+    conn = Client(address, authkey=authkey)
+    conn.send(("register", "flaky"))
+    conn.recv()
+    os._exit(1)
+
+
+def test_sharded_run_survives_worker_loss_and_matches_serial():
+    df = pd.read_csv("data/synth_race.csv")
+    kwargs = dict(df=df, current_compound="soft", current_tire_age=8,
+                  base_target_gap_s=-1.5, base_lap=10,
+                  candidates=[Strategy(pit_lap=12, compound="medium"),
+                              Strategy(pit_lap=14, compound="hard")],
+                  cfg=SimConfig(mc_samples=6 * RNG_BLOCK, chunk_size=RNG_BLOCK),
+                  seed=11)
+
+    coordinator = Coordinator(task_timeout=30)
+    ctx = mp.get_context("fork")
+    procs = [ctx.Process(target=_flaky_worker, args=(coordinator.address, coordinator.authkey))]
+    procs += [ctx.Process(target=run_worker, args=(coordinator.address, coordinator.authkey),
+                          daemon=True)
+              for _ in range(2)]
+    procs[0].start()
+    assert coordinator.wait_for_workers(1)
+    for p in procs[1:]:
+        p.start()
+    assert coordinator.wait_for_workers(3)
+
+    try:
+        distributed = simulate(**kwargs, executor=coordinator)
+        metrics = coordinator.metrics()
+    finally:
+        coordinator.shutdown()
+        for p in procs:
+            p.join(5)
+
+    assert distributed == simulate(**kwargs)
+    assert metrics["reissued"] >= 1
+    assert metrics["completed"] == 12  # 6 blocks x 2 candidates
+    assert "flaky" not in metrics["workers"]
+
+
+def test_result_timeout_without_workers_cancels_instead_of_hanging():
+    df = pd.read_csv("data/synth_race.csv")
+    coordinator = Coordinator()
+    try:
+        assert coordinator.worker_count == 0
+        t0 = time.monotonic()
+        with pytest.raises(FuturesTimeout):
+            simulate(df, "soft", 8, -1.5, 10, [Strategy(12, "medium")],
+                     cfg=SimConfig(mc_samples=200), executor=coordinator, result_timeout=0.2)
+        assert time.monotonic() - t0 < 5
+        assert coordinator.metrics()["queued"] == 1  # left queued, but cancelled
+    finally:
+        coordinator.shutdown(cancel_futures=True)
+
+
+def test_authkey_must_come_from_environment(monkeypatch):
+    monkeypatch.delenv("SIM_COORDINATOR_AUTHKEY", raising=False)
+    with pytest.raises(RuntimeError):
+        authkey_from_env()
+    monkeypatch.setenv("SIM_COORDINATOR_AUTHKEY", "short")
+    with pytest.raises(RuntimeError):
+        authkey_from_env()
+    monkeypatch.setenv("SIM_COORDINATOR_AUTHKEY", "x" * 32)
+    assert authkey_from_env() == b"x" * 32
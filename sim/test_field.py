@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sim.core import SimConfig
+from sim.field import FieldCar, field_from_df, simulate_field
+
+
+def test_field_shapes_positions_and_seed():
+    df = pd.read_csv("data/synth_race.csv")
+    cars = [FieldCar(f"car{i}", "medium", 5, gap_to_leader_s=i * 0.8) for i in range(6)]
+    out = simulate_field(df, cars, base_lap=5, cfg=SimConfig(mc_samples=300), seed=3)
+    T = int(df["lap"].max()) - 4
+    assert out.times.shape == out.positions.shape == (300, 6, T)
+    # every lap is a permutation of 1..cars
+    assert (np.sort(out.positions, axis=1) == np.arange(1, 7)[None, :, None]).all()
+    summary = out.summary()
+    assert [s["start_position"] for s in summary] == list(range(1, 7))
+    assert all(abs(sum(s["position_probabilities"]) - 1) < 1e-3 for s in summary)
+    again = simulate_field(df, cars, base_lap=5, cfg=SimConfig(mc_samples=300), seed=3)
+    assert np.array_equal(out.times, again.times)
+
+
+def test_rejoining_behind_slower_car_costs_traffic_penalty():
+    df = pd.read_csv("data/synth_race.csv")
+    # fast car pits on lap 6 and rejoins just behind a much slower car
+    cars = [FieldCar("slow", "hard", 0, gap_to_leader_s=0.0, pace_offset_s=1.5),
+            FieldCar("fast", "soft", 0, gap_to_leader_s=-17.5, pit_lap=6,
+                     pit_compound="soft")]
+    cfg = SimConfig(mc_samples=200, pit_loss_std=0.0)
+    with_traffic = simulate_field(df, cars, base_lap=5, cfg=cfg)
+    no_traffic = simulate_field(df, cars, base_lap=5,
+                                cfg=SimConfig(mc_samples=200, pit_loss_std=0.0,
+                                              traffic_penalty_s=0.0))
+    fast = 1
+    assert (with_traffic.traffic_laps[:, fast] >= 1).all()
+    assert (with_traffic.traffic_laps[:, 0] == 0).all()
+    lost = with_traffic.times[:, fast, -1] - no_traffic.times[:, fast, -1]
+    assert np.allclose(lost, with_traffic.traffic_laps[:, fast] * cfg.traffic_penalty_s)
+
+
+def test_field_from_multi_car_dataset():
+    rows = []
+    for car, (compound, offset) in {"A": ("soft", 0.0), "B": ("hard", 0.4)}.items():
+        for lap in range(1, 11):
+            rows.append({"car": car, "lap": lap, "compound": compound, "stint": 1 + (lap > 6),
+                         "base_pace_s": 92.0 + offset, "lap_time_s": 92.0 + offset})
+    cars = field_from_df(pd.DataFrame(rows), base_lap=9)
+    a, b = cars
+    assert (a.name, a.tire_age, a.gap_to_leader_s) == ("A", 2, 0.0)
+    assert b.gap_to_leader_s == pytest.approx(8 * 0.4)
+    assert b.pace_offset_s > a.pace_offset_s
+
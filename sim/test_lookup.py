@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+from sim.core import SimConfig, Strategy, simulate
+from sim.lookup import DecisionGrid, DecisionTable
+
+DF = pd.read_csv("data/synth_race.csv")
+GRID = DecisionGrid(mc_samples=100, pit_horizon=4)
+
+
+def test_table_matches_simulate_on_grid_points():
+    table = DecisionTable.build(DF, GRID)
+    options = table.lookup(10, "soft", 8, -1.5)
+    assert [o["median_gap_after_5_laps"] for o in options] == sorted(
+        (o["median_gap_after_5_laps"] for o in options), reverse=True)
+
+    best = options[0]
+    out = simulate(DF, "soft", 8, -1.5, 10, [Strategy(best["pit_lap"], best["compound"])],
+                   cfg=SimConfig(mc_samples=GRID.mc_samples))
+    assert np.isclose(best["median_gap_after_5_laps"],
+                      out["candidates"][0]["median_gap_after_5_laps"], atol=1e-4)
+
+    # tyre age between buckets interpolates; outside the grid is left to simulate()
+    mid = table.lookup(10, "soft", 10, -1.5)
+    assert len(mid) == len(options)
+    assert table.lookup(10, "soft", 40, -1.5) is None
+    assert table.lookup(99, "soft", 8, -1.5) is None
@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sim.core import SimConfig, Strategy, simulate
+from sim.offline import open_writer, pq, read_scenarios, run_offline
+
+
+def test_offline_run_streams_npz_in_scenario_order(tmp_path):
+    scenarios = [{"base_lap": 10, "base_target_gap_s": g, "current_compound": "soft",
+                  "current_tire_age": a, "mc_samples": 100,
+                  "candidates": [{"pit_lap": 12, "compound": "medium"},
+                                 {"pit_lap": 14, "compound": "hard"}]}
+                 for a in (6, 9) for g in (-2.0, 0.0, 2.0)]
+    scenarios.append({**scenarios[0], "seed": 7, "candidates": [{"pit_lap": 13, "compound": "hard"}]})
+    path = tmp_path / "scenarios.jsonl"
+    path.write_text("".join(json.dumps(s) + "\n" for s in scenarios))
+
+    progress = []
+    summary = run_offline(read_scenarios(str(path)), "data/synth_race.csv",
+                          str(tmp_path / "out.npz"), workers=2, chunk_size=3,
+                          max_inflight=1, progress=progress.append)
+    assert (summary["scenarios"], summary["rows"]) == (7, 13)
+    assert progress[-1]["scenarios"] == 7
+
+    out = np.load(tmp_path / "out.npz")
+    assert out["scenario"].tolist() == [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6]
+    assert out["compound"][-1] == "hard" and out["pit_lap"][-1] == 13
+
+    s = scenarios[-1]
+    ref = simulate(pd.read_csv("data/synth_race.csv"), "soft", 6, -2.0, 10,
+                   [Strategy(13, "hard")], cfg=SimConfig(mc_samples=100), seed=7)
+    assert out["median_gap_after_5_laps"][-1] == pytest.approx(
+        ref["candidates"][0]["median_gap_after_5_laps"])
+    assert s["base_target_gap_s"] == out["base_target_gap_s"][-1]
+
+
+def test_csv_scenarios_and_default_candidates(tmp_path):
+    path = tmp_path / "grid.csv"
+    path.write_text("base_lap,base_target_gap_s,current_compound,current_tire_age,candidates\n"
+                    "10,-1.5,soft,8,\n"
+                    "11,0.5,medium,4,15:hard\n")
+    rows = list(read_scenarios(str(path), [{"pit_lap": 12, "compound": "medium"}]))
+    assert rows[0]["candidates"] == [{"pit_lap": 12, "compound": "medium"}]
+    assert rows[1]["candidates"] == [{"pit_lap": 15, "compound": "hard"}]
+    with pytest.raises(ValueError):
+        list(read_scenarios(str(path)))
+
+    sc = tmp_path / "sc.csv"
+    sc.write_text("base_lap,base_target_gap_s,current_compound,current_tire_age,candidates,"
+                  "sc_start_lap,sc_end_lap\n"
+                  "10,-1.5,soft,8,12:medium,12,14\n"
+                  "10,-1.5,soft,8,12:medium,,\n")
+    rows = list(read_scenarios(str(sc)))
+    assert rows[0]["sc_window"] == {"start_lap": 12, "end_lap": 14}
+    assert "sc_window" not in rows[1]
+
+
+def test_failed_run_leaves_no_partial_output(tmp_path):
+    good = {"base_lap": 10, "base_target_gap_s": 0.0, "current_compound": "soft",
+            "current_tire_age": 6, "mc_samples": 50,
+            "candidates": [{"pit_lap": 12, "compound": "medium"}]}
+    scenarios = [good] * 3 + [{**good, "base_lap": 999}]  # no laps to simulate
+    out = tmp_path / "out.npz"
+    with pytest.raises(ValueError):
+        run_offline(scenarios, "data/synth_race.csv", str(out), workers=1, chunk_size=1)
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.skipif(pq is not None, reason="pyarrow installed")
+def test_parquet_needs_pyarrow(tmp_path):
+    with pytest.raises(RuntimeError):
+        open_writer(str(tmp_path / "out.parquet"))
@@ -0,0 +1,107 @@
+import threading
+import time
+from sim.scheduler import SimScheduler
+
+
+def test_each_class_has_its_own_concurrency_budget():
+    sched = SimScheduler(limits={"bulk": 1, "interactive": 2})
+    peak = {"bulk": 0, "interactive": 0}
+    running = {"bulk": 0, "interactive": 0}
+    lock = threading.Lock()
+
+    def work(priority):
+        with lock:
+            running[priority] += 1
+            peak[priority] = max(peak[priority], running[priority])
+        time.sleep(0.05)
+        with lock:
+            running[priority] -= 1
+
+    threads = [threading.Thread(target=sched.run, args=(p, lambda p=p: work(p)))
+               for p in ["bulk"] * 3 + ["interactive"] * 4]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak == {"bulk": 1, "interactive": 2}
+    assert sched.metrics()["completed"]["bulk"] == 3
+
+
+def test_bulk_yields_to_interactive_between_batches():
+    sched = SimScheduler()
+    inside = threading.Event()
+    release = threading.Event()
+
+    def interactive():
+        inside.set()
+        release.wait(2)
+
+    t = threading.Thread(target=sched.run, args=("interactive", interactive))
+    t.start()
+    inside.wait(2)
+
+    yielded = []
+    bulk = threading.Thread(target=lambda: yielded.append(sched.checkpoint()))
+    bulk.start()
+    time.sleep(0.05)
+    assert bulk.is_alive()  # parked while the interactive query runs
+    release.set()
+    t.join()
+    bulk.join(2)
+    assert yielded == [True]
+    assert sched.checkpoint() is False
+
+
+def test_memory_budget_serialises_large_runs():
+    sched = SimScheduler(limits={"bulk": 4}, memory_budget_bytes=100)
+    order = []
+
+    def big(name):
+        order.append(f"start {name}")
+        time.sleep(0.05)
+        order.append(f"end {name}")
+
+    threads = [threading.Thread(target=sched.run, args=("bulk", lambda n=n: big(n), 80))
+               for n in "ab"]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 80 + 80 > 100, so the second run only starts after the first finishes
+    assert order[1].startswith("end")
+
+
+def test_over_budget_runs_are_rejected_not_admitted_alone():
+    import pytest
+    from sim.scheduler import OverBudget
+
+    sched = SimScheduler(memory_budget_bytes=100)
+    with pytest.raises(OverBudget):
+        sched.run("bulk", lambda: None, 101)
+    assert sched.run("interactive", lambda: "ok", 100) == "ok"
+    assert sched.metrics()["memory_in_use_bytes"] == 0
+
+
+def test_promoted_ticket_jumps_the_bulk_queue():
+    from sim.scheduler import Ticket
+
+    sched = SimScheduler(limits={"bulk": 1})
+    release, ran = threading.Event(), threading.Event()
+    first = threading.Thread(target=sched.run, args=("bulk", lambda: release.wait(2)))
+    first.start()
+    time.sleep(0.05)
+
+    ticket = Ticket("bulk")
+    queued = threading.Thread(target=sched.run, args=("bulk", ran.set, 0, ticket))
+    queued.start()
+    time.sleep(0.05)
+    assert not ran.is_set()  # behind the running bulk job
+
+    assert sched.promote(ticket, "interactive")  # e.g. a /run_sim joined this flight
+    assert ran.wait(1)  # admitted as interactive while the first bulk job still runs
+    assert not sched.promote(ticket, "interactive")
+    release.set()
+    first.join()
+    queued.join()
+    assert sched.metrics()["completed"] == {"interactive": 1, "agent": 0, "bulk": 1}
@@ -0,0 +1,69 @@
+import threading
+import time
+import pytest
+from sim.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    flights = SingleFlight()
+    runs = []
+    gate = threading.Barrier(4)
+
+    def compute():
+        runs.append(1)
+        time.sleep(0.2)
+        return {"value": 42}
+
+    def call():
+        gate.wait()
+        return flights.do("scenario", compute)
+
+    threads, out = [], []
+    for _ in range(4):
+        t = threading.Thread(target=lambda: out.append(call()))
+        threads.append(t)
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(runs) == 1
+    assert all(result == {"value": 42} for result, _ in out)
+    assert sorted(shared for _, shared in out) == [False, True, True, True]
+    m = flights.metrics()
+    assert (m["calls"], m["executed"], m["coalesced"], m["in_flight"]) == (4, 1, 3, 0)
+
+
+def test_failures_are_not_remembered():
+    flights = SingleFlight()
+
+    def boom():
+        raise ValueError("bad scenario")
+
+    with pytest.raises(ValueError):
+        flights.do("k", boom)
+    assert flights.do("k", lambda: 1) == (1, False)
+    assert flights.metrics()["errors"] == 1
+
+
+def test_joining_callers_see_the_leader_state():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    joined = []
+
+    def compute():
+        started.set()
+        release.wait(2)
+        return 1
+
+    leader = threading.Thread(target=flights.do, args=("k", compute),
+                              kwargs={"state": "leader-ticket"})
+    leader.start()
+    started.wait(2)
+    follower = threading.Thread(target=flights.do, args=("k", compute),
+                                kwargs={"on_join": joined.append})
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+    assert joined == ["leader-ticket"]
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from sim.core import simulate, SimConfig, Strategy
+from sim.sketch import QuantileSketch
+
+
+def test_sketch_quantiles_are_within_error_bound():
+    rng = np.random.default_rng(0)
+    samples = np.cumsum(rng.normal(0.1, 0.4, size=(5000, 30)), axis=1)
+    sketch = QuantileSketch(30, error_s=0.01)
+    for block in np.array_split(samples, 7):
+        sketch.update(block)
+
+    qs = [0.0, 0.1, 0.5, 0.9, 1.0]
+    exact = np.quantile(samples, qs, axis=0)
+    assert np.abs(sketch.quantiles(qs) - exact).max() <= 0.01 + 1e-12
+
+
+def test_merged_sketches_match_a_single_pass():
+    rng = np.random.default_rng(1)
+    a, b = rng.normal(-3, 1, (400, 5)), rng.normal(4, 2, (600, 5))
+    whole = QuantileSketch(5)
+    whole.update(np.vstack([a, b]))
+    left, right = QuantileSketch(5), QuantileSketch(5)
+    left.update(a)
+    right.update(b)
+    merged = left.merge(right)
+    assert merged.count == 1000
+    assert np.allclose(merged.quantiles([0.1, 0.5, 0.9]), whole.quantiles([0.1, 0.5, 0.9]))
+
+
+def test_chunked_simulation_matches_exact_within_bound():
+    df = pd.read_csv("data/synth_race.csv")
+    kwargs = dict(df=df, current_compound="soft", current_tire_age=8,
+                  base_target_gap_s=-1.5, base_lap=10,
+                  candidates=[Strategy(pit_lap=12, compound="medium")])
+    exact = simulate(**kwargs, cfg=SimConfig(mc_samples=300))
+    chunked = simulate(**kwargs, cfg=SimConfig(mc_samples=300, chunk_size=64,
+                                               quantile_error_s=0.002))
+    e, c = exact["candidates"][0], chunked["candidates"][0]
+    for key in ("p10_by_lap", "p50_by_lap", "p90_by_lap"):
+        assert np.abs(np.array(e[key]) - np.array(c[key])).max() <= 0.002 + 1e-9
+    assert c["assumptions"]["quantile_error_s"] == 0.002
@@ -0,0 +1,47 @@
+import pandas as pd
+from sim.core import SimConfig, Strategy, simulate
+from sim.surrogate import Surrogate, SurrogateConfig
+
+DF = pd.read_csv("data/synth_race.csv")
+
+
+def test_surrogate_tracks_simulate_and_falls_back_when_unsure():
+    cfg = SurrogateConfig(states=80, mc_samples=200)
+    model = Surrogate.train(DF, cfg)
+    assert model.report["holdout_mae_s"] < 0.1
+
+    cands = [Strategy(12, "medium"), Strategy(15, "hard")]
+    preds = model.predict(DF, 10, "soft", 8, -1.5, cands)
+    sim = simulate(DF, "soft", 8, -1.5, 10, cands, cfg=SimConfig(mc_samples=200))
+    for p, s in zip(preds, sim["candidates"]):
+        assert abs(p["median_gap_after_5_laps"] - s["median_gap_after_5_laps"]) < 0.3
+        assert p["p10"] < p["median_gap_after_5_laps"] < p["p90"]
+
+    # a tight error budget, or a pit lap beyond the trained horizon, goes to simulate()
+    strict = model.score(DF, 10, "soft", 8, -1.5, cands, max_error_s=1e-6)
+    assert {p["source"] for p in strict} == {"simulate"}
+    loose = model.score(DF, 2, "soft", 8, -1.5, [Strategy(4, "hard"), Strategy(19, "hard")])
+    assert [p["source"] for p in loose] == ["surrogate", "simulate"]
+
+
+def test_error_bars_are_calibrated_per_region_and_gate_each_candidate():
+    cfg = SurrogateConfig(states=80, mc_samples=200)
+    model = Surrogate.train(DF, cfg)
+    assert model.region_error_s
+
+    near, far = Strategy(12, "medium"), Strategy(15, "medium")  # offsets 2 and 5
+    e_near, e_far = model.error_bar("medium", 2)[0], model.error_bar("medium", 5)[0]
+    assert e_near != e_far
+    preds = model.predict(DF, 10, "soft", 8, -1.5, [near, far])
+    assert [p["error_s"] for p in preds] == [e_near, e_far]
+
+    calls = []
+
+    def run(todo):
+        calls.append(todo)
+        return simulate(DF, "soft", 8, -1.5, 10, todo, cfg=SimConfig(mc_samples=200))
+
+    scored = model.score(DF, 10, "soft", 8, -1.5, [near, far],
+                         max_error_s=(e_near + e_far) / 2, run=run)
+    assert [p["source"] for p in scored] == (["surrogate", "simulate"] if e_near < e_far else ["simulate", "surrogate"])
+    assert len(calls) == 1 and len(calls[0]) == 1